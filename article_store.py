@@ -0,0 +1,222 @@
+"""
+Module providing the in-memory store of news articles shown on the dashboard.
+"""
+import atexit
+import json
+import logging
+import os
+from collections import OrderedDict
+from threading import Lock, Timer
+from typing import Optional
+
+
+class ArticleStore:
+    """
+    Ordered, in-memory set of news articles keyed by title, which requests read and
+    update without touching the disk. Changes are written back to the JSON file on a
+    background timer, so a burst of changes becomes one write, and each write goes
+    to a temporary file that is atomically renamed over the old one.
+
+        Attributes:
+            filename (str): JSON file the articles are persisted to.
+            flush_delay (float): Seconds to wait after a change before writing,
+                collecting any further changes into the same write.
+    """
+
+    def __init__(self, filename: str, flush_delay: float = 1.0) -> None:
+        self.filename = filename
+        self.flush_delay = flush_delay
+        self._articles = OrderedDict()
+        self._urls = {}
+        self._lock = Lock()
+        self._write_lock = Lock()
+        self._timer = None
+        self._version = 0
+        self._flushed_version = 0
+        self.load()
+        atexit.register(self.flush)
+
+    def load(self) -> None:
+        """
+        Reads the articles from the JSON file, replacing those in memory. A missing
+            or empty file gives an empty store.
+
+            Parameters:
+                None
+
+            Returns:
+                None
+        """
+        try:
+            with open(self.filename, encoding="utf-8") as arts:
+                articles = json.load(arts)
+        except (OSError, ValueError):
+            articles = []
+        with self._lock:
+            self._set(articles)
+            self._flushed_version = self._version
+
+    def _set(self, articles: list[dict]) -> None:
+        self._articles = OrderedDict((article["title"], article) for article in articles)
+        self._urls = {article["url"]: article["title"]
+                      for article in articles if article.get("url")}
+        self._version += 1
+
+    def articles(self) -> list[dict]:
+        """
+        Returns the stored articles in order. Each article is a copy, so callers
+            may modify them freely.
+
+            Parameters:
+                None
+
+            Returns:
+                articles (list[dict]): The stored articles.
+        """
+        with self._lock:
+            return [dict(article) for article in self._articles.values()]
+
+    def get(self, title: str = None, url: str = None) -> Optional[dict]:
+        """
+        Looks up an article by title or url.
+
+            Parameters:
+                title (str): Title of the article.
+                url (str): Url of the article.
+
+            Returns:
+                article (dict): A copy of the article, or None if it is not stored.
+        """
+        with self._lock:
+            if title is None:
+                title = self._urls.get(url)
+            article = self._articles.get(title)
+            return None if article is None else dict(article)
+
+    def replace(self, articles: list[dict]) -> None:
+        """
+        Makes the given articles the stored set, in the given order, and schedules a write.
+
+            Parameters:
+                articles (list[dict]): The new articles.
+
+            Returns:
+                None
+        """
+        with self._lock:
+            self._set(articles)
+        self._schedule_flush()
+
+    def latest_published(self) -> Optional[str]:
+        """
+        Returns the publication time of the newest stored article, the point from which
+            the next incremental fetch starts.
+
+            Parameters:
+                None
+
+            Returns:
+                published_at (str): The newest ISO 8601 publishedAt, or None if no
+                    stored article has one.
+        """
+        with self._lock:
+            return max((article["publishedAt"] for article in self._articles.values()
+                        if article.get("publishedAt")), default=None)
+
+    def merge(self, articles: list[dict], oldest: str, limit: int) -> int:
+        """
+        Adds newly fetched articles in front of the stored ones, skipping any already
+            stored by title or url, then drops articles published before oldest and any
+            beyond the limit, and schedules a write. The stored articles are kept newest
+            first, so only the new articles and those aged out are touched. An article
+            without a publishedAt is taken to be published now, so is only dropped once
+            it is beyond the limit.
+
+            Parameters:
+                articles (list[dict]): Fetched articles, newest first.
+                oldest (str): ISO 8601 time before which articles are dropped.
+                limit (int): Most articles to keep.
+
+            Returns:
+                added (int): Number of new articles stored.
+        """
+        with self._lock:
+            added = 0
+            for article in reversed(articles):  # Oldest first, each moved to the front
+                if article["title"] in self._articles or article.get("url") in self._urls:
+                    continue
+                self._articles[article["title"]] = article
+                self._articles.move_to_end(article["title"], last=False)
+                if article.get("url"):
+                    self._urls[article["url"]] = article["title"]
+                added += 1
+            while self._articles and (len(self._articles) > limit or
+                                      self._aged_out(next(reversed(self._articles.values())),
+                                                     oldest)):
+                _, article = self._articles.popitem()
+                self._urls.pop(article.get("url"), None)
+            self._version += 1
+        self._schedule_flush()
+        return added
+
+    @staticmethod
+    def _aged_out(article: dict, oldest: str) -> bool:
+        published_at = article.get("publishedAt")
+        return published_at is not None and published_at < oldest
+
+    def remove(self, title: str) -> bool:
+        """
+        Removes an article by title and schedules a write.
+
+            Parameters:
+                title (str): Title of the article.
+
+            Returns:
+                removed (bool): Whether or not the article was stored.
+        """
+        with self._lock:
+            article = self._articles.pop(title, None)
+            if article is None:
+                return False
+            self._urls.pop(article.get("url"), None)
+            self._version += 1
+        self._schedule_flush()
+        return True
+
+    def _schedule_flush(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                return  # A write is already due and will include this change
+            self._timer = Timer(self.flush_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> None:
+        """
+        Writes the stored articles to the JSON file if they have changed since the
+            last write, via a temporary file and an atomic rename.
+
+            Parameters:
+                None
+
+            Returns:
+                None
+        """
+        with self._write_lock:
+            with self._lock:
+                self._timer = None
+                if self._version == self._flushed_version:
+                    return
+                version = self._version
+                articles = list(self._articles.values())
+            temp_file = f"{self.filename}.{os.getpid()}.tmp"
+            try:
+                with open(temp_file, "w", encoding="utf-8") as arts:
+                    json.dump(articles, arts)
+                os.replace(temp_file, self.filename)
+            except OSError:
+                logging.exception("News articles could not be written to file")
+                return
+            with self._lock:
+                self._flushed_version = version
+        logging.info("News articles successfully written to file")
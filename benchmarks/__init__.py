@@ -0,0 +1,3 @@
+"""
+Offline benchmarks and local stand-ins for the external APIs used by the dashboard.
+"""
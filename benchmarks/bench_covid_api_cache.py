@@ -0,0 +1,48 @@
+"""
+Benchmarks the Covid API snapshot cache on a miss, a hit and an incremental merge,
+using the local Covid API stand-in with simulated network latency.
+
+Run with: python -m benchmarks.bench_covid_api_cache
+"""
+import tempfile
+import time
+from datetime import timedelta
+from covid_api_cache import CovidSnapshotCache
+from benchmarks.fake_apis import FakeCov19API
+
+STRUCTURE = {
+    "date": "date",
+    "areaName": "areaName",
+    "Hospital Cases": "hospitalCases",
+    "Total Deaths": "cumDeaths28DaysByDeathDate",
+}
+FILTERS = ["areaType=nation", "areaName=England"]
+
+
+def timed(label: str, function) -> None:
+    """
+    Prints how long a single call to the given function took.
+    """
+    start = time.perf_counter()
+    function()
+    print(f"{label:<8}{(time.perf_counter() - start) * 1000:10.2f} ms")
+
+
+def main() -> None:
+    """
+    Runs the miss, hit and merge benchmarks against a temporary cache directory.
+    """
+    fake_api = FakeCov19API(days=700, latency=0.05)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = CovidSnapshotCache(cache_dir, 3600, fake_api,
+                                   today=lambda: fake_api.latest)
+        timed("miss", lambda: cache.get(FILTERS, STRUCTURE))
+        timed("hit", lambda: cache.get(FILTERS, STRUCTURE))
+        fake_api.latest += timedelta(1)
+        cache.ttl = 0
+        timed("merge", lambda: cache.get(FILTERS, STRUCTURE))
+        print(cache.stats, f"requests: {len(fake_api.calls)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Compares the eager CSV path (parse_csv_data then process_covid_csv_data) against
+the streaming path on a synthetic nation export. Each path runs in its own process
+so its peak memory can be reported separately.
+
+Run with: python -m benchmarks.bench_csv_streaming [--rows N] [--gzip]
+About 40 million rows gives a multi-gigabyte file.
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.generators import write_nation_csv
+
+
+def run_path(path_name: str, csv_filename: str) -> None:
+    """
+    Runs one CSV path and prints its result, duration and peak memory.
+    """
+    import covid_data_handler as cdh  # pylint: disable=import-outside-toplevel
+    start = time.perf_counter()
+    if path_name == "eager":
+        result = cdh.process_covid_csv_data(cdh.parse_csv_data(csv_filename))
+    else:
+        result = cdh.process_covid_csv_file(csv_filename)
+    duration = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{path_name:<10}{duration:10.3f} s{peak_mb:10.1f} MB peak  {result}")
+
+
+def main() -> None:
+    """
+    Generates the synthetic file and benchmarks both paths against it.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--run", nargs=2, metavar=("PATH", "FILE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        run_path(*args.run)
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        csv_filename = os.path.join(directory, "nation.csv" + (".gz" if args.gzip else ""))
+        write_nation_csv(csv_filename, args.rows)
+        print(f"{args.rows} rows, {os.path.getsize(csv_filename) / 2**20:.1f} MB on disk")
+        paths = ["stream"] if args.gzip else ["eager", "stream"]  # parse_csv_data reads plain text only
+        for path_name in paths:
+            subprocess.run([sys.executable, "-m", "benchmarks.bench_csv_streaming",
+                            "--run", path_name, csv_filename], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Micro-benchmark of FirstNonNullIndex against the per-metric
+first_non_null_entry_api calls the dashboard used to make on every refresh:
+two on the local response and four on the national one.
+
+"cold" builds a new index each time. "shared" is the refresh path, where the
+index of an unchanged (cached) response is built once and reused.
+
+Run with: python -m benchmarks.bench_first_non_null
+"""
+import timeit
+from covid_data_handler import DASHBOARD_FIELDS, first_non_null_entry_api
+from covid_metrics_index import FirstNonNullIndex
+from benchmarks.fake_apis import FakeCov19API
+
+STRUCTURE = {
+    "date": "date",
+    "areaName": "areaName",
+    "National 7-Day Infection Rate": "newCasesByPublishDateRollingSum",
+    "Hospital Cases": "hospitalCases",
+    "Total Deaths": "cumDeaths28DaysByDeathDate",
+}
+RUNS = 2000
+
+
+def response(null_days: dict) -> dict:
+    """
+    Builds a fake response in which each metric is null for its given number of newest days.
+    """
+    data = FakeCov19API(days=700)([], STRUCTURE)
+    for metric, days in null_days.items():
+        for row in data["data"][:days]:
+            row[metric] = None
+    return data
+
+
+def compare(label: str, local_data: dict, national_data: dict) -> None:
+    """
+    Times one refresh worth of lookups with both approaches.
+    """
+    def scans():
+        for field in DASHBOARD_FIELDS[:2]:
+            first_non_null_entry_api(local_data, field)
+        for field in DASHBOARD_FIELDS:
+            first_non_null_entry_api(national_data, field)
+
+    def cold():
+        FirstNonNullIndex.from_api(local_data, DASHBOARD_FIELDS[:2])
+        FirstNonNullIndex.from_api(national_data, DASHBOARD_FIELDS)
+
+    def shared():
+        FirstNonNullIndex.for_response(local_data, DASHBOARD_FIELDS[:2])
+        FirstNonNullIndex.for_response(national_data, DASHBOARD_FIELDS)
+
+    scan_ms = timeit.timeit(scans, number=RUNS) * 1000 / RUNS
+    index_ms = timeit.timeit(cold, number=RUNS) * 1000 / RUNS
+    shared_ms = timeit.timeit(shared, number=RUNS) * 1000 / RUNS
+    print(f"{label}")
+    print(f"  per-metric scans       {scan_ms:8.4f} ms")
+    print(f"  index, cold            {index_ms:8.4f} ms  ({scan_ms / index_ms:.2f}x)")
+    print(f"  index, shared          {shared_ms:8.4f} ms  ({scan_ms / shared_ms:.2f}x)")
+
+
+def main() -> None:
+    """
+    Runs the comparison on recent-data and lagging-data shaped responses.
+    """
+    recent = {"National 7-Day Infection Rate": 1, "Hospital Cases": 3, "Total Deaths": 5}
+    compare("metrics a few days behind", response(recent), response(recent))
+    lagging = {metric: 200 for metric in DASHBOARD_FIELDS[1:]}
+    compare("metrics 200 days behind", response(lagging), response(lagging))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Local stand-ins for the external APIs, so tests and benchmarks can run offline.
+"""
+import hashlib
+import json
+import time
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeCov19API:
+    """
+    Imitates the PHE Covid API for a single area, generating one row per day.
+
+        Attributes:
+            days (int): Number of days of history the area has.
+            latest (date): Date of the newest row.
+            latency (float): Seconds each call pretends to take.
+            calls (list): The filters of every request received.
+            heads (int): Number of last update checks received.
+    """
+
+    def __init__(self, days: int = 600, latest: date = date(2021, 10, 28),
+                 latency: float = 0.0) -> None:
+        self.days = days
+        self.latest = latest
+        self.latency = latency
+        self.calls = []
+        self.heads = 0
+
+    def last_update(self, filters: list, structure: dict) -> str:
+        """
+        Answers a last update check as Cov19API.last_update does, changing whenever
+            a new day of data is added.
+        """
+        self.heads += 1
+        return f"{self.latest.isoformat()}T15:00:00.000000Z"
+
+    def row(self, day: date, structure: dict) -> dict:
+        """
+        Builds the row the API would return for the given day.
+
+            Parameters:
+                day (date): The day of the row.
+                structure (dict): API structure mapping output names to metrics.
+
+            Returns:
+                row (dict): Values for each name in the structure.
+        """
+        ordinal = day.toordinal()
+        values = {
+            "date": day.isoformat(),
+            "areaName": "England",
+            "areaCode": "E92000001",
+            "newCasesByPublishDateRollingSum": ordinal % 1000 * 7,
+            "hospitalCases": ordinal % 500,
+            "cumDeaths28DaysByDeathDate": ordinal - 737000,
+        }
+        return {name: values.get(metric) for name, metric in structure.items()}
+
+    def __call__(self, filters: list, structure: dict) -> dict:
+        """
+        Answers a request in the same shape as Cov19API.get_json().
+
+            Parameters:
+                filters (list): API filters, optionally including "date=YYYY-MM-DD"
+                    or "date>YYYY-MM-DD".
+                structure (dict): API structure mapping output names to metrics.
+
+            Returns:
+                payload (dict): The generated response, newest row first.
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        self.calls.append(list(filters))
+        days = [self.latest - timedelta(offset) for offset in range(self.days)]
+        for area_filter in filters:
+            if area_filter.startswith("date="):
+                wanted = date.fromisoformat(area_filter[len("date="):])
+                days = [day for day in days if day == wanted]
+            elif area_filter.startswith("date>"):
+                after = date.fromisoformat(area_filter[len("date>"):])
+                days = [day for day in days if day > after]
+        data = [self.row(day, structure) for day in days]
+        return {"data": data, "length": len(data), "totalPages": 1}
+
+
+class FakeNewsAPIServer:
+    """
+    Serves NewsAPI's everything endpoint on a local port, generating numbered articles
+    newest first, one every ten minutes, and honouring the "from" parameter. Use as a
+    context manager; the endpoint is at url.
+
+        Attributes:
+            total (int): Number of articles matching every query.
+            failures (int): Number of requests answered with a 503 before any succeed.
+            latency (float): Seconds each request pretends to take.
+            latest (datetime): Publication time of the newest article.
+            etags (bool): Whether or not responses carry an ETag and honour If-None-Match.
+            requests (list): The query parameters of every request received.
+            max_in_flight (int): Most requests that were being answered at the same time.
+            url (str): Address of the everything endpoint, once started.
+    """
+
+    def __init__(self, total: int = 250, failures: int = 0, latency: float = 0.0,
+                 latest: datetime = datetime(2021, 10, 28, 12), etags: bool = False) -> None:
+        self.total = total
+        self.etags = etags
+        self.failures = failures
+        self.latency = latency
+        self.latest = latest
+        self.requests = []
+        self.max_in_flight = 0
+        self.url = None
+        self._in_flight = 0
+        self._lock = Lock()
+        self._server = None
+
+    def article(self, number: int) -> dict:
+        """
+        Builds the article NewsAPI would return at the given position.
+
+            Parameters:
+                number (int): Position of the article, 0 being the newest.
+
+            Returns:
+                article (dict): The article.
+        """
+        published = self.latest - timedelta(minutes=10 * number)
+        return {
+            "source": {"id": None, "name": "BBC News"},
+            "author": "BBC News",
+            "title": f"Covid article {number}",
+            "description": f"Description {number}",
+            "url": f"https://www.bbc.co.uk/news/{number}",
+            "publishedAt": published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "content": f"Content {number}",
+        }
+
+    def respond(self, query: dict) -> tuple:
+        """
+        Answers a request, returning the HTTP status and JSON body.
+        """
+        with self._lock:
+            self.requests.append(query)
+            if self.failures:
+                self.failures -= 1
+                return 503, {"status": "error", "code": "unavailable", "message": "Try later"}
+        with self._lock:
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        if self.latency:
+            time.sleep(self.latency)  # Requests made together overlap here
+        with self._lock:
+            self._in_flight -= 1
+        page_size = int(query.get("pageSize", 100))
+        page = int(query.get("page", 1))
+        matching = self.total
+        if query.get("from"):
+            since = datetime.strptime(query["from"], "%Y-%m-%dT%H:%M:%SZ")
+            matching = min(self.total, int((self.latest - since) / timedelta(minutes=10)) + 1)
+        start = (page - 1) * page_size
+        numbers = range(start, min(start + page_size, matching))
+        return 200, {"status": "ok", "totalResults": matching,
+                     "articles": [self.article(number) for number in numbers]}
+
+    def __enter__(self) -> "FakeNewsAPIServer":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                query = {key: values[-1] for key, values in
+                         parse_qs(urlparse(self.path).query).items()}
+                query["apiKey"] = self.headers.get("X-Api-Key")
+                status, payload = fake.respond(query)
+                body = json.dumps(payload).encode("utf-8")
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                if fake.etags and status == 200 and self.headers.get("If-None-Match") == etag:
+                    status, body = 304, b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if fake.etags and status in (200, 304):
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        Thread(target=self._server.serve_forever, args=(0.05,), daemon=True).start()
+        self.url = f"http://127.0.0.1:{self._server.server_port}/v2/everything"
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,89 @@
+"""
+Synthetic data generators in the shape of the dashboard's real inputs.
+"""
+import csv
+import gzip
+from datetime import date, timedelta
+
+NATION_HEADER = ["areaCode", "areaName", "areaType", "date", "cumDailyNsoDeathsByDeathDate",
+                 "hospitalCases", "newCasesBySpecimenDate"]
+
+
+def nation_csv_rows(rows: int, latest: date = date(2021, 10, 28)):
+    """
+    Yields rows in the nation_2021-10-28.csv schema, newest first. As in the real
+        export, the newest day has no cases and the newest fortnight has no deaths.
+
+        Parameters:
+            rows (int): Number of data rows to generate.
+            latest (date): Date of the newest row.
+
+        Returns:
+            rows (Iterator[List[str]]): The header followed by the data rows.
+    """
+    yield NATION_HEADER
+    for offset in range(rows):
+        day = latest - timedelta(offset % 700000)
+        deaths = "" if offset < 14 else str(150000 - offset % 150000)
+        cases = "" if offset == 0 else str(20000 + offset * 7919 % 30000)
+        yield ["E92000001", "England", "nation", day.isoformat(), deaths,
+               str(5000 + offset * 31 % 3000), cases]
+
+
+def write_nation_csv(path: str, rows: int) -> str:
+    """
+    Writes a synthetic nation CSV export, gzip-compressed if the path ends in ".gz".
+
+        Parameters:
+            path (str): File to write.
+            rows (int): Number of data rows to generate.
+
+        Returns:
+            path (str): The file written.
+    """
+    if path.endswith(".gz"):
+        csv_file = gzip.open(path, "wt", newline="", encoding="utf-8")
+    else:
+        csv_file = open(path, "w", newline="", encoding="utf-8")
+    with csv_file:
+        csv.writer(csv_file).writerows(nation_csv_rows(rows))
+    return path
+
+
+def news_articles(count: int, start: int = 0) -> list[dict]:
+    """
+    Builds stored news articles in the shape news_API_request produces, newest first.
+
+        Parameters:
+            count (int): Number of articles.
+            start (int): Number of the first article, so separate sets can overlap.
+
+        Returns:
+            articles (list[dict]): The articles.
+    """
+    return [{
+        "title": f"BBC News - Covid article {number}",
+        "content": f"Description {number} <br><a href='https://www.bbc.co.uk/news/{number}' "
+                   f"target='_blank'>Read Article</a>",
+        "description": f"Content {number}",
+        "url": f"https://www.bbc.co.uk/news/{number}",
+        "publishedAt": f"2021-10-{28 - number // 100000 % 28:02d}T12:00:00Z",
+    } for number in range(start, start + count)]
+
+
+def write_deleted_titles(path: str, count: int, start: int = 0) -> str:
+    """
+    Writes a deleted articles file in the format DeletedArticleIndex reads.
+
+        Parameters:
+            path (str): File to write.
+            count (int): Number of deleted articles.
+            start (int): Number of the first deleted article.
+
+        Returns:
+            path (str): The file written.
+    """
+    with open(path, "w", encoding="utf-8") as deleted:
+        for article in news_articles(count, start):
+            deleted.write(f"{article['title']}\t{article['url']}\n")
+    return path
@@ -0,0 +1,220 @@
+"""
+Offline benchmark suite for the dashboard's hot paths: the CSV and API processing,
+the news article filtering, and rendering the "/" route. Every input is synthetic,
+so no API is contacted and no data file in the project is touched.
+
+Each run is appended to a JSON history file, and any benchmark that is slower than
+the median of the previous runs by more than the threshold is flagged.
+
+Run with: python -m benchmarks.suite [--quick] [--history PATH] [--threshold 0.2]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from typing import Callable
+
+from article_store import ArticleStore
+from deleted_articles_index import DeletedArticleIndex
+from instrumentation import FUNCTION_SECONDS, timed
+from benchmarks.fake_apis import FakeCov19API
+from benchmarks.generators import news_articles, write_deleted_titles, write_nation_csv
+
+HISTORY_FILE = os.path.join(os.path.dirname(__file__), "results", "history.json")
+API_STRUCTURE = {
+    "date": "date",
+    "areaName": "areaName",
+    "National 7-Day Infection Rate": "newCasesByPublishDateRollingSum",
+    "Hospital Cases": "hospitalCases",
+    "Total Deaths": "cumDeaths28DaysByDeathDate",
+}
+# Benchmarks timed alongside a reimplementation of the code they replaced, and flagged
+# when more than REFERENCE_TOLERANCE slower than it. Both take microseconds, so the
+# tolerance is wide enough for timing noise but not for a return to converting every row.
+REFERENCE_PATHS = {"process_covid_csv_data": "process_covid_csv_data_baseline"}
+REFERENCE_TOLERANCE = 1.0
+SIZES = {
+    "full": {"csv_rows": 200_000, "api_days": 700, "articles": 5_000, "deleted": 100_000},
+    "quick": {"csv_rows": 20_000, "api_days": 700, "articles": 500, "deleted": 10_000},
+}
+
+
+def time_call(function: Callable, budget: float = 0.5, repeat: int = 5) -> float:
+    """
+    Returns the fastest time in seconds of one call, out of several timed batches.
+
+        Parameters:
+            function (Callable): The call to time.
+            budget (float): Rough number of seconds each batch should take.
+            repeat (int): Number of batches.
+
+        Returns:
+            seconds (float): Seconds per call in the fastest batch.
+    """
+    timer = timeit.Timer(function)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * budget / max(elapsed, 1e-9)))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run_benchmarks(sizes: dict, workdir: str) -> dict:
+    """
+    Builds the synthetic inputs and times each hot path.
+
+        Parameters:
+            sizes (dict): Number of CSV rows, API days, articles and deleted articles.
+            workdir (str): Temporary directory for generated files.
+
+        Returns:
+            results (dict): Seconds per call, keyed by benchmark name.
+    """
+    import covid_data_handler as cdh  # pylint: disable=import-outside-toplevel
+    import covid_news_handling as cnh  # pylint: disable=import-outside-toplevel
+    import user_interface as ui  # pylint: disable=import-outside-toplevel
+
+    results = {}
+    csv_file = write_nation_csv(os.path.join(workdir, "nation.csv"), sizes["csv_rows"])
+    csv_rows = cdh.parse_csv_data(csv_file)
+    results["parse_csv_data"] = time_call(lambda: cdh.parse_csv_data(csv_file), repeat=3)
+    results["process_covid_csv_data"] = time_call(lambda: cdh.process_covid_csv_data(csv_rows))
+
+    @timed(FUNCTION_SECONDS, function="process_covid_csv_data_baseline")
+    def process_covid_csv_data_baseline(covid_csv_data):
+        # The original row scans, timed in the same way as process_covid_csv_data.
+        first_case = cdh.first_non_null_entry_csv(covid_csv_data, 6)
+        last7days_cases = sum(int(covid_csv_data[i][6])
+                              for i in range(first_case + 1, first_case + 8))
+        hospital = int(covid_csv_data[cdh.first_non_null_entry_csv(covid_csv_data, 5)][5])
+        deaths = int(covid_csv_data[cdh.first_non_null_entry_csv(covid_csv_data, 4)][4])
+        return last7days_cases, hospital, deaths
+    assert process_covid_csv_data_baseline(csv_rows) == cdh.process_covid_csv_data(csv_rows)
+    results["process_covid_csv_data_baseline"] = time_call(
+        lambda: process_covid_csv_data_baseline(csv_rows))
+
+    national = FakeCov19API(days=sizes["api_days"])([], API_STRUCTURE)
+    for row in national["data"][:14]:  # As in the real API, deaths lag by a fortnight
+        row["Total Deaths"] = None
+    results["first_non_null_entry_api"] = time_call(
+        lambda: [cdh.first_non_null_entry_api(national, field) for field in cdh.DASHBOARD_FIELDS])
+
+    # Half the fetched articles have been deleted before.
+    articles = news_articles(sizes["articles"])
+    deleted_file = write_deleted_titles(os.path.join(workdir, "deleted.txt"),
+                                        sizes["deleted"], sizes["articles"] // 2)
+    cnh.deleted_index = DeletedArticleIndex(deleted_file)
+    results["remove_deleted_articles"] = time_call(lambda: cnh.remove_deleted_articles(articles))
+    results["first_n_news_articles"] = time_call(
+        lambda: cnh.first_n_news_articles(articles, cnh.num_articles_at_once, cnh.page_size))
+
+    # The "/" route, with the synthetic articles and metrics in place of fetched ones.
+    cnh.article_store = ArticleStore(os.path.join(workdir, "news_articles.json"))
+    cnh.article_store.replace(articles)
+    cdh.covid_metrics.update(cdh.compute_covid_metrics(national, national))
+    client = ui.app.test_client()
+
+    def render():
+        ui.invalidate_dashboard("benchmark")
+        client.get("/")
+    results["route_index_render"] = time_call(render)
+    results["route_index_cached"] = time_call(lambda: client.get("/"))
+    cnh.article_store.flush()
+    return results
+
+
+def load_history(path: str) -> list[dict]:
+    """
+    Reads the previous runs, oldest first.
+    """
+    try:
+        with open(path, encoding="utf-8") as history:
+            return json.load(history)
+    except (OSError, ValueError):
+        return []
+
+
+def find_regressions(history: list[dict], results: dict, threshold: float,
+                     window: int = 5) -> dict:
+    """
+    Compares a run against the median of the previous runs of the same size, and
+        each benchmark in REFERENCE_PATHS against the code it replaced.
+
+        Parameters:
+            history (list[dict]): Previous runs, oldest first.
+            results (dict): Seconds per call of this run, keyed by benchmark name.
+            threshold (float): Fraction slower than the baseline that counts as a regression.
+            window (int): Number of previous runs the baseline is taken from.
+
+        Returns:
+            regressions (dict): For each regressed benchmark, its baseline and new time.
+    """
+    regressions = {}
+    for name, seconds in results.items():
+        previous = [run["results"][name] for run in history[-window:] if name in run["results"]]
+        if previous:
+            baseline = statistics.median(previous)
+            if seconds > baseline * (1 + threshold):
+                regressions[name] = {"baseline": baseline, "seconds": seconds}
+        reference = results.get(REFERENCE_PATHS.get(name))
+        if reference is not None and seconds > reference * (1 + REFERENCE_TOLERANCE):
+            regressions[name] = {"baseline": reference, "seconds": seconds}
+    return regressions
+
+
+def git_commit() -> str:
+    """
+    Returns the current git commit, or "unknown" outside a git checkout.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main() -> int:
+    """
+    Runs the suite, prints and records the results, and reports any regressions.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--quick", action="store_true", help="use smaller inputs")
+    parser.add_argument("--history", default=HISTORY_FILE, help="JSON history file")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="fraction slower than the baseline flagged as a regression")
+    parser.add_argument("--no-record", action="store_true", help="do not add this run to the history")
+    args = parser.parse_args()
+
+    size = "quick" if args.quick else "full"
+    with tempfile.TemporaryDirectory() as workdir:
+        results = run_benchmarks(SIZES[size], workdir)
+    all_runs = load_history(args.history)
+    history = [run for run in all_runs if run.get("size") == size]
+    regressions = find_regressions(history, results, args.threshold)
+
+    print(f"{'benchmark':32} {'ms per call':>12} {'baseline':>12}")
+    for name, seconds in results.items():
+        previous = [run["results"][name] for run in history[-5:] if name in run["results"]]
+        baseline = f"{statistics.median(previous) * 1000:12.4f}" if previous else f"{'-':>12}"
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"{name:32} {seconds * 1000:12.4f} {baseline}{flag}")
+
+    if not args.no_record:
+        all_runs.append({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": git_commit(),
+                         "python": platform.python_version(), "size": size, "results": results})
+        os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+        with open(f"{args.history}.tmp", "w", encoding="utf-8") as history_file:
+            json.dump(all_runs, history_file, indent=2)
+        os.replace(f"{args.history}.tmp", args.history)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) more than {args.threshold:.0%} slower than baseline")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+Module providing a persistent on-disk snapshot cache for Covid API responses.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import date, timedelta
+from threading import Lock
+from typing import Callable, Optional
+from single_flight import SingleFlight
+
+
+class CovidSnapshotCache:
+    """
+    Stores Covid API responses on disk, keyed by their area filters and structure.
+
+    Cached payloads younger than the TTL are served without a request. Once older,
+    the API's last update time is checked first, if a validator is given, and an
+    unchanged payload is kept without downloading it again. Otherwise payloads are
+    refreshed by fetching only the days from the latest cached date onwards, in one
+    date-range request, and merging them in, unless the gap is too large, in which
+    case the full history is downloaded again. Each snapshot is refreshed by one
+    caller at a time.
+
+        Attributes:
+            cache_dir (str): Directory the gzip-compressed snapshots are written to.
+            ttl (int): Number of seconds a snapshot is served without refreshing.
+            fetcher (Callable): Function taking (filters, structure) and returning
+                the API response dictionary.
+            max_gap_days (int): Largest gap in days that is refreshed incrementally.
+            overlap_days (int): Number of already cached days that are fetched again
+                on refresh, as recent figures are often revised.
+            validator (Callable): Function taking (filters, structure) and returning
+                when the API data was last updated, or None to skip the check.
+            stats (dict): Count of cache hits, misses, incremental merges and
+                refreshes answered by an unchanged last update time.
+    """
+
+    def __init__(self, cache_dir: str, ttl: int, fetcher: Callable[[list, dict], dict],
+                 max_gap_days: int = 14, overlap_days: int = 2,
+                 today: Callable[[], date] = date.today,
+                 validator: Optional[Callable[[list, dict], str]] = None) -> None:
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.fetcher = fetcher
+        self.validator = validator
+        self.max_gap_days = max_gap_days
+        self.overlap_days = overlap_days
+        self.today = today
+        self.stats = {"hits": 0, "misses": 0, "merges": 0, "not_modified": 0}
+        self._entries = {}
+        self._lock = Lock()
+        self._refreshes = SingleFlight("covid snapshot")
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def cache_key(filters: list, structure: dict) -> str:
+        """
+        Builds the cache key for a request from its area filters and structure.
+
+            Parameters:
+                filters (list): API filters, i.e. ["areaType=ltla", "areaName=Exeter"].
+                structure (dict): API structure mapping output names to metrics.
+
+            Returns:
+                key (str): A hex digest identifying the request.
+        """
+        raw = json.dumps([sorted(filters), structure], sort_keys=True)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json.gz")
+
+    def _load(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+        try:
+            with gzip.open(self._path(key), "rt", encoding="utf-8") as snapshot:
+                entry = json.load(snapshot)
+        except (OSError, ValueError):
+            return None
+        self._entries[key] = entry
+        return entry
+
+    def _save(self, key: str, entry: dict) -> None:
+        self._entries[key] = entry
+        path = self._path(key)
+        with gzip.open(f"{path}.tmp", "wt", encoding="utf-8") as snapshot:
+            json.dump(entry, snapshot, separators=(",", ":"))
+        os.replace(f"{path}.tmp", path)
+
+    @staticmethod
+    def _latest_date(payload: dict, date_field: str) -> Optional[str]:
+        dates = [row[date_field] for row in payload.get("data") or [] if row.get(date_field)]
+        return max(dates) if dates else None
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _fetch_since(self, filters: list, structure: dict, date_field: str,
+                     latest: str, payload: dict) -> dict:
+        """
+        Fetches the days from the latest cached date (minus the overlap) up to today
+            in one date-range request and merges those rows into the cached payload,
+            newest first.
+        """
+        after = date.fromisoformat(latest) - timedelta(self.overlap_days + 1)
+        response = self.fetcher(filters + [f"date>{after.isoformat()}"], structure) or {}
+        fresh_rows = {row[date_field]: row for row in response.get("data") or []}
+        kept = [row for row in payload["data"] if row[date_field] not in fresh_rows]
+        merged = dict(payload)
+        merged["data"] = sorted(list(fresh_rows.values()) + kept,
+                                key=lambda row: row[date_field], reverse=True)
+        merged["length"] = len(merged["data"])
+        return merged
+
+    def get(self, filters: list, structure: dict) -> dict:
+        """
+        Returns the API response for the given filters and structure, serving the
+            cached snapshot when it is fresh and refreshing it otherwise. Callers
+            asking for a snapshot that is already being refreshed wait for that
+            refresh instead of starting their own.
+
+            Parameters:
+                filters (list): API filters, i.e. ["areaType=ltla", "areaName=Exeter"].
+                structure (dict): API structure mapping output names to metrics.
+
+            Returns:
+                payload (dict): The API response.
+        """
+        key = self.cache_key(filters, structure)
+        with self._lock:
+            entry = self._load(key)
+            if entry is not None and time.time() - entry["fetched_at"] < self.ttl:
+                self.stats["hits"] += 1
+                return entry["payload"]
+        return self._refreshes.do(key, self._refresh, key, filters, structure)
+
+    def _refresh(self, key: str, filters: list, structure: dict) -> dict:
+        with self._lock:
+            entry = self._load(key)
+        now = time.time()
+        if entry is not None and now - entry["fetched_at"] < self.ttl:
+            self._count("hits")  # Refreshed by the flight this call just missed
+            return entry["payload"]
+        last_update = None
+        if self.validator is not None:
+            try:
+                last_update = self.validator(filters, structure)
+            except Exception:  # pylint: disable=broad-except
+                logging.exception("Covid data last update check failed")
+        if entry is not None and last_update and last_update == entry.get("last_update"):
+            with self._lock:
+                self.stats["not_modified"] += 1
+                self._save(key, dict(entry, fetched_at=now))
+            return entry["payload"]
+        date_field = next((name for name, metric in structure.items()
+                           if metric == "date"), None)
+        payload = None
+        latest = entry and date_field and self._latest_date(entry["payload"], date_field)
+        if latest and (self.today() - date.fromisoformat(latest)).days <= self.max_gap_days:
+            try:
+                payload = self._fetch_since(filters, structure, date_field,
+                                            latest, entry["payload"])
+                self._count("merges")
+            except Exception:  # pylint: disable=broad-except
+                logging.exception("Incremental covid data refresh failed")
+        if payload is None:
+            payload = self.fetcher(filters, structure)
+            self._count("misses")
+        with self._lock:
+            self._save(key, {"fetched_at": now, "last_update": last_update, "payload": payload})
+        return payload
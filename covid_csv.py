@@ -0,0 +1,236 @@
+"""
+Module providing a columnar loader for PHE covid CSV exports.
+
+Columns are read lazily: a metric's first non-null row is found by scanning only
+as far as it, and only the cells the summary reads are converted to integers.
+"""
+import csv
+import gzip
+from operator import itemgetter
+from typing import IO, Iterable, Iterator, Optional, Sequence, Tuple
+
+DEATHS_COLUMN = "cumDailyNsoDeathsByDeathDate"
+HOSPITAL_COLUMN = "hospitalCases"
+CASES_COLUMN = "newCasesBySpecimenDate"
+METRIC_COLUMNS = (DEATHS_COLUMN, HOSPITAL_COLUMN, CASES_COLUMN)
+
+
+class CovidColumns:
+    """
+    Metric columns of a covid CSV export, in file order (newest first), read from
+    the rows on demand rather than converted up front.
+
+        Attributes:
+            length (int): Number of data rows, excluding the header.
+            rows (Sequence[List[str]]): The CSV rows, header first.
+            indexes (dict): Position in a row of each metric column.
+    """
+
+    def __init__(self, rows: Sequence[list], indexes: dict) -> None:
+        self.length = max(len(rows) - 1, 0)
+        self.rows = rows
+        self.indexes = indexes
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[list], columns: tuple = METRIC_COLUMNS) -> "CovidColumns":
+        """
+        Wraps CSV rows, the first of which is the header, without converting any cells.
+
+            Parameters:
+                rows (Iterable[List[str]]): CSV rows, header first.
+                columns (tuple): Names of the metric columns to read.
+
+            Returns:
+                covid_columns (CovidColumns): The columns.
+        """
+        if not isinstance(rows, (list, tuple)):
+            rows = list(rows)
+        header = rows[0] if rows else []
+        return cls(rows, {column: header.index(column) for column in columns})
+
+    def first_non_null(self, column: str) -> Optional[int]:
+        """
+        Finds the first non-null row of a column, scanning no further than it. As in
+            first_non_null_entry_csv, the final row is never returned.
+
+            Parameters:
+                column (str): Name of the metric column.
+
+            Returns:
+                index (int): Data row index of the first non-null value, or None if there is none.
+        """
+        field = self.indexes[column]
+        rows = self.rows
+        for position in range(1, self.length):
+            if rows[position][field] != "":
+                return position - 1
+        return None
+
+    def latest(self, column: str) -> Optional[int]:
+        """
+        Returns the first non-null value of a column.
+
+            Parameters:
+                column (str): Name of the metric column.
+
+            Returns:
+                value (int): The most recent value of the metric, or None if the column is empty.
+        """
+        index = self.first_non_null(column)
+        if index is None:
+            return None
+        return int(self.rows[index + 1][self.indexes[column]])
+
+    def window_sum(self, column: str, start: int, stop: int) -> int:
+        """
+        Sums a column between two data row indexes, treating nulls as zero.
+
+            Parameters:
+                column (str): Name of the metric column.
+                start (int): First data row included.
+                stop (int): First data row excluded.
+
+            Returns:
+                total (int): Sum of the values.
+        """
+        field = self.indexes[column]
+        return sum(int(row[field] or 0) for row in self.rows[start + 1:stop + 1])
+
+
+def open_covid_csv(csv_filename: str) -> IO[str]:
+    """
+    Opens a covid CSV export for reading, decompressing it on the fly if it is gzipped.
+
+        Parameters:
+            csv_filename (str): Name of the CSV file, ending in ".gz" if compressed.
+
+        Returns:
+            csv_file (IO[str]): The open text stream.
+    """
+    if csv_filename.endswith(".gz"):
+        return gzip.open(csv_filename, "rt", newline="", encoding="utf-8")
+    return open(csv_filename, newline="", encoding="utf-8")
+
+
+def iter_covid_csv_rows(csv_filename: str) -> Iterator[list]:
+    """
+    Lazily yields the rows of a covid CSV export, header first, holding only one
+        row in memory at a time.
+
+        Parameters:
+            csv_filename (str): Name of the CSV file, ending in ".gz" if compressed.
+
+        Returns:
+            rows (Iterator[List[str]]): The rows of the file.
+    """
+    with open_covid_csv(csv_filename) as csv_file:
+        yield from csv.reader(csv_file)
+
+
+def summarise_covid_rows(rows: Iterable[list]) -> Tuple[int, int, int]:
+    """
+    Returns the values for cases in the last seven days, current hospital cases and
+        total deaths from covid CSV rows, header first. The rows are read in one pass
+        that stops as soon as all three are known, and only the cells summed or
+        returned are converted to integers.
+
+        Parameters:
+            rows (Iterable[List[str]]): CSV rows, header first.
+
+        Returns:
+            last7days_cases, current_hospital_cases, total_deaths (Tuple[int,int,int]):
+                Cases in last 7 days, current hospital cases and total deaths. Hospital
+                cases or deaths are None if their column is empty.
+    """
+    rows = iter(rows)
+    header = next(rows)
+    deaths_index = header.index(DEATHS_COLUMN)
+    hospital_index = header.index(HOSPITAL_COLUMN)
+    cases_index = header.index(CASES_COLUMN)
+    current_hospital_cases = total_deaths = None
+    last7days_cases = 0
+    case_days_left = None  # None until the first non-null day of cases is seen
+    for row in rows:
+        if case_days_left is None:
+            if row[cases_index] != "":
+                case_days_left = 7  # The first day is incomplete, so sum the next seven
+        elif case_days_left:
+            last7days_cases += int(row[cases_index] or 0)
+            case_days_left -= 1
+        if current_hospital_cases is None and row[hospital_index] != "":
+            current_hospital_cases = int(row[hospital_index])
+        if total_deaths is None and row[deaths_index] != "":
+            total_deaths = int(row[deaths_index])
+        if case_days_left == 0 and current_hospital_cases is not None \
+                and total_deaths is not None:
+            break
+    return last7days_cases, current_hospital_cases, total_deaths
+
+
+def stream_covid_csv_data(csv_filename: str) -> Tuple[int, int, int]:
+    """
+    Reads a covid CSV export row by row and returns the values for cases in the last
+        seven days, current hospital cases and total deaths. Reading stops as soon as
+        all three are known, so memory use does not grow with the file length.
+
+        Parameters:
+            csv_filename (str): Name of the CSV file, ending in ".gz" if compressed.
+
+        Returns:
+            last7days_cases, current_hospital_cases, total_deaths (Tuple[int,int,int]):
+                Cases in last 7 days, current hospital cases and total deaths.
+    """
+    rows = iter_covid_csv_rows(csv_filename)
+    try:
+        return summarise_covid_rows(rows)
+    finally:
+        rows.close()  # Closes the file without reading the rest of it
+
+
+def load_covid_columns(csv_filename: str, columns: tuple = METRIC_COLUMNS) -> CovidColumns:
+    """
+    Reads a covid CSV export into columns, keeping only the metric columns of each
+        row in memory.
+
+        Parameters:
+            csv_filename (str): Name of the CSV file, ending in ".gz" if compressed.
+            columns (tuple): Names of the metric columns to keep.
+
+        Returns:
+            covid_columns (CovidColumns): The columns.
+    """
+    with open_covid_csv(csv_filename) as csv_file:
+        rows = csv.reader(csv_file)
+        header = next(rows, [])
+        indexes = [header.index(column) for column in columns]
+        if len(indexes) > 1:
+            getter = itemgetter(*indexes)
+        else:  # itemgetter returns a bare value rather than a tuple for one index
+            getter = lambda row: (row[indexes[0]],)  # pylint: disable=unnecessary-lambda-assignment
+        kept = [getter(header)]
+        kept.extend(map(getter, rows))
+    return CovidColumns.from_rows(kept, columns)
+
+
+def summarise_covid_columns(covid_columns: CovidColumns) -> Tuple[int, int, int]:
+    """
+    Calculates cases in the last seven days, current hospital cases and total deaths.
+        The first non-null day of cases is skipped, as its count is incomplete.
+
+        Parameters:
+            covid_columns (CovidColumns): The parsed columns.
+
+        Returns:
+            last7days_cases, current_hospital_cases, total_deaths (Tuple[int,int,int]):
+                Cases in last 7 days, current hospital cases and total deaths. Hospital
+                cases or deaths are None if their column is empty, and cases 0, as in
+                stream_covid_csv_data.
+    """
+    first_case_index = covid_columns.first_non_null(CASES_COLUMN)
+    if first_case_index is None:
+        last7days_cases = 0
+    else:
+        last7days_cases = covid_columns.window_sum(
+            CASES_COLUMN, first_case_index + 1, first_case_index + 8)
+    return (last7days_cases, covid_columns.latest(HOSPITAL_COLUMN),
+            covid_columns.latest(DEATHS_COLUMN))
@@ -1,14 +1,26 @@
 """
 Module to handle all covid data api requests and future updates.
 """
-from threading import Event
+from threading import Lock, Thread
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FetchTimeout
 import logging
+import os
 import csv
 import time
 import sched
 import json
+from datetime import datetime
+from http import HTTPStatus
 from typing import Tuple
+import requests
 from uk_covid19 import Cov19API
+from covid_api_cache import CovidSnapshotCache
+from covid_csv import CASES_COLUMN, DEATHS_COLUMN, HOSPITAL_COLUMN, stream_covid_csv_data
+from covid_metrics_index import CovidMetricsIndex, FirstNonNullIndex
+from covid_timeseries_store import CovidTimeSeriesStore
+from single_flight import SingleFlight
+from shared_state import serving_role
+from instrumentation import FETCH_SECONDS, FETCHES_ABANDONED, FUNCTION_SECONDS, timed
 import user_interface as ui
 s = sched.scheduler(time.time, time.sleep)
 
@@ -21,7 +33,35 @@ included_domains=json_file["news_API_domains"]
 covid_keywords=json_file["covid_terms"]
 num_articles_at_once=json_file["num_articles_at_once"]
 page_size=json_file["page_size"]
-
+lazy_startup=json_file["lazy_startup"]
+covid_snapshot_file=json_file["covid_snapshot_file"]
+covid_cache_dir=json_file["covid_cache_dir"]
+covid_cache_ttl=json_file["covid_cache_ttl"]
+covid_areas=json_file["covid_areas"]
+covid_request_timeout=json_file["covid_request_timeout"]
+metrics_window_days=json_file["metrics_window_days"]
+timeseries_dir=json_file["timeseries_dir"]
+min_refresh_interval=json_file["min_refresh_interval"]["covid"]
+process_role=serving_role(json_file["serving_role"])
+
+# Latest dashboard metrics, filled lazily on first access or by a background refresh.
+covid_metrics = {}
+metrics_lock = Lock()
+covid_refresher = None  # Background thread of the latest startup refresh
+LAZY_ATTRIBUTES = ("local_covid_data", "national_covid_data", "local_7day_infection_rate",
+    "national_7day_infection_rate", "hospital_cases", "national_total_deaths")
+DASHBOARD_FIELDS = ("areaName", "National 7-Day Infection Rate", "Hospital Cases", "Total Deaths")
+# Latest response for every configured area, keyed by area name.
+covid_area_data = {}
+# Latest metrics and a rolling window for every fetched area, keyed by name and code.
+metrics_index = CovidMetricsIndex(metrics_window_days)
+# Daily history imported from the CSV export, shared between processes via mmap.
+timeseries_store = CovidTimeSeriesStore(timeseries_dir)
+fetch_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="covid-fetch")
+# Shares one covid refresh between updates that run at the same time or close together.
+covid_refreshes = SingleFlight("covid", min_refresh_interval)
+
+@timed(FUNCTION_SECONDS, function="parse_csv_data")
 def parse_csv_data(csv_filename: str) -> list:
     """
     Opens a CSV file for reading and converts the contents to a list of lists of strings.
@@ -39,31 +79,77 @@ def parse_csv_data(csv_filename: str) -> list:
         return csv_data_list
 
 
+@timed(FUNCTION_SECONDS, function="process_covid_csv_data")
 def process_covid_csv_data(covid_csv_data: list) -> Tuple[int, int, int]:
     """
-    Loops through the covid data list and returns the values for cases in the last seven days,
-        current hospital cases, and total_deaths
+    Returns the values for cases in the last seven days, current hospital cases, and
+        total_deaths from the covid data list. Each column is scanned only as far as
+        its first value, and only the cells returned or summed are converted.
 
         Parameters:
             covid_csv_data (List[List[str]]): The covid data from the CSV filters.
 
         Returns:
             last7days_cases, current_hospital_cases, total_deaths (Tuple[int,int,int]):
-                Cases in last 7 days, current hospital cases and total deaths.
+                Cases in last 7 days, current hospital cases and total deaths. Hospital
+                cases or deaths are None if their column is empty.
     """
+    header = covid_csv_data[0]
+    cases, hospital, deaths = (header.index(column)
+                               for column in (CASES_COLUMN, HOSPITAL_COLUMN, DEATHS_COLUMN))
+    first_non_null = FirstNonNullIndex.from_csv(covid_csv_data, (cases, hospital, deaths))
+    first_case = first_non_null.index(cases)
     last7days_cases = 0
+    if first_case is not None:  # The first day is incomplete, so sum the next seven
+        last7days_cases = sum(int(row[cases] or 0)
+                              for row in covid_csv_data[first_case + 1:first_case + 8])
+    current_hospital_cases = first_non_null.value(hospital)
+    total_deaths = first_non_null.value(deaths)
+    return (last7days_cases, None if current_hospital_cases is None else int(current_hospital_cases),
+            None if total_deaths is None else int(total_deaths))
+
+
+def process_covid_csv_file(csv_filename: str) -> Tuple[int, int, int]:
+    """
+    Streams a CSV file, optionally gzipped, without building the list of lists and
+        returns the values for cases in the last seven days, current hospital cases,
+        and total_deaths. Only the rows up to the last value needed are read.
+
+        Parameters:
+            csv_filename (str): Name of the CSV file.
+
+        Returns:
+            last7days_cases, current_hospital_cases, total_deaths (Tuple[int,int,int]):
+                Cases in last 7 days, current hospital cases and total deaths.
+    """
+    return stream_covid_csv_data(csv_filename)
 
-    first_hospital_index = first_non_null_entry_csv(covid_csv_data, 5)
-    current_hospital_cases = int(covid_csv_data[first_hospital_index][5])
 
-    first_deaths_index = first_non_null_entry_csv(covid_csv_data, 4)
-    total_deaths = int(covid_csv_data[first_deaths_index][4])
+def historical_covid_metrics(csv_filename: str = 'nation_2021-10-28.csv',
+                             area: str = "England (CSV)") -> Tuple[int, int, int]:
+    """
+    Returns the values for cases in the last seven days, current hospital cases,
+        and total_deaths from the binary time-series store, importing the CSV file
+        into the store first if it is newer than the stored copy.
 
-    first_case_index = first_non_null_entry_csv(covid_csv_data, 6)
-    for i in range(first_case_index+1, first_case_index+8):
-        last7days_cases += int(covid_csv_data[i][6])
+        Parameters:
+            csv_filename (str): Name of the CSV file.
+            area (str): Name the CSV data is stored under.
 
-    return last7days_cases, current_hospital_cases, total_deaths
+        Returns:
+            last7days_cases, current_hospital_cases, total_deaths (Tuple[int,int,int]):
+                Cases in last 7 days, current hospital cases and total deaths. Hospital
+                cases or deaths are None if the CSV file has no values for them.
+    """
+    series = timeseries_store.series(area)
+    if series is None or os.path.getmtime(csv_filename) > os.path.getmtime(
+            timeseries_store.path(area)):
+        timeseries_store.write_csv(area, csv_filename)
+    last7days_cases = timeseries_store.window_sum(area, "cases", 7, skip=1)
+    latest_hospital_cases = timeseries_store.latest(area, "hospitalCases")
+    latest_deaths = timeseries_store.latest(area, "deaths")
+    return (last7days_cases, None if latest_hospital_cases is None else latest_hospital_cases[1],
+            None if latest_deaths is None else latest_deaths[1])
 
 
 def first_non_null_entry_csv(covid_data: list, column_index: int) -> int:
@@ -82,10 +168,86 @@ def first_non_null_entry_csv(covid_data: list, column_index: int) -> int:
             return i
 
 
+def api_timestamp(last_modified: str) -> str:
+    """
+    Converts a Last-Modified header of the PHE Covid API to the ISO 8601 form
+        Cov19API.last_update returns, i.e. "2021-10-28T15:02:11.000000Z".
+
+        Parameters:
+            last_modified (str): The header, i.e. "Thu, 28 Oct 2021 15:02:11 GMT".
+        Returns:
+            timestamp (str): The ISO 8601 time, or None if there was no header.
+    """
+    if last_modified is None:
+        return None
+    return datetime.strptime(last_modified, "%a, %d %b %Y %H:%M:%S GMT").isoformat() + ".000000Z"
+
+
+def fetch_covid_json(location_filters: list, covid_structure: dict,
+                     timeout: float = covid_request_timeout) -> dict:
+    """
+    Fetches covid data directly from the PHE Covid API, bypassing the snapshot cache.
+        Each page is requested with a socket timeout, so a hung connection raises
+        rather than holding a fetch thread forever.
+
+        Parameters:
+            location_filters (list): API filters, i.e. ["areaType=ltla", "areaName=Exeter"].
+            covid_structure (dict): The metrics to fetch and the names to return them under.
+            timeout (float): Seconds to wait to connect, and between bytes received.
+        Returns:
+            data (dict): Dictionary of covid data matching the filters, in the shape
+                Cov19API.get_json returns.
+    """
+    api = Cov19API(
+        filters=location_filters,
+        structure=covid_structure,
+    )
+    params = dict(api.api_params, format="json", page=1)
+    data = []
+    last_modified = None
+    while True:  # Pages are requested until the API answers 204 No Content
+        response = requests.get(Cov19API.endpoint, params=params, timeout=timeout)
+        response.raise_for_status()
+        if response.status_code == HTTPStatus.NO_CONTENT:
+            break
+        last_modified = response.headers["Last-Modified"]
+        data.extend(response.json()["data"])
+        params["page"] += 1
+    return {"data": data, "lastUpdate": api_timestamp(last_modified), "length": len(data),
+            "totalPages": params["page"] - 1}
+
+
+def covid_last_update(location_filters: list, covid_structure: dict,
+                      timeout: float = covid_request_timeout) -> str:
+    """
+    Asks the PHE Covid API when its data was last updated, using a HEAD request
+        so no data is downloaded.
+
+        Parameters:
+            location_filters (list): API filters, i.e. ["areaType=ltla", "areaName=Exeter"].
+            covid_structure (dict): The metrics to fetch and the names to return them under.
+            timeout (float): Seconds to wait to connect, and for the response.
+        Returns:
+            last_update (str): ISO 8601 time the data was last updated.
+    """
+    api = Cov19API(
+        filters=location_filters,
+        structure=covid_structure,
+    )
+    response = requests.head(Cov19API.endpoint, params=api.api_params, timeout=timeout)
+    response.raise_for_status()
+    return api_timestamp(response.headers["Last-Modified"])
+
+
+covid_cache = CovidSnapshotCache(covid_cache_dir, covid_cache_ttl, fetch_covid_json,
+                                 validator=covid_last_update)
+
+
+@timed(FETCH_SECONDS, source="covid")
 def covid_API_request(location: str = "Exeter", location_type: str = "ltla") -> dict:
     """
     Covid API request that fetches up to date information for the structures listed
-        in covid_structure.
+        in covid_structure. Responses are served from the snapshot cache while fresh.
 
         Parameters:
             location (str) (Default="Exeter"): The location to fetch covid data about.
@@ -106,11 +268,7 @@ def covid_API_request(location: str = "Exeter", location_type: str = "ltla") ->
         "Hospital Cases": "hospitalCases",
         "Total Deaths": "cumDeaths28DaysByDeathDate"
     }
-    api = Cov19API(
-        filters=location_filters,
-        structure=covid_structure,
-    )
-    data = api.get_json()
+    data = covid_cache.get(location_filters, covid_structure)
     return data
 
 
@@ -132,7 +290,7 @@ def first_non_null_entry_api(covid_api_data: dict, value: str) -> int:
             return i
 
 
-def schedule_covid_updates(update_interval: int, update_name: str, is_repeating: bool) -> Event:
+def schedule_covid_updates(update_interval: int, update_name: str, is_repeating: bool):
     """
     Schedules a covid data update to occur after a given number of seconds have occurred.
 
@@ -142,17 +300,16 @@ def schedule_covid_updates(update_interval: int, update_name: str, is_repeating:
             is_repeating (bool): Whether or not the update should be repeated
 
         Returns:
-            update (Event): The scheduled covid update event
+            update (Job): The scheduled covid update job, saved in the job store
     """
-    update = ui.covid_scheduler.enter(update_interval, 1, update_covid_data, [
-                                      update_name, is_repeating])
+    update = ui.schedule_job("covid", update_name, update_interval, is_repeating)
     return update
 
 
 def update_covid_data(update_name: str, is_repeating: bool) -> Tuple[dict, dict]:
     """
-    Calls the API request function, passing in the location variables
-        and deletes any update toasts related.
+    Calls the API request function, passing in the location variables.
+        Repeats, and removing the update's toast, are handled by the job store.
 
         Parameters:
             update_name (str): The name of the update.
@@ -161,19 +318,65 @@ def update_covid_data(update_name: str, is_repeating: bool) -> Tuple[dict, dict]
         Returns:
             local_data, national_data (Tuple[Dict, Dict]): Covid data for local area and nation.
     """
-    local_data = covid_API_request(location=f"{local_location}")
-    national_data = covid_API_request(f"{national_location}", "Nation")
-    # Deletes toasts of update that called update_covid_data
-    ui.delete_update_toasts(update_name)
-    if is_repeating:
-        ui.schedule_covid_update(86400, update_name, is_repeating)
+    local_data, national_data = covid_refreshes.do("covid", refresh_covid_data)
     logging.info("Updating Covid Data")
     return local_data, national_data
 
 
+def configured_areas() -> list[dict]:
+    """
+    Lists every area covid data is fetched for: the local and national locations
+        followed by any extra areas in the config file.
+
+        Parameters:
+            None
+
+        Returns:
+            areas (list[dict]): Each area's "name" and "type", i.e. {"name": "Exeter", "type": "ltla"}.
+    """
+    areas = [{"name": local_location, "type": "ltla"},
+             {"name": national_location, "type": "Nation"}]
+    for area in covid_areas:
+        if area["name"] not in (local_location, national_location):
+            areas.append(area)
+    return areas
+
+
+def fetch_covid_areas(areas: list[dict], timeout: float = covid_request_timeout) -> dict:
+    """
+    Requests covid data for all the given areas in parallel. An area whose request
+        fails or has not finished within the timeout is returned as None, so one
+        slow area cannot hold up the rest of the refresh.
+
+        Parameters:
+            areas (list[dict]): Each area's "name" and "type".
+            timeout (float): Seconds to wait for the requests, which all start together.
+
+        Returns:
+            area_data (dict): Covid data (or None) for each area, keyed by area name.
+    """
+    futures = {area["name"]: fetch_pool.submit(covid_API_request, area["name"], area["type"])
+               for area in areas}
+    deadline = time.monotonic() + timeout
+    area_data = {}
+    for name, future in futures.items():
+        try:
+            area_data[name] = future.result(timeout=max(0, deadline - time.monotonic()))
+        except FetchTimeout:
+            # The request itself times out after covid_request_timeout, freeing its thread
+            FETCHES_ABANDONED.inc(source="covid")
+            logging.warning(f"Covid data request for {name} timed out")
+            area_data[name] = None
+        except Exception:  # pylint: disable=broad-except
+            logging.exception(f"Covid data request for {name} failed")
+            area_data[name] = None
+    return area_data
+
+
 def initial_covid_data() -> Tuple[dict, dict]:
     """
-    Initial covid data to be shown upon starting the program.
+    Initial covid data to be shown upon starting the program. Every configured
+        area is fetched concurrently, the local area and nation are returned.
 
         Parameters:
             None
@@ -181,34 +384,203 @@ def initial_covid_data() -> Tuple[dict, dict]:
         Returns:
             local_data, national_data (Tuple[dict, dict]): Covid data for local area and nation.
     """
-    local_data = covid_API_request(location=f"{local_location}")
-    national_data = covid_API_request(f"{national_location}", "Nation")
+    areas = configured_areas()
+    area_data = fetch_covid_areas(areas)
+    for name, data in area_data.items():
+        if data is not None:
+            covid_area_data[name] = data
+            metrics_index.update(data)
+    ui.invalidate_dashboard("covid area data updated")
+    return area_data[areas[0]["name"]], area_data[areas[1]["name"]]
+
+
+def compute_covid_metrics(local_data: dict, national_data: dict) -> dict:
+    """
+    Acquires the first non-null value of each metric shown on the dashboard,
+        walking each response at most once.
+
+        Parameters:
+            local_data (dict): Covid data for the local area.
+            national_data (dict): Covid data for the nation.
+
+        Returns:
+            metrics (dict): The dashboard metrics, keyed by their module attribute name.
+    """
+    # Local areas have no hospital or death figures, so only index what is shown for them
+    local_index = FirstNonNullIndex.for_response(local_data, DASHBOARD_FIELDS[:2])
+    national_index = FirstNonNullIndex.for_response(national_data, DASHBOARD_FIELDS)
+    return {
+        "local_covid_data": local_data,
+        "national_covid_data": national_data,
+        "local_location": local_index.value("areaName"),
+        "national_location": national_index.value("areaName"),
+        "local_7day_infection_rate": local_index.value("National 7-Day Infection Rate"),
+        "national_7day_infection_rate": national_index.value("National 7-Day Infection Rate"),
+        "hospital_cases": national_index.value("Hospital Cases"),
+        "national_total_deaths": national_index.value("Total Deaths"),
+    }
+
+
+def store_covid_metrics(metrics: dict) -> None:
+    """
+    Makes the given metrics the ones served by the dashboard and persists them
+        as the last-known snapshot.
+
+        Parameters:
+            metrics (dict): The dashboard metrics returned by compute_covid_metrics.
+
+        Returns:
+            None
+    """
+    global local_location, national_location
+    with metrics_lock:
+        covid_metrics.update(metrics)
+        local_location = metrics["local_location"]
+        national_location = metrics["national_location"]
+    ui.invalidate_dashboard("covid data updated")
+    ui.publish_event("metrics", {key: metrics[key] for key in (
+        "local_location", "local_7day_infection_rate", "national_location",
+        "national_7day_infection_rate", "hospital_cases", "national_total_deaths")})
+    temp_file = f"{covid_snapshot_file}.tmp"
+    with open(temp_file, "w", encoding="utf-8") as snapshot:
+        json.dump(metrics, snapshot)
+    os.replace(temp_file, covid_snapshot_file)  # Atomic, so readers never see half a file
+
+
+def load_covid_snapshot() -> bool:
+    """
+    Loads the last persisted metrics snapshot, if there is one, without
+        touching the network.
+
+        Parameters:
+            None
+
+        Returns:
+            loaded (bool): Whether or not a snapshot was loaded.
+    """
+    global local_location, national_location
+    try:
+        with open(covid_snapshot_file, "r", encoding="utf-8") as snapshot:
+            metrics = json.load(snapshot)
+    except (OSError, ValueError):
+        return False
+    with metrics_lock:
+        if covid_metrics:  # Fresh data arrived first, keep it
+            return True
+        covid_metrics.update(metrics)
+        local_location = metrics["local_location"]
+        national_location = metrics["national_location"]
+    ui.invalidate_dashboard("covid data snapshot loaded")
+    logging.info("Covid data snapshot loaded")
+    return True
+
+
+def refresh_covid_data() -> Tuple[dict, dict]:
+    """
+    Fetches fresh covid data and, if every area was fetched, makes it the data shown
+        on the dashboard. Otherwise the last-known data is kept.
+
+        Parameters:
+            None
+
+        Returns:
+            local_data, national_data (Tuple[Dict, Dict]): Covid data for local area and nation.
+    """
+    local_data, national_data = initial_covid_data()
+    if local_data is None or national_data is None:
+        logging.warning("Covid data refresh incomplete, keeping last-known data")
+    else:
+        store_covid_metrics(compute_covid_metrics(local_data, national_data))
+        logging.info("Covid data refreshed")
     return local_data, national_data
 
 
-local_covid_data, national_covid_data = initial_covid_data()
-csv_data = parse_csv_data('nation_2021-10-28.csv')
-
-
-# Acquires the indexes of the first non-null value of each required metric.
-local_location_index = first_non_null_entry_api(local_covid_data, "areaName")
-national_location_index = first_non_null_entry_api(
-    national_covid_data, "areaName")
-local_7day_infection_rate_index = first_non_null_entry_api(
-    local_covid_data, "National 7-Day Infection Rate")
-national_7day_infection_rate_index = first_non_null_entry_api(
-    national_covid_data, "National 7-Day Infection Rate")
-hospital_cases_index = first_non_null_entry_api(
-    national_covid_data, "Hospital Cases")
-national_total_deaths_index = first_non_null_entry_api(
-    national_covid_data, "Total Deaths")
-
-# Acquires the values of the first non-null value of each required metric.
-local_location = local_covid_data["data"][local_location_index]["areaName"]
-national_location = national_covid_data["data"][national_location_index]["areaName"]
-local_7day_infection_rate = local_covid_data["data"][
-    local_7day_infection_rate_index]["National 7-Day Infection Rate"]
-national_7day_infection_rate = national_covid_data["data"][
-    national_7day_infection_rate_index]["National 7-Day Infection Rate"]
-hospital_cases = national_covid_data["data"][hospital_cases_index]["Hospital Cases"]
-national_total_deaths = national_covid_data["data"][national_total_deaths_index]["Total Deaths"]
+def refresh_covid_metrics() -> dict:
+    """
+    Fetches fresh covid data, or joins a refresh already running, and returns the
+        data shown on the dashboard.
+
+        Parameters:
+            None
+
+        Returns:
+            metrics (dict): The refreshed dashboard metrics.
+    """
+    covid_refreshes.do("covid", refresh_covid_data)
+    return covid_metrics
+
+
+def load_covid_metrics() -> dict:
+    """
+    Returns the current dashboard metrics without waiting on the network. If nothing
+        has been loaded yet, the last-known snapshot is loaded, or failing that a fetch
+        is started in the background and the metrics are empty until it finishes.
+
+        Parameters:
+            None
+
+        Returns:
+            covid_metrics (dict): The current dashboard metrics.
+    """
+    if not covid_metrics and not load_covid_snapshot() and process_role != "worker":
+        start_covid_refresh()
+    return covid_metrics
+
+
+def start_covid_refresh() -> Thread:
+    """
+    Refreshes the covid data on a background thread, unless a background refresh
+        is already running.
+
+        Parameters:
+            None
+
+        Returns:
+            refresher (Thread): The thread fetching fresh data.
+    """
+    global covid_refresher
+
+    def refresh() -> None:
+        try:
+            refresh_covid_metrics()
+        except Exception:  # pylint: disable=broad-except
+            logging.exception("Background covid data refresh failed")
+
+    with metrics_lock:
+        if covid_refresher is None or not covid_refresher.is_alive():
+            covid_refresher = Thread(target=refresh, name="covid-warmer", daemon=True)
+            covid_refresher.start()
+        return covid_refresher
+
+
+def warm_covid_metrics() -> Thread:
+    """
+    Serves the last-known snapshot straight away and refreshes it from the API
+        on a background thread.
+
+        Parameters:
+            None
+
+        Returns:
+            warmer (Thread): The background thread fetching fresh data.
+    """
+    load_covid_snapshot()
+    return start_covid_refresh()
+
+
+def __getattr__(name: str):
+    """
+    Resolves the dashboard metrics and CSV data lazily, so importing
+        this module does no network or file I/O.
+    """
+    global csv_data
+    if name in LAZY_ATTRIBUTES:  # None until the first snapshot or fetch
+        return load_covid_metrics().get(name)
+    if name == "csv_data":
+        csv_data = parse_csv_data('nation_2021-10-28.csv')
+        return csv_data
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+if not lazy_startup and process_role != "worker":  # Workers never fetch
+    refresh_covid_metrics()
@@ -0,0 +1,225 @@
+"""
+Module providing an in-memory index of the latest covid metrics for every fetched area.
+"""
+from collections import deque
+from threading import Lock
+from typing import Iterable, Optional, Sequence
+
+# Dashboard metric names, as returned by the covid API structure.
+INDEXED_METRICS = ("National 7-Day Infection Rate", "Hospital Cases", "Total Deaths")
+
+
+class FirstNonNullIndex:
+    """
+    Records the position of the first non-null value of every field. Each field is
+    scanned only as far as its first value, so indexing costs no more than the
+    per-metric lookups it replaces, and every consumer shares the result.
+
+        Attributes:
+            rows (Sequence): The rows that were indexed.
+            positions (dict): Position of the first non-null value of each field found.
+    """
+    _latest_responses = {}
+    _response_lock = Lock()
+
+    def __init__(self, rows: Sequence, fields: Iterable, start: int = 0,
+                 stop: Optional[int] = None, null=None) -> None:
+        self.rows = rows
+        self.positions = {}
+        stop = len(rows) if stop is None else stop
+        for field in fields:
+            for position in range(start, stop):
+                if rows[position][field] != null:
+                    self.positions[field] = position
+                    break
+
+    @classmethod
+    def from_api(cls, covid_api_data: dict, fields: Optional[Iterable] = None) -> "FirstNonNullIndex":
+        """
+        Indexes a Covid API response. Positions match first_non_null_entry_api.
+
+            Parameters:
+                covid_api_data (dict): Covid data fetched from PHE Covid API.
+                fields (Iterable): Metrics to index, defaulting to every metric in
+                    the first row.
+
+            Returns:
+                index (FirstNonNullIndex): The positions of each metric.
+        """
+        rows = covid_api_data.get("data") or []
+        if fields is None:
+            fields = rows[0].keys() if rows else ()
+        return cls(rows, fields)
+
+    @classmethod
+    def for_response(cls, covid_api_data: dict, fields: Iterable) -> "FirstNonNullIndex":
+        """
+        Returns the index of a Covid API response, walking it only the first time that
+            response object is seen. The snapshot cache hands back the same object until
+            the data changes, so repeated refreshes and every consumer share one index.
+            Only the latest response indexed for each set of fields is kept.
+
+            Parameters:
+                covid_api_data (dict): Covid data fetched from PHE Covid API.
+                fields (Iterable): Metrics to index.
+
+            Returns:
+                index (FirstNonNullIndex): The positions of each metric.
+        """
+        fields = tuple(fields)
+        with cls._response_lock:
+            cached = cls._latest_responses.get(fields)
+        if cached is not None and cached[0] is covid_api_data:
+            return cached[1]
+        index = cls.from_api(covid_api_data, fields)
+        with cls._response_lock:
+            cls._latest_responses[fields] = (covid_api_data, index)
+        return index
+
+    @classmethod
+    def from_csv(cls, covid_csv_data: list, fields: Optional[Iterable] = None) -> "FirstNonNullIndex":
+        """
+        Indexes CSV rows, header first. Positions match first_non_null_entry_csv,
+            which skips the header and never returns the final row.
+
+            Parameters:
+                covid_csv_data (List[List[str]]): List of covid data from CSV file.
+                fields (Iterable): Column indexes to index, defaulting to every column.
+
+            Returns:
+                index (FirstNonNullIndex): The positions of each column.
+        """
+        if fields is None:
+            fields = range(len(covid_csv_data[0])) if covid_csv_data else ()
+        return cls(covid_csv_data, fields, start=1,
+                   stop=max(1, len(covid_csv_data) - 1), null="")
+
+    def index(self, field) -> Optional[int]:
+        """
+        Returns the position of the first non-null value of a field, or None.
+        """
+        return self.positions.get(field)
+
+    def value(self, field):
+        """
+        Returns the first non-null value of a field, or None.
+        """
+        position = self.positions.get(field)
+        return None if position is None else self.rows[position][field]
+
+
+class AreaMetrics:
+    """
+    The latest value of each metric for one area, plus a short rolling window of history.
+
+        Attributes:
+            name (str): Name of the area, i.e. "Exeter".
+            code (str): ONS code of the area, i.e. "E07000041".
+            latest (dict): First non-null value of each metric, keyed by metric name.
+            history (deque): (date, *metric values) tuples, newest first, capped at
+                the index's window size.
+    """
+    __slots__ = ("name", "code", "latest", "history")
+
+    def __init__(self, name: str, code: str, latest: dict, history: deque) -> None:
+        self.name = name
+        self.code = code
+        self.latest = latest
+        self.history = history
+
+    @property
+    def infection_rate(self):
+        """The latest 7-day infection rate."""
+        return self.latest.get("National 7-Day Infection Rate")
+
+    @property
+    def hospital_cases(self):
+        """The latest number of hospital cases."""
+        return self.latest.get("Hospital Cases")
+
+    @property
+    def total_deaths(self):
+        """The latest cumulative number of deaths."""
+        return self.latest.get("Total Deaths")
+
+
+class CovidMetricsIndex:
+    """
+    Maps area names and codes to their AreaMetrics, so a dashboard request for
+    any fetched area is a single dictionary lookup.
+
+        Attributes:
+            window (int): Number of days of history kept for each area.
+    """
+
+    def __init__(self, window: int = 28) -> None:
+        self.window = window
+        self._areas = {}
+        self._lock = Lock()
+
+    def update(self, covid_api_data: dict) -> Optional[AreaMetrics]:
+        """
+        Replaces the indexed metrics of an area with those in a fresh API response.
+
+            Parameters:
+                covid_api_data (dict): Covid data fetched from PHE Covid API.
+
+            Returns:
+                area (AreaMetrics): The new metrics of the area, or None if the
+                    response held no data.
+        """
+        rows = covid_api_data.get("data") or []
+        if not rows:
+            return None
+        first_non_null = FirstNonNullIndex.for_response(
+            covid_api_data, [metric for metric in INDEXED_METRICS if metric in rows[0]])
+        latest = {metric: first_non_null.value(metric) for metric in first_non_null.positions}
+        history = deque(((row.get("date"),) + tuple(row.get(metric) for metric in INDEXED_METRICS)
+                         for row in rows[:self.window]), maxlen=self.window)
+        area = AreaMetrics(rows[0].get("areaName"), rows[0].get("areaCode"), latest, history)
+        with self._lock:
+            for key in (area.name, area.code):
+                if key:
+                    self._areas[key.lower()] = area
+        return area
+
+    def get(self, area: str) -> Optional[AreaMetrics]:
+        """
+        Looks up an area by name or code, ignoring case.
+
+            Parameters:
+                area (str): Name or code of the area.
+
+            Returns:
+                area (AreaMetrics): The area's metrics, or None if it is not indexed.
+        """
+        return self._areas.get(area.lower())
+
+    def area_names(self) -> list[str]:
+        """
+        Lists the names of every indexed area.
+
+            Parameters:
+                None
+
+            Returns:
+                names (list[str]): Sorted area names.
+        """
+        with self._lock:
+            return sorted({area.name for area in self._areas.values() if area.name})
+
+    def summary(self) -> dict:
+        """
+        Returns the name and infection rate of every indexed area, keyed like get().
+
+            Parameters:
+                None
+
+            Returns:
+                areas (dict): {"name": ..., "infection_rate": ...} for each lowercase
+                    area name and code.
+        """
+        with self._lock:
+            areas = dict(self._areas)
+        return {key: {"name": area.name, "infection_rate": area.infection_rate}
+                for key, area in areas.items()}
@@ -3,9 +3,15 @@ Module to handle all covid news article request and future updating.
 """
 import json
 import logging
-from datetime import date, timedelta
+from datetime import datetime, timedelta, timezone
 import requests
 from flask import Markup
+from article_store import ArticleStore
+from deleted_articles_index import DeletedArticleIndex
+from http_cache import HttpCache
+from news_client import NewsAPIError, NewsClient
+from single_flight import SingleFlight
+from instrumentation import FETCH_SECONDS, FUNCTION_SECONDS, timed
 import user_interface as ui
 
 with open("config.json", "r", encoding="utf-8") as config:
@@ -18,14 +24,29 @@ included_domains = json_file["news_API_domains"]
 covid_keywords = json_file["covid_terms"]
 num_articles_at_once = json_file["num_articles_at_once"]
 page_size = json_file["page_size"]
-
-
+news_incremental = json_file["news_incremental"]
+# The articles shown on the dashboard, persisted to news_articles.json in the background.
+article_store = ArticleStore("news_articles.json")
+# Hashes of every deleted article, loaded once from deleted_articles.txt.
+deleted_index = DeletedArticleIndex("deleted_articles.txt")
+# Pooled NewsAPI session with timeouts and retries, shared by every news fetch.
+news_client = NewsClient(api_key, connect_timeout=json_file["news_connect_timeout"],
+                         read_timeout=json_file["news_read_timeout"],
+                         retries=json_file["news_retries"],
+                         cache=HttpCache(json_file["news_cache_dir"]))
+# Shares one news refresh between updates that run at the same time or close together.
+news_refreshes = SingleFlight("news", json_file["min_refresh_interval"]["news"])
+
+
+@timed(FETCH_SECONDS, source="news")
 def news_API_request(covid_terms: str = f"{covid_keywords}") -> list:
     """
     API request that fetches all news articles that have terms matching 'covid_terms'
     then creates a list with the wanted fields from each of the news articles.
     This list is then checked against a file containing deleted articles and any
     matches are deleted from the list.
+    In incremental mode only articles newer than those stored are fetched and they
+    are merged into the stored articles; otherwise the last seven days are fetched.
     The first n articles are then returned.
 
         Parameters:
@@ -35,30 +56,42 @@ def news_API_request(covid_terms: str = f"{covid_keywords}") -> list:
             capped_news_articles (list): A list of the first n news articles.
     """
     keywords = covid_terms  # .replace(", "," OR ")
-    base_url = "https://newsapi.org/v2/everything?"
-    # Calculate the date seven days ago.
-    date_7_days_ago = (date.today() - timedelta(7)).isoformat()
-    complete_url = (
-        f"{base_url}q=({keywords})&sortBy&from={date_7_days_ago}&pageSize={page_size}&domains={included_domains}&apiKey={api_key}")
-    news = requests.get(complete_url).json()  # API request
-    logging.info("News articles fetched")
-    news_articles = []  # Empty list to add news articles to
-    # Loops through each article and creates a new dictionary with only relelvant article parts.
-    for i in news['articles']:
-        news_articles.append(
-            {
-                "title": f"{i['author']} - {i['title']}",
-                "content": f"{i['description']} <br><a href='{i['url']}' target='_blank'>Read Article</a>",
-                "description": i['content'],
-                "url": i['url'],
-            })
-    for i in news_articles:
-        # Allows HTML to be treated and executed as HTML, not text.
-        i["content"] = Markup(i['content'])
+    # Calculate the time seven days ago, the oldest an article may be.
+    oldest = (datetime.now(timezone.utc) - timedelta(7)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    # In incremental mode only articles published since the newest stored one are requested.
+    since = article_store.latest_published() if news_incremental else None
+    params = {"q": f"({keywords})", "from": max(since or oldest, oldest),
+              "sortBy": "publishedAt", "domains": included_domains}
+    try:
+        fetched = news_client.everything(params, page_size)  # API request
+    except (requests.RequestException, NewsAPIError):
+        logging.exception("News articles could not be fetched, keeping last-known articles")
+        return first_n_news_articles(article_store.articles(), num_articles_at_once, page_size)
+    logging.info(f"{len(fetched)} news articles fetched since {params['from']}")
+    # Creates a new dictionary with only relevant parts of each article. Markup allows
+    # the content's HTML to be treated and executed as HTML, not text.
+    news_articles = [
+        {
+            "title": f"{i['author']} - {i['title']}",
+            "content": Markup(
+                f"{i['description']} <br><a href='{i['url']}' target='_blank'>Read Article</a>"),
+            "description": i['content'],
+            "url": i['url'],
+            "publishedAt": i.get('publishedAt'),
+        } for i in fetched]
     # Removes articles that have been deleted from article list
     news_articles = remove_deleted_articles(news_articles)
-    with open("news_articles.json", 'w', encoding='utf-8') as arts:
-        json.dump(news_articles, arts)  # Writes articles to a json file
+    if since:
+        # Adds the new articles to those stored and ages out any older than seven days.
+        added = article_store.merge(news_articles, oldest, page_size)
+        logging.info(f"{added} new news articles stored")
+    else:
+        article_store.replace(news_articles)  # Stores articles, written to file in the background
+        added = len(news_articles)
+    ui.invalidate_dashboard("news articles fetched")
+    if added:
+        ui.publish_event("articles", {"added": added})
+    news_articles = article_store.articles()
     capped_news_articles = first_n_news_articles(
         news_articles, num_articles_at_once, page_size)  # Returns list of first N articles
     return capped_news_articles
@@ -92,24 +125,18 @@ def first_n_news_articles(local_articles: list([dict]),
     return capped_news_articles
 
 
+@timed(FUNCTION_SECONDS, function="remove_deleted_articles")
 def remove_deleted_articles(news_articles: list[dict]) -> list[dict]:
     """
-    Reads a file containing a list of deleted news articles and removes
-    any deleted articles from the news articles list.
+    Removes any articles the user has deleted from the news articles list,
+    using the in-memory index of deleted titles and urls.
 
         Parameters:
             news_articles (list[dict]): List of news articles before removal of deleted articles.
         Returns:
             news_articles (list[dict]): List of news articles after removal of deleted articles.
     """
-    with open('deleted_articles.txt', 'r', encoding='utf-8') as file:
-        for line in file:  # For each line in the file
-            # For each index and value in each article
-            for index, value in enumerate(news_articles):
-                # If the title in the file matches the article's title
-                if news_articles[index]['title'] in line:
-                    # Delete that news article from the article list
-                    del news_articles[index]
+    news_articles = deleted_index.filter(news_articles)
     logging.info("Deleted articles removed from article list")
     return news_articles
 
@@ -125,22 +152,26 @@ def delete_news_article(articles: list[dict], title: str) -> list[dict]:
         Returns:
             articles (list[dict]): The updated list of news articles excluding the deleted article.
     """
+    url = None
     for i in range(len(articles)):  # For the length of the list of articles
         # If the article title matches the deleted article title
         if articles[i]['title'] == title:
+            url = articles[i].get('url')
             del articles[i]  # Delete said article
             logging.info(f"Deleted news article {title}")
             break
-    with open('deleted_articles.txt', 'a', encoding='utf-8') as file:
-        file.write(title + "\n")  # Write deleted article to file
+    article_store.remove(title)
+    deleted_index.add(title, url)  # Appends deleted article to file
     logging.info("Deleted articles written to file")
+    ui.invalidate_dashboard(f"news article {title} deleted")
+    ui.publish_event("articles", {"deleted": title})
     return articles
 
 
 def update_news(update_name: str, is_repeating: bool) -> list[dict]:
     """
     Calls the news_API_request function to return up-to-date news articles.
-
+    Repeats are scheduled by the job store.
 
         Parameters:
             update_name(str): Name of the news update.
@@ -149,17 +180,13 @@ def update_news(update_name: str, is_repeating: bool) -> list[dict]:
             articles (list[dict]): Updated list of news articles.
     """
     try:
-        articles = news_API_request()  # Fetches articles from the API.
+        # Fetches articles from the API, unless another update just did.
+        articles = news_refreshes.do("news", news_API_request)
         # Removes deleted articles from the list of articles.
         articles = remove_deleted_articles(articles)
         logging.info("News articles updated")
-        ui.delete_update_toasts(update_name)
-        with open("news_articles.json", "w", encoding="utf-8") as arts:
-            json.dump(articles, arts)  # Writes articles to json file
-        logging.info("News articles successfully written to file")
-        # Schedules another update for 24 hours time.
-        ui.news_scheduler.enter(86400, 1, update_news,
-                                update_name, is_repeating)
+        # The fetched articles were already merged into the article store.
+        ui.invalidate_dashboard("news articles updated")
     except TypeError:
         logging.exception("Type Error")
 
@@ -0,0 +1,239 @@
+"""
+Module providing a memory-mapped binary store of daily covid metrics per area.
+
+Each area is one file holding a dense run of days, oldest first, laid out as
+fixed-width columns:
+
+    header      magic, version, metric count, first day ordinal, day count
+    latest      int32 index of the latest non-null value of each metric
+    dates       int32 day ordinal of each row (padded to 8 bytes)
+    metrics     one int64 column per metric, NULL_VALUE where there is no data
+
+Files are opened read-only with mmap, so every process reading the store
+shares the same pages, and queries are answered by offset arithmetic on
+zero-copy memoryviews instead of scanning rows.
+"""
+import hashlib
+import mmap
+import os
+import struct
+from datetime import date
+from threading import Lock
+from typing import Iterable, Optional, Tuple
+from covid_csv import iter_covid_csv_rows
+
+MAGIC = b"CVTS"
+VERSION = 1
+HEADER = struct.Struct("<4sHHiI")
+NULL_VALUE = -(2 ** 63)
+STORE_METRICS = ("cases", "rollingCases", "hospitalCases", "deaths")
+
+# Where each store metric comes from in the CSV export and the API structure.
+CSV_METRICS = {
+    "cases": "newCasesBySpecimenDate",
+    "hospitalCases": "hospitalCases",
+    "deaths": "cumDailyNsoDeathsByDeathDate",
+}
+API_METRICS = {
+    "rollingCases": "National 7-Day Infection Rate",
+    "hospitalCases": "Hospital Cases",
+    "deaths": "Total Deaths",
+}
+
+
+class AreaSeries:
+    """
+    Read-only view of one area's file.
+
+        Attributes:
+            first_day (int): Day ordinal of the oldest row.
+            days (int): Number of rows.
+            latest (dict): Row index of the latest non-null value of each metric, or -1.
+            columns (dict): Zero-copy int64 memoryview of each metric column.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as series_file:
+            self.inode = os.fstat(series_file.fileno()).st_ino
+            self._map = mmap.mmap(series_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, metric_count, self.first_day, self.days = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION or metric_count != len(STORE_METRICS):
+            raise ValueError(f"{path} is not a version {VERSION} covid time-series file")
+        latest = struct.unpack_from(f"<{metric_count}i", self._map, HEADER.size)
+        self.latest = dict(zip(STORE_METRICS, latest))
+        view = memoryview(self._map)
+        offset = _column_offset(metric_count, self.days)
+        self.columns = {}
+        for metric in STORE_METRICS:
+            self.columns[metric] = view[offset:offset + 8 * self.days].cast("q")
+            offset += 8 * self.days
+
+    def date_of(self, index: int) -> str:
+        """
+        Returns the ISO date of a row.
+        """
+        return date.fromordinal(self.first_day + index).isoformat()
+
+
+def _column_offset(metric_count: int, days: int) -> int:
+    """
+    Returns the byte offset of the first metric column, after the header,
+        latest indexes and 8-byte aligned date column.
+    """
+    offset = HEADER.size + 4 * metric_count + 4 * days
+    return offset + (-offset % 8)
+
+
+class CovidTimeSeriesStore:
+    """
+    Directory of per-area binary time-series files.
+
+        Attributes:
+            store_dir (str): Directory the area files are written to.
+    """
+
+    def __init__(self, store_dir: str) -> None:
+        self.store_dir = store_dir
+        self._open = {}
+        self._lock = Lock()
+        os.makedirs(store_dir, exist_ok=True)
+
+    def path(self, area: str) -> str:
+        """
+        Returns the file an area is stored in.
+        """
+        name = hashlib.sha1(area.lower().encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.store_dir, f"{name}.bin")
+
+    def write(self, area: str, records: Iterable[Tuple[str, dict]]) -> None:
+        """
+        Replaces an area's file with the given records. Days missing from the
+            records are stored as null.
+
+            Parameters:
+                area (str): Name of the area.
+                records (Iterable[Tuple[str, dict]]): (ISO date, {store metric: value})
+                    pairs, in any order.
+
+            Returns:
+                None
+        """
+        by_day = {date.fromisoformat(day).toordinal(): values for day, values in records}
+        if not by_day:
+            return
+        first_day = min(by_day)
+        days = max(by_day) - first_day + 1
+        columns = {metric: [NULL_VALUE] * days for metric in STORE_METRICS}
+        for ordinal, values in by_day.items():
+            for metric, value in values.items():
+                if value is not None and value != "":
+                    columns[metric][ordinal - first_day] = int(value)
+        latest = []
+        for metric in STORE_METRICS:
+            column = columns[metric]
+            latest.append(next((index for index in range(days - 1, -1, -1)
+                                if column[index] != NULL_VALUE), -1))
+        path = self.path(area)
+        with open(f"{path}.tmp", "wb") as series_file:
+            series_file.write(HEADER.pack(MAGIC, VERSION, len(STORE_METRICS), first_day, days))
+            series_file.write(struct.pack(f"<{len(latest)}i", *latest))
+            series_file.write(struct.pack(f"<{days}i", *range(first_day, first_day + days)))
+            series_file.write(b"\0" * (-(HEADER.size + 4 * len(latest) + 4 * days) % 8))
+            for metric in STORE_METRICS:
+                series_file.write(struct.pack(f"<{days}q", *columns[metric]))
+        os.replace(f"{path}.tmp", path)  # Readers keep their old mapping until they reopen
+
+    def write_api_data(self, area: str, covid_api_data: dict) -> None:
+        """
+        Stores the rows of a Covid API response for an area.
+
+            Parameters:
+                area (str): Name of the area.
+                covid_api_data (dict): Covid data fetched from PHE Covid API.
+
+            Returns:
+                None
+        """
+        self.write(area, ((row["date"], {metric: row.get(name) for metric, name
+                                          in API_METRICS.items()})
+                          for row in covid_api_data.get("data") or [] if row.get("date")))
+
+    def write_csv(self, area: str, csv_filename: str) -> None:
+        """
+        Stores the rows of a covid CSV export for an area.
+
+            Parameters:
+                area (str): Name of the area.
+                csv_filename (str): Name of the CSV file, ending in ".gz" if compressed.
+
+            Returns:
+                None
+        """
+        rows = iter_covid_csv_rows(csv_filename)
+        header = next(rows)
+        date_index = header.index("date")
+        indexes = {metric: header.index(name) for metric, name in CSV_METRICS.items()}
+        self.write(area, ((row[date_index], {metric: row[index] for metric, index
+                                             in indexes.items()}) for row in rows))
+
+    def series(self, area: str) -> Optional[AreaSeries]:
+        """
+        Returns the memory-mapped series of an area, reopening it if the file has
+            been replaced since it was mapped.
+
+            Parameters:
+                area (str): Name of the area.
+
+            Returns:
+                series (AreaSeries): The area's series, or None if it has not been stored.
+        """
+        path = self.path(area)
+        try:
+            inode = os.stat(path).st_ino
+        except OSError:
+            return None
+        with self._lock:
+            series = self._open.get(path)
+            if series is None or series.inode != inode:
+                series = AreaSeries(path)
+                self._open[path] = series
+        return series
+
+    def latest(self, area: str, metric: str) -> Optional[Tuple[str, int]]:
+        """
+        Returns the latest non-null value of a metric.
+
+            Parameters:
+                area (str): Name of the area.
+                metric (str): One of STORE_METRICS.
+
+            Returns:
+                day, value (Tuple[str, int]): Date and value, or None if there is no data.
+        """
+        series = self.series(area)
+        if series is None or series.latest[metric] < 0:
+            return None
+        index = series.latest[metric]
+        return series.date_of(index), series.columns[metric][index]
+
+    def window_sum(self, area: str, metric: str, days: int, skip: int = 0) -> int:
+        """
+        Sums a metric over the given number of days, ending at its latest non-null
+            value minus any skipped days. Nulls count as zero.
+
+            Parameters:
+                area (str): Name of the area.
+                metric (str): One of STORE_METRICS.
+                days (int): Number of days to sum.
+                skip (int): Number of most recent non-null days to leave out,
+                    i.e. 1 to ignore an incomplete latest day.
+
+            Returns:
+                total (int): Sum of the values.
+        """
+        series = self.series(area)
+        if series is None or series.latest[metric] < 0:
+            return 0
+        stop = series.latest[metric] + 1 - skip
+        window = series.columns[metric][max(0, stop - days):max(0, stop)]
+        return sum(value for value in window if value != NULL_VALUE)
@@ -0,0 +1,180 @@
+"""
+Module providing a hash index of the news articles the user has deleted.
+"""
+import hashlib
+import logging
+import math
+from threading import Lock
+from typing import Optional
+
+
+def normalize_title(title: str) -> str:
+    """
+    Normalises an article title so spacing and case differences still match.
+
+        Parameters:
+            title (str): Title of the article.
+
+        Returns:
+            title (str): The normalised title.
+    """
+    return " ".join(title.split()).casefold()
+
+
+def key_hash(key: str) -> int:
+    """
+    Returns a 64-bit hash of a normalised title or url, stable between runs.
+    """
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class BloomFilter:
+    """
+    Compact set membership test that never misses a member but may, at roughly
+    the given error rate, report a non-member as present.
+
+        Attributes:
+            capacity (int): Number of items the error rate holds for.
+            count (int): Number of items added.
+            size (int): Number of bits.
+            hashes (int): Number of bit positions set per item.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001) -> None:
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.count = 0
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: int):
+        # Double hashing: the two halves of the 64-bit hash generate every position
+        first, second = item >> 32, (item & 0xFFFFFFFF) | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item: int) -> None:
+        """
+        Adds a hashed item to the filter.
+        """
+        self.count += 1
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: int) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(item))
+
+
+class DeletedArticleIndex:
+    """
+    Hashes of the normalised titles and urls of deleted articles, loaded from the
+    deleted articles file once and then kept up to date by appending to it.
+
+    Each line of the file is a title, optionally followed by a tab and the url.
+    Once the history grows past bloom_threshold entries, the exact hash set is
+    replaced by a Bloom filter to bound memory, accepting a 0.1% chance of
+    hiding an article that was never deleted. When more entries are added than
+    the filter was sized for, it is rebuilt from the file at four times the size,
+    so the error rate holds as the history grows.
+
+        Attributes:
+            filename (str): The deleted articles file.
+            bloom_threshold (int): Number of entries above which a Bloom filter is used.
+    """
+
+    def __init__(self, filename: str, bloom_threshold: int = 1_000_000) -> None:
+        self.filename = filename
+        self.bloom_threshold = bloom_threshold
+        self._hashes = set()
+        self._bloom = None
+        self._lock = Lock()
+        self.load()
+
+    def load(self) -> None:
+        """
+        Reads every entry in the deleted articles file into the index.
+
+            Parameters:
+                None
+
+            Returns:
+                None
+        """
+        hashes = set(self._read_hashes())
+        with self._lock:
+            self._hashes = hashes
+            self._bloom = None
+            self._maybe_compact()
+        logging.info(f"Loaded {len(hashes)} deleted article entries")
+
+    def _read_hashes(self):
+        try:
+            with open(self.filename, "r", encoding="utf-8") as file:
+                for line in file:
+                    for key in line.rstrip("\n").split("\t"):
+                        if key.strip():
+                            yield key_hash(normalize_title(key))
+        except FileNotFoundError:
+            pass
+
+    def _maybe_compact(self) -> None:
+        if self._bloom is None and len(self._hashes) > self.bloom_threshold:
+            self._bloom = BloomFilter(max(self.bloom_threshold, len(self._hashes)) * 4)
+            for item in self._hashes:
+                self._bloom.add(item)
+            self._hashes = set()
+
+    def _grow(self) -> None:
+        # The filter cannot list its items, so the larger one is filled from the file
+        bloom = BloomFilter(self._bloom.capacity * 4)
+        for item in self._read_hashes():
+            bloom.add(item)
+        self._bloom = bloom
+        logging.info(f"Deleted article filter rebuilt for {bloom.capacity} entries")
+
+    def _add_hash(self, item: int) -> None:
+        if self._bloom is not None:
+            self._bloom.add(item)
+            if self._bloom.count > self._bloom.capacity:
+                self._grow()
+        else:
+            self._hashes.add(item)
+            self._maybe_compact()
+
+    def _has_hash(self, item: int) -> bool:
+        return item in self._hashes or (self._bloom is not None and item in self._bloom)
+
+    def __contains__(self, article: dict) -> bool:
+        keys = [article.get("title"), article.get("url")]
+        return any(self._has_hash(key_hash(normalize_title(key))) for key in keys if key)
+
+    def add(self, title: str, url: Optional[str] = None) -> None:
+        """
+        Marks an article as deleted and appends it to the deleted articles file.
+
+            Parameters:
+                title (str): Title of the deleted article.
+                url (str): Url of the deleted article, if known.
+
+            Returns:
+                None
+        """
+        with self._lock:
+            with open(self.filename, "a", encoding="utf-8") as file:
+                file.write(f"{title}\t{url}\n" if url else f"{title}\n")
+            for key in (title, url):  # After the write, so a rebuild reads this entry
+                if key:
+                    self._add_hash(key_hash(normalize_title(key)))
+
+    def filter(self, news_articles: list[dict]) -> list[dict]:
+        """
+        Returns the articles that have not been deleted, in their original order.
+
+            Parameters:
+                news_articles (list[dict]): List of news articles.
+
+            Returns:
+                news_articles (list[dict]): The articles that have not been deleted.
+        """
+        return [article for article in news_articles if article not in self]
@@ -0,0 +1,103 @@
+"""
+Module providing the Server-Sent Events channel that pushes data changes to open dashboards.
+"""
+import itertools
+import time
+from collections import deque
+from threading import Condition
+from typing import Iterator, Optional
+
+import json_encoding
+
+
+class EventBus:
+    """
+    Keeps the most recent events, each already formatted as a Server-Sent Events
+    message, and wakes every waiting stream when a new one is published. Each event
+    is serialised once however many clients are listening, and a client reconnecting
+    with Last-Event-ID is sent the events it missed, if they are still kept.
+
+        Attributes:
+            history (deque): The most recent (id, message) pairs, oldest first.
+    """
+
+    def __init__(self, history: int = 100) -> None:
+        self.history = deque(maxlen=history)
+        self._ids = itertools.count(1)
+        self._last_id = 0
+        self._condition = Condition()
+
+    @property
+    def last_id(self) -> int:
+        """
+        Returns the id of the newest event, or 0 if none has been published.
+        """
+        return self._last_id
+
+    def publish(self, event: str, data: object, event_id: Optional[int] = None) -> int:
+        """
+        Sends an event to every open stream.
+
+            Parameters:
+                event (str): The event type, i.e. "metrics", "articles" or "toasts".
+                data (object): JSON-serialisable event data.
+                event_id (int): The event's id, for events relayed from another
+                    process, so every process gives an event the same id. Ids must
+                    increase; a bus either numbers every event or none.
+
+            Returns:
+                event_id (int): The id of the published event.
+        """
+        payload = json_encoding.dumps(data).decode("utf-8")
+        with self._condition:
+            if event_id is None:
+                event_id = next(self._ids)
+            self.history.append((event_id, f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n"))
+            self._last_id = event_id
+            self._condition.notify_all()
+        return event_id
+
+    def wait(self, last_id: int, timeout: float) -> list[tuple[int, str]]:
+        """
+        Waits until there are events newer than last_id, or the timeout passes.
+
+            Parameters:
+                last_id (int): Id of the last event the client received.
+                timeout (float): Longest time to wait in seconds.
+
+            Returns:
+                events (list[tuple[int, str]]): The newer (id, message) pairs, if any.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._last_id > last_id, timeout)
+            return [(event_id, message) for event_id, message in self.history
+                    if event_id > last_id]
+
+    def stream(self, last_id: Optional[int] = None, heartbeat: float = 15.0,
+               duration: Optional[float] = None) -> Iterator[str]:
+        """
+        Yields Server-Sent Events messages, with a comment every heartbeat seconds
+            so proxies keep the connection open. After duration seconds the stream
+            ends, freeing the thread serving it; browsers then reconnect with the
+            Last-Event-ID of the last event they received and miss nothing.
+
+            Parameters:
+                last_id (int): Id of the last event the client received, or None to
+                    start with the next event published.
+                heartbeat (float): Seconds between keep-alive comments.
+                duration (float): Seconds before the stream ends, or None for never.
+
+            Returns:
+                messages (Iterator[str]): The formatted messages.
+        """
+        if last_id is None:
+            last_id = self.last_id
+        deadline = None if duration is None else time.monotonic() + duration
+        yield "retry: 5000\n\n"  # Tells browsers to reconnect after five seconds
+        while deadline is None or time.monotonic() < deadline:
+            wait = heartbeat if deadline is None else min(heartbeat, deadline - time.monotonic())
+            events = self.wait(last_id, max(wait, 0))
+            if not events:
+                yield ": keep-alive\n\n"
+            for last_id, message in events:
+                yield message
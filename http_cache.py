@@ -0,0 +1,159 @@
+"""
+Module providing an on-disk cache of HTTP responses revalidated with conditional requests.
+"""
+import gzip
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+
+
+class HttpCache:
+    """
+    Stores the validators (ETag and Last-Modified) and decoded JSON body of each
+    response, keyed by its url and query parameters. Later requests for the same
+    url send If-None-Match and If-Modified-Since, and a 304 Not Modified response is
+    answered from the stored body instead of being downloaded again. Incremental
+    fetches change their query parameters every time, so only the max_entries most
+    recently used responses are kept, in memory and on disk.
+
+        Attributes:
+            cache_dir (str): Directory the gzip-compressed responses are written to.
+            max_entries (int): Most responses kept.
+            requests (int): Number of conditional lookups made.
+            not_modified (int): Number of requests answered from the cache after a 304.
+            stored (int): Number of responses written to the cache.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int = 64) -> None:
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.requests = 0
+        self.not_modified = 0
+        self.stored = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def cache_key(url: str, params: dict) -> str:
+        """
+        Builds the cache key for a request from its url and query parameters.
+        """
+        raw = json.dumps([url, params], sort_keys=True)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json.gz")
+
+    def lookup(self, url: str, params: dict) -> Optional[dict]:
+        """
+        Returns the stored response for a request, if there is one.
+
+            Parameters:
+                url (str): The request url.
+                params (dict): The query parameters.
+
+            Returns:
+                entry (dict): The stored "etag", "last_modified" and "body", or None.
+        """
+        key = self.cache_key(url, params)
+        with self._lock:
+            self.requests += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            try:
+                with gzip.open(self._path(key), "rt", encoding="utf-8") as cached:
+                    entry = json.load(cached)
+                os.utime(self._path(key))  # Marks it recently used for eviction
+            except (OSError, ValueError):
+                return None
+            with self._lock:
+                self._entries[key] = entry
+                self._evict()
+        return entry
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def conditional_headers(entry: Optional[dict]) -> dict:
+        """
+        Returns the If-None-Match and If-Modified-Since headers for a stored response.
+        """
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def hit(self, entry: dict) -> dict:
+        """
+        Records a 304 Not Modified response and returns the stored body.
+        """
+        with self._lock:
+            self.not_modified += 1
+        return entry["body"]
+
+    def store(self, url: str, params: dict, headers: dict, body: dict) -> None:
+        """
+        Writes a response to the cache if it has an ETag or Last-Modified header.
+
+            Parameters:
+                url (str): The request url.
+                params (dict): The query parameters.
+                headers (dict): The response headers.
+                body (dict): The decoded JSON body.
+
+            Returns:
+                None
+        """
+        etag, last_modified = headers.get("ETag"), headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return  # Nothing to revalidate with, so nothing worth keeping
+        key = self.cache_key(url, params)
+        entry = {"etag": etag, "last_modified": last_modified, "body": body}
+        path = self._path(key)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._evict()
+            self.stored += 1
+            with gzip.open(f"{path}.tmp", "wt", encoding="utf-8") as cached:
+                json.dump(entry, cached, separators=(",", ":"))
+            os.replace(f"{path}.tmp", path)
+            self._evict_files()
+
+    def _evict_files(self) -> None:
+        # Files written by earlier runs are not in memory, so the directory is the record
+        paths = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                 if name.endswith(".json.gz")]
+        if len(paths) <= self.max_entries:
+            return
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:len(paths) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        """
+        Returns the number of lookups, 304 hits and stored responses, and the hit rate.
+
+            Parameters:
+                None
+
+            Returns:
+                stats (dict): The requests, not_modified, stored and hit_rate values.
+        """
+        with self._lock:
+            return {"requests": self.requests, "not_modified": self.not_modified,
+                    "stored": self.stored,
+                    "hit_rate": self.not_modified / self.requests if self.requests else 0.0}
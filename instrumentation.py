@@ -0,0 +1,216 @@
+"""
+Module providing timing histograms and counters for the dashboard's hot paths,
+exposed in the Prometheus text format at /metrics.
+"""
+import bisect
+import functools
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from threading import Lock
+from typing import Callable, Iterator
+
+with open("config.json", "r", encoding="utf-8") as config:
+    json_file = json.load(config)  # Opens config file and reads in whether metrics are on
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def format_labels(labels: tuple, **extra) -> str:
+    """
+    Formats label pairs as a Prometheus label set, i.e. {source="covid"}.
+    """
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (name + '="' + str(value).replace("\\", "\\\\").replace('"', '\\"')
+               .replace("\n", "\\n") + '"' for name, value in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+class Counter:
+    """
+    Count of events, per label set, that only goes up.
+
+        Attributes:
+            name (str): Metric name.
+            documentation (str): Help text.
+            enabled (bool): Whether or not counts are recorded.
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, enabled: bool = True) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.enabled = enabled
+        self._values = {}
+        self._lock = Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """
+        Adds to the count for a label set.
+        """
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self) -> list[str]:
+        """
+        Returns the metric's sample lines.
+        """
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{format_labels(key)} {value}" for key, value in values]
+
+
+class Histogram:
+    """
+    Distribution of observed durations, per label set, counted into cumulative buckets.
+
+        Attributes:
+            name (str): Metric name.
+            documentation (str): Help text.
+            buckets (tuple): Upper bounds of the buckets in seconds.
+            enabled (bool): Whether or not observations are recorded.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: tuple = DEFAULT_BUCKETS,
+                 enabled: bool = True) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.enabled = enabled
+        self._series = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        """
+        Records one observation for a label set.
+        """
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def _timer(self, labels: dict) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def time(self, **labels):
+        """
+        Returns a context manager that observes how long its block takes.
+        """
+        return self._timer(labels) if self.enabled else nullcontext()
+
+    def collect(self) -> list[str]:
+        """
+        Returns the metric's bucket, sum and count sample lines.
+        """
+        with self._lock:
+            series = sorted((key, list(counts), total)
+                            for key, (counts, total) in self._series.items())
+        lines = []
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{format_labels(key, le=bound)} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{format_labels(key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    The set of metrics served at /metrics. When disabled, timed() leaves functions
+    undecorated and metrics ignore observations, so instrumentation costs nothing.
+
+        Attributes:
+            enabled (bool): Whether or not metrics are recorded.
+    """
+
+    def __init__(self, enabled: bool) -> None:
+        self.enabled = enabled
+        self._metrics = {}
+
+    def histogram(self, name: str, documentation: str,
+                  buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        """
+        Returns the named histogram, creating it if needed.
+        """
+        return self._metrics.setdefault(
+            name, Histogram(name, documentation, buckets, self.enabled))
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        """
+        Returns the named counter, creating it if needed.
+        """
+        return self._metrics.setdefault(name, Counter(name, documentation, self.enabled))
+
+    def timed(self, histogram: Histogram, **labels) -> Callable[[Callable], Callable]:
+        """
+        Decorator observing how long each call of a function takes.
+
+            Parameters:
+                histogram (Histogram): Where to record the durations.
+                labels: Labels identifying the function, i.e. source="covid".
+
+            Returns:
+                decorator (Callable): Wraps the function, or returns it unchanged
+                    when metrics are disabled.
+        """
+        def decorator(function: Callable) -> Callable:
+            if not self.enabled:
+                return function
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start, **labels)
+            return wrapper
+        return decorator
+
+    def expose(self) -> str:
+        """
+        Returns every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry(json_file["metrics_enabled"])
+timed = registry.timed
+FETCH_SECONDS = registry.histogram(
+    "dashboard_fetch_seconds", "Time spent fetching data from the covid and news APIs.")
+FUNCTION_SECONDS = registry.histogram(
+    "dashboard_function_seconds",
+    "Time spent in CSV processing, article filtering and template rendering.")
+REQUEST_SECONDS = registry.histogram(
+    "dashboard_request_seconds", "Time spent handling dashboard requests, by route.")
+FETCHES_ABANDONED = registry.counter(
+    "dashboard_fetches_abandoned_total",
+    "API requests still running when a refresh stopped waiting for them, by source.")
+JOB_SECONDS = registry.histogram(
+    "dashboard_job_seconds", "Time spent running scheduled updates, by kind.")
+JOB_FAILURES = registry.counter(
+    "dashboard_job_failures_total", "Scheduled updates that raised an exception, by kind.")
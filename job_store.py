@@ -0,0 +1,130 @@
+"""
+Module providing durable storage for scheduled update jobs.
+"""
+import json
+import math
+import sqlite3
+from contextlib import contextmanager
+from threading import Lock
+from typing import Iterator, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    run_at REAL NOT NULL,
+    interval REAL,
+    details TEXT
+)
+"""
+
+
+def next_run_time(run_at: float, interval: float, now: float) -> float:
+    """
+    Returns the first run time after now on the schedule that started at run_at,
+        so repeating jobs keep to their original wall-clock time instead of drifting
+        by however late each run was.
+
+        Parameters:
+            run_at (float): Epoch time of a run on the schedule.
+            interval (float): Seconds between runs.
+            now (float): The current epoch time.
+
+        Returns:
+            next_run_at (float): Epoch time of the next run.
+    """
+    missed = max(1, math.floor((now - run_at) / interval) + 1)
+    return run_at + missed * interval
+
+
+class JobStore:
+    """
+    SQLite table of scheduled jobs: what to run, when it is next due and how often
+    it repeats. Rows are written when a job is scheduled, moved on when a repeating
+    job runs and deleted when a one-off job runs, so the schedule survives restarts.
+
+        Attributes:
+            filename (str): SQLite database file.
+    """
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        self._lock = Lock()
+        with self._connect() as connection:
+            connection.execute(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.filename, timeout=10)
+        try:
+            with connection:  # Commits on success, rolls back on error
+                yield connection
+        finally:
+            connection.close()
+
+    def add(self, kind: str, name: str, run_at: float, interval: Optional[float] = None,
+            details: Optional[dict] = None) -> int:
+        """
+        Records a newly scheduled job.
+
+            Parameters:
+                kind (str): What the job does, i.e. "covid", "news" or "toast".
+                name (str): Name of the update.
+                run_at (float): Epoch time the job is due.
+                interval (float): Seconds between runs for a repeating job, else None.
+                details (dict): Any extra data needed to restore the job.
+
+            Returns:
+                job_id (int): The id of the stored job.
+        """
+        with self._lock, self._connect() as connection:
+            cursor = connection.execute(
+                "INSERT INTO jobs (kind, name, run_at, interval, details) VALUES (?, ?, ?, ?, ?)",
+                (kind, name, run_at, interval, json.dumps(details) if details else None))
+            return cursor.lastrowid
+
+    def reschedule(self, job_id: int, run_at: float) -> None:
+        """
+        Moves a repeating job on to its next run time.
+
+            Parameters:
+                job_id (int): The id of the stored job.
+                run_at (float): Epoch time of the next run.
+
+            Returns:
+                None
+        """
+        with self._lock, self._connect() as connection:
+            connection.execute("UPDATE jobs SET run_at = ? WHERE id = ?", (run_at, job_id))
+
+    def remove(self, job_id: int) -> None:
+        """
+        Deletes a job that has finished or been cancelled.
+
+            Parameters:
+                job_id (int): The id of the stored job.
+
+            Returns:
+                None
+        """
+        with self._lock, self._connect() as connection:
+            connection.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def load(self) -> list[dict]:
+        """
+        Returns every stored job, soonest first.
+
+            Parameters:
+                None
+
+            Returns:
+                jobs (list[dict]): Each job's id, kind, name, run_at, interval and details.
+        """
+        with self._lock, self._connect() as connection:
+            rows = connection.execute(
+                "SELECT id, kind, name, run_at, interval, details FROM jobs ORDER BY run_at"
+            ).fetchall()
+        return [{"id": job_id, "kind": kind, "name": name, "run_at": run_at,
+                 "interval": interval, "details": json.loads(details) if details else None}
+                for job_id, kind, name, run_at, interval, details in rows]
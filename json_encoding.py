@@ -0,0 +1,67 @@
+"""
+Module providing compact JSON serialisation and response compression for the JSON API.
+"""
+import gzip
+import json
+
+try:
+    import orjson
+except ImportError:  # Optional, the standard library encoder is used without it
+    orjson = None
+try:
+    import brotli
+except ImportError:  # Optional, gzip is offered without it
+    brotli = None
+
+
+def dumps(data: object) -> bytes:
+    """
+    Serialises data to compact UTF-8 JSON, using orjson when it is installed.
+
+        Parameters:
+            data (object): JSON-serialisable data.
+
+        Returns:
+            body (bytes): The encoded JSON.
+    """
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def choose_encoding(accept_encoding: str) -> str:
+    """
+    Picks the best content encoding the client accepts: brotli if it is installed,
+        then gzip, otherwise none.
+
+        Parameters:
+            accept_encoding (str): The request's Accept-Encoding header.
+
+        Returns:
+            encoding (str): "br", "gzip" or "identity".
+    """
+    accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")
+                if not part.replace(" ", "").endswith(";q=0")}
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return "identity"
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """
+    Compresses a response body with the given content encoding.
+
+        Parameters:
+            body (bytes): The uncompressed body.
+            encoding (str): "br", "gzip" or "identity".
+
+        Returns:
+            body (bytes): The encoded body.
+    """
+    if encoding == "br":
+        return brotli.compress(body)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6, mtime=0)
+    return body
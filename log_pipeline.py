@@ -0,0 +1,159 @@
+"""
+Module providing the application's logging pipeline: records are queued on the
+calling thread and written as JSON lines to a rotating file by a background thread.
+"""
+import atexit
+import json
+import logging
+import time
+import traceback
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, WatchedFileHandler
+from queue import SimpleQueue
+from threading import Lock
+from typing import Optional
+
+# Attributes every LogRecord has; anything else on a record was passed in extra=.
+RECORD_ATTRIBUTES = set(logging.LogRecord("", 0, "", 0, "", None, None).__dict__) | {
+    "message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats each record as one line of JSON holding its time, level, logger, thread
+    and message, any fields passed with extra=, i.e. {"update": "Daily", "duration": 1.2},
+    and the traceback of a logged exception.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {"time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+                         + f".{int(record.msecs):03d}",
+                 "level": record.levelname, "logger": record.name,
+                 "thread": record.threadName, "message": record.getMessage()}
+        for name, value in record.__dict__.items():
+            if name not in RECORD_ATTRIBUTES:
+                entry[name] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lets through at most burst INFO and DEBUG records per window seconds from each
+    line of code that logs, so a message logged on every request or loop iteration
+    cannot flood the log. Warnings and errors always pass. The first record let
+    through after some were dropped carries their number as "sampled_out".
+
+        Attributes:
+            burst (int): Records let through per call site in each window.
+            window (float): Length of a window in seconds.
+            dropped (int): Total number of records dropped.
+    """
+
+    def __init__(self, burst: int = 10, window: float = 60.0, clock=time.monotonic) -> None:
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.dropped = 0
+        self._clock = clock
+        self._sites = {}
+        self._lock = Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.burst:
+            return True
+        site = (record.pathname, record.lineno)
+        now = self._clock()
+        with self._lock:
+            started, passed, dropped = self._sites.get(site, (now, 0, 0))
+            if now - started >= self.window:
+                started, passed = now, 0
+            if passed >= self.burst:
+                self._sites[site] = (started, passed, dropped + 1)
+                self.dropped += 1
+                return False
+            self._sites[site] = (started, passed + 1, 0)
+        if dropped:
+            record.sampled_out = dropped
+        return True
+
+
+class StructuredQueueHandler(QueueHandler):
+    """
+    Queues records for the background writer. The message is formatted and any
+    traceback rendered on the calling thread, as QueueHandler does, but the fields
+    passed with extra= are kept as fields rather than merged into the message.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+
+
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging(filename: str, max_bytes: int = 1024*1024, backup_count: int = 5,
+                      level: int = logging.INFO, burst: int = 10, window: float = 60.0,
+                      rotate: bool = True) -> QueueListener:
+    """
+    Sends the root logger's records through a queue to a background thread that
+    writes them as JSON lines to a file, rotated once it reaches max_bytes. Logging
+    on a request or job thread then only formats the message and queues it. Any
+    handlers already on the root logger are removed. Calling it again returns the
+    running listener.
+
+        Parameters:
+            filename (str): The log file.
+            max_bytes (int): Size at which the file is rotated, or 0 to never rotate.
+            backup_count (int): Number of rotated files kept, i.e. sys.log.1 to sys.log.5.
+            level (int): Lowest level logged.
+            burst (int): INFO records let through per call site each window, or 0
+                to log every record.
+            window (float): Sampling window in seconds.
+            rotate (bool): Whether this process rotates the file. Other processes
+                logging to the same file pass False: they only append to it, and
+                reopen it once it has been rotated.
+
+        Returns:
+            listener (QueueListener): The running background writer.
+    """
+    global _listener  # pylint: disable=global-statement
+    if _listener is not None:
+        return _listener
+    if rotate:
+        file_handler = RotatingFileHandler(filename, maxBytes=max_bytes,
+                                           backupCount=backup_count, encoding="utf-8")
+    else:
+        file_handler = WatchedFileHandler(filename, encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter())
+    records = SimpleQueue()
+    queue_handler = StructuredQueueHandler(records)
+    queue_handler.addFilter(SamplingFilter(burst, window))
+    root = logging.getLogger()
+    for handler in root.handlers[:]:  # Replaces any handlers set up before, as basicConfig(force=True)
+        root.removeHandler(handler)
+        handler.close()
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+    _listener = QueueListener(records, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)  # Writes out queued records on shutdown
+    return _listener
+
+
+def stop_logging() -> None:
+    """
+    Writes out any queued records and stops the background writer, if it is running.
+    """
+    global _listener  # pylint: disable=global-statement
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,138 @@
+"""
+Module providing the NewsAPI client used to fetch covid news articles.
+"""
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from http_cache import HttpCache
+
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+MAX_PAGE_SIZE = 100  # Largest pageSize NewsAPI accepts
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class NewsAPIError(Exception):
+    """
+    Raised when NewsAPI rejects a request, i.e. for a bad key or query.
+    """
+
+
+class NewsClient:
+    """
+    NewsAPI client sharing one pooled session, so connections are kept alive between
+    requests. Every request has connect and read timeouts, and connection errors,
+    timeouts and 429/5xx responses are retried with bounded exponential backoff.
+    Result pages beyond the first are fetched concurrently. With a cache, requests
+    are made conditional and 304 Not Modified responses are served from it.
+
+        Attributes:
+            api_key (str): NewsAPI key.
+            url (str): The everything endpoint.
+            timeout (tuple): Connect and read timeouts in seconds.
+            retries (int): Number of retries after a failed request.
+            backoff (float): Seconds to wait before the first retry, doubled each time.
+            max_backoff (float): Longest wait between retries.
+            max_page_size (int): Most articles requested per page.
+            cache (HttpCache): Stored responses used for conditional requests, or None.
+    """
+
+    def __init__(self, api_key: str, url: str = NEWS_API_URL, connect_timeout: float = 5,
+                 read_timeout: float = 15, retries: int = 3, backoff: float = 0.5,
+                 max_backoff: float = 8, max_page_size: int = MAX_PAGE_SIZE,
+                 workers: int = 4, cache: Optional[HttpCache] = None,
+                 sleep: Callable[[float], None] = time.sleep) -> None:
+        self.api_key = api_key
+        self.url = url
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_page_size = max_page_size
+        self.workers = workers
+        self.cache = cache
+        self._sleep = sleep
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["X-Api-Key"] = api_key
+
+    def _delay(self, attempt: int, response: requests.Response = None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(self.max_backoff, float(retry_after))
+        return min(self.max_backoff, self.backoff * 2 ** attempt)
+
+    def get(self, params: dict) -> dict:
+        """
+        Requests one page of results, retrying failures.
+
+            Parameters:
+                params (dict): The query parameters.
+
+            Returns:
+                page (dict): The decoded JSON response.
+        """
+        cached = self.cache.lookup(self.url, params) if self.cache else None
+        headers = HttpCache.conditional_headers(cached)
+        attempt = 0
+        while True:
+            try:
+                response = self.session.get(self.url, params=params, headers=headers,
+                                            timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                if attempt >= self.retries:
+                    raise
+                response, reason = None, type(error).__name__
+            else:
+                if response.status_code == 304 and cached is not None:
+                    return self.cache.hit(cached)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    page = self._decode(response)
+                    if self.cache:
+                        self.cache.store(self.url, params, response.headers, page)
+                    return page
+                reason = response.status_code
+            logging.warning(f"News request failed ({reason}), retry {attempt + 1} of {self.retries}")
+            self._sleep(self._delay(attempt, response))
+            attempt += 1
+
+    @staticmethod
+    def _decode(response: requests.Response) -> dict:
+        try:
+            page = response.json()
+        except ValueError:
+            response.raise_for_status()
+            raise
+        if response.status_code != 200 or page.get("status") == "error":
+            raise NewsAPIError(f"{response.status_code} {page.get('code')}: {page.get('message')}")
+        return page
+
+    def everything(self, params: dict, page_size: int) -> list[dict]:
+        """
+        Fetches up to page_size articles matching the query, requesting every page
+            after the first at the same time.
+
+            Parameters:
+                params (dict): The query parameters, without paging.
+                page_size (int): Number of articles wanted.
+
+            Returns:
+                articles (list[dict]): The articles, in NewsAPI's order.
+        """
+        per_page = min(page_size, self.max_page_size)
+        first = self.get({**params, "pageSize": per_page, "page": 1})
+        articles = first["articles"]
+        available = min(page_size, first.get("totalResults", len(articles)))
+        pages = math.ceil(available / per_page)
+        if pages > 1:
+            with ThreadPoolExecutor(max_workers=min(self.workers, pages - 1)) as pool:
+                for page in pool.map(lambda number: self.get(
+                        {**params, "pageSize": per_page, "page": number}), range(2, pages + 1)):
+                    articles.extend(page["articles"])
+        return articles[:page_size]
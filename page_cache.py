@@ -0,0 +1,72 @@
+"""
+Module providing a versioned cache of rendered dashboard pages.
+"""
+import hashlib
+import logging
+from threading import Lock
+from typing import Optional, Tuple, Union
+
+
+class PageCache:
+    """
+    Holds rendered pages and encoded JSON responses for the current data version.
+    Bumping the version, whenever covid data, news articles or update toasts change,
+    drops every cached page so the next request renders fresh.
+
+        Attributes:
+            version (int): Counter incremented on every data change.
+    """
+
+    def __init__(self) -> None:
+        self.version = 0
+        self._pages = {}
+        self._lock = Lock()
+
+    def bump(self, reason: str) -> int:
+        """
+        Increments the data version and drops all cached pages.
+
+            Parameters:
+                reason (str): What changed, for the log.
+
+            Returns:
+                version (int): The new data version.
+        """
+        with self._lock:
+            self.version += 1
+            self._pages.clear()
+        logging.info(f"Dashboard page cache invalidated: {reason}")
+        return self.version
+
+    def get(self, key: str) -> Optional[Tuple[str, Union[str, bytes]]]:
+        """
+        Returns a cached page for the current version.
+
+            Parameters:
+                key (str): Identifies the page variant, i.e. the requested area.
+
+            Returns:
+                etag, body (Tuple[str, str]): The page's ETag and HTML (or encoded JSON),
+                    or None if it has not been rendered since the last change.
+        """
+        return self._pages.get(key)
+
+    def put(self, key: str, body: Union[str, bytes], version: int) -> str:
+        """
+        Caches a rendered page, unless the data changed while it was being rendered.
+
+            Parameters:
+                key (str): Identifies the page variant, i.e. the requested area.
+                body (str): The rendered HTML, or an encoded JSON body.
+                version (int): The data version the page was rendered from.
+
+            Returns:
+                etag (str): The page's ETag.
+        """
+        raw = body if isinstance(body, bytes) else body.encode("utf-8")
+        digest = hashlib.sha1(raw).hexdigest()[:16]
+        etag = f"{version}-{digest}"
+        with self._lock:
+            if version == self.version:
+                self._pages[key] = (etag, body)
+        return etag
@@ -0,0 +1,219 @@
+"""
+Module providing opt-in profiling of single requests and scheduled jobs.
+"""
+import cProfile
+import itertools
+import json
+import logging
+import os
+import pstats
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from threading import Event, Lock, Thread, get_ident
+from typing import Iterator, Optional
+
+PROFILE_FILES = {"json": "application/json", "folded": "text/plain",
+                 "prof": "application/octet-stream"}
+
+
+def frame_name(code) -> str:
+    """
+    Names a code object as "function (file.py:line)".
+    """
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Profile:
+    """
+    A running profile of one thread. cProfile records every call made by the thread
+    while a sampling thread records its whole stack every interval, which gives
+    the collapsed stacks flame graph tools read.
+
+        Attributes:
+            profile_id (str): Unique id, used for the profile's file names.
+            label (str): What was profiled, i.e. "GET /index" or "job news Daily".
+            started_at (float): Epoch time the profile started.
+    """
+
+    def __init__(self, profile_id: str, label: str, interval: float) -> None:
+        self.profile_id = profile_id
+        self.label = label
+        self.started_at = time.time()
+        self.duration = None
+        self.samples = Counter()
+        self._interval = interval
+        self._thread_id = get_ident()
+        self._stopped = Event()
+        self._sampler = Thread(target=self._sample, name=f"profiler-{profile_id}", daemon=True)
+        self._profiler = cProfile.Profile()
+        self._start = time.perf_counter()
+        try:
+            self._profiler.enable()
+        except ValueError:  # Another profiler is active in this thread; sample only
+            self._profiler = None
+        self._sampler.start()
+
+    def _sample(self) -> None:
+        while not self._stopped.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)  # pylint: disable=protected-access
+            stack = []
+            while frame is not None:
+                stack.append(frame_name(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self) -> Optional[cProfile.Profile]:
+        """
+        Stops profiling and returns the cProfile data, if it was recorded.
+        """
+        if self._profiler is not None:
+            self._profiler.disable()
+        self.duration = time.perf_counter() - self._start
+        self._stopped.set()
+        self._sampler.join()
+        return self._profiler
+
+
+class ProfileStore:
+    """
+    Bounded on-disk ring buffer of profiles. Each profile is saved as a JSON summary
+    of its top functions, a collapsed stack file for flame graph tools and the raw
+    pstats data, and only the newest keep profiles are kept. One profile runs at a
+    time; requests and jobs that start while one is running are not profiled.
+
+        Attributes:
+            directory (str): Directory the profiles are written to.
+            keep (int): Number of profiles kept.
+            top (int): Number of hottest functions listed in each summary.
+            interval (float): Seconds between stack samples.
+    """
+
+    def __init__(self, directory: str, keep: int = 20, top: int = 30,
+                 interval: float = 0.005) -> None:
+        self.directory = directory
+        self.keep = keep
+        self.top = top
+        self.interval = interval
+        self._ids = itertools.count(1)
+        self._running = Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def start(self, label: str) -> Optional[Profile]:
+        """
+        Starts profiling the calling thread, unless a profile is already running.
+
+            Parameters:
+                label (str): What is being profiled.
+
+            Returns:
+                profile (Profile): The running profile, or None.
+        """
+        if not self._running.acquire(blocking=False):
+            return None
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(self._ids)}"
+        try:
+            return Profile(profile_id, label, self.interval)
+        except Exception:
+            self._running.release()
+            raise
+
+    def finish(self, profile: Profile) -> dict:
+        """
+        Stops a profile, writes its files and drops the oldest profiles beyond keep.
+
+            Parameters:
+                profile (Profile): The running profile.
+
+            Returns:
+                summary (dict): The profile's id, label, duration and top functions.
+        """
+        try:
+            profiler = profile.stop()
+        finally:
+            self._running.release()
+        summary = {"id": profile.profile_id, "label": profile.label,
+                   "started_at": profile.started_at, "duration": profile.duration,
+                   "samples": sum(profile.samples.values()), "top": []}
+        base = os.path.join(self.directory, profile.profile_id)
+        if profiler is not None:
+            stats = pstats.Stats(profiler)
+            stats.dump_stats(f"{base}.prof")
+            hottest = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+            summary["top"] = [{"function": f"{name} ({os.path.basename(file)}:{line})",
+                               "calls": calls, "total_time": total, "cumulative_time": cumulative}
+                              for (file, line, name), (_, calls, total, cumulative, _)
+                              in hottest[:self.top]]
+        with open(f"{base}.folded", "w", encoding="utf-8") as folded:
+            for stack, count in profile.samples.most_common():
+                folded.write(f"{stack} {count}\n")
+        with open(f"{base}.json.tmp", "w", encoding="utf-8") as summary_file:
+            json.dump(summary, summary_file, indent=1)
+        os.replace(f"{base}.json.tmp", f"{base}.json")
+        self._trim()
+        logging.info(f"Profile {profile.profile_id} of {profile.label} saved "
+                     f"({profile.duration:.3f} seconds)")
+        return summary
+
+    @contextmanager
+    def profile(self, label: str) -> Iterator[Optional[Profile]]:
+        """
+        Profiles the block, unless another profile is already running.
+        """
+        profile = self.start(label)
+        try:
+            yield profile
+        finally:
+            if profile is not None:
+                self.finish(profile)
+
+    def _trim(self) -> None:
+        summaries = sorted((name for name in os.listdir(self.directory) if name.endswith(".json")),
+                           key=lambda name: os.path.getmtime(os.path.join(self.directory, name)))
+        for name in summaries[:-self.keep] if self.keep else summaries:
+            for kind in PROFILE_FILES:
+                try:
+                    os.remove(os.path.join(self.directory, f"{name[:-len('.json')]}.{kind}"))
+                except FileNotFoundError:
+                    pass
+
+    def profiles(self) -> list[dict]:
+        """
+        Lists the saved profiles, newest first, without their top functions.
+
+            Parameters:
+                None
+
+            Returns:
+                profiles (list[dict]): Each profile's id, label, start time and duration.
+        """
+        profiles = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                try:
+                    with open(os.path.join(self.directory, name), encoding="utf-8") as summary:
+                        details = json.load(summary)
+                except (OSError, ValueError):
+                    continue  # Removed or being written
+                details.pop("top", None)
+                profiles.append(details)
+        return sorted(profiles, key=lambda details: details["started_at"], reverse=True)
+
+    def path(self, profile_id: str, kind: str) -> Optional[str]:
+        """
+        Returns the path of one of a profile's files, or None if there is no such file.
+
+            Parameters:
+                profile_id (str): The profile's id.
+                kind (str): "json", "folded" or "prof".
+
+            Returns:
+                path (str): The file's path, or None.
+        """
+        if kind not in PROFILE_FILES or not re.fullmatch(r"[\w-]+", profile_id):
+            return None
+        path = os.path.join(self.directory, f"{profile_id}.{kind}")
+        return path if os.path.exists(path) else None
@@ -0,0 +1,232 @@
+"""
+Module providing the background scheduler that runs covid and news updates on time.
+"""
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from threading import Condition, Thread
+from typing import Callable, Optional
+
+
+class Job:
+    """
+    A scheduled call and its progress.
+
+        Attributes:
+            job_id (int): Unique, increasing id of the job.
+            name (str): Human readable name, i.e. the update name.
+            run_at (float): Epoch time the job is due.
+            status (str): "scheduled", "running", "done", "failed" or "cancelled".
+            started_at (float): Epoch time the job started running, or None.
+            finished_at (float): Epoch time the job finished, or None.
+            error (str): The exception raised by a failed job, or None.
+    """
+
+    def __init__(self, job_id: int, name: str, run_at: float, priority: int,
+                 action: Callable, argument: tuple, kwargs: dict) -> None:
+        self.job_id = job_id
+        self.name = name
+        self.run_at = run_at
+        self.priority = priority
+        self.action = action
+        self.argument = argument
+        self.kwargs = kwargs
+        self.status = "scheduled"
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+
+    def __lt__(self, other: "Job") -> bool:
+        return (self.run_at, self.priority, self.job_id) < \
+            (other.run_at, other.priority, other.job_id)
+
+    def to_dict(self) -> dict:
+        """
+        Returns the job's status as a JSON-serialisable dictionary.
+        """
+        return {
+            "id": self.job_id,
+            "name": self.name,
+            "action": getattr(self.action, "__name__", repr(self.action)),
+            "run_at": self.run_at,
+            "status": self.status,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class SchedulerService:
+    """
+    Keeps a queue of jobs ordered by due time. A dedicated thread waits until the
+    next job is due and hands it to a worker pool, so jobs run on time whether or
+    not the dashboard is being visited, and never on a request thread.
+
+    enter() and cancel() mirror sched.scheduler, so it can be used in its place.
+
+        Attributes:
+            name (str): Name of the service, used for its threads.
+            history (deque): The most recently finished jobs.
+    """
+
+    def __init__(self, name: str = "scheduler", workers: int = 4, history: int = 100) -> None:
+        self.name = name
+        self.history = deque(maxlen=history)
+        self._queue = []
+        self._running = {}
+        self._ids = itertools.count(1)
+        self._condition = Condition()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-worker")
+        self._thread = None
+        self._stopped = False
+
+    def start(self) -> None:
+        """
+        Starts the scheduling thread, if it is not already running.
+
+            Parameters:
+                None
+
+            Returns:
+                None
+        """
+        with self._condition:
+            if self._thread is None:
+                self._stopped = False
+                self._thread = Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the scheduling thread. Jobs already running are left to finish.
+
+            Parameters:
+                None
+
+            Returns:
+                None
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def enterabs(self, run_at: float, priority: int, action: Callable, argument: tuple = (),
+                 kwargs: Optional[dict] = None, name: Optional[str] = None) -> Job:
+        """
+        Schedules a job for an absolute epoch time.
+
+            Parameters:
+                run_at (float): Epoch time the job is due.
+                priority (int): Lower runs first among jobs due at the same time.
+                action (Callable): Function to call.
+                argument (tuple): Positional arguments for the function.
+                kwargs (dict): Keyword arguments for the function.
+                name (str): Name shown in the job status, defaulting to the first argument.
+
+            Returns:
+                job (Job): The scheduled job.
+        """
+        if name is None:
+            name = str(argument[0]) if argument else getattr(action, "__name__", "job")
+        job = Job(next(self._ids), name, run_at, priority, action, tuple(argument), kwargs or {})
+        with self._condition:
+            heapq.heappush(self._queue, job)
+            self._condition.notify_all()
+        self.start()
+        return job
+
+    def enter(self, delay: float, priority: int, action: Callable, argument: tuple = (),
+              kwargs: Optional[dict] = None, name: Optional[str] = None) -> Job:
+        """
+        Schedules a job to run after a delay in seconds.
+
+            Parameters:
+                delay (float): Seconds until the job is due.
+                priority (int): Lower runs first among jobs due at the same time.
+                action (Callable): Function to call.
+                argument (tuple): Positional arguments for the function.
+                kwargs (dict): Keyword arguments for the function.
+                name (str): Name shown in the job status, defaulting to the first argument.
+
+            Returns:
+                job (Job): The scheduled job.
+        """
+        return self.enterabs(time.time() + delay, priority, action, argument, kwargs, name)
+
+    def cancel(self, job: Job) -> bool:
+        """
+        Removes a job from the queue, if it has not started yet.
+
+            Parameters:
+                job (Job): The job to cancel.
+
+            Returns:
+                cancelled (bool): Whether or not the job was still queued.
+        """
+        with self._condition:
+            if job.status != "scheduled" or job not in self._queue:
+                return False
+            self._queue.remove(job)
+            heapq.heapify(self._queue)
+            job.status = "cancelled"
+            self.history.append(job)
+            self._condition.notify_all()
+        return True
+
+    def jobs(self) -> list[dict]:
+        """
+        Lists queued, running and recently finished jobs, soonest first.
+
+            Parameters:
+                None
+
+            Returns:
+                jobs (list[dict]): The status of each job.
+        """
+        with self._condition:
+            queued = sorted(self._queue)
+            running = list(self._running.values())
+            finished = list(self.history)
+        return [job.to_dict() for job in running + queued + finished[::-1]]
+
+    def empty(self) -> bool:
+        """
+        Returns whether or not no jobs are queued, as sched.scheduler.empty does.
+        """
+        with self._condition:
+            return not self._queue
+
+    def _run(self) -> None:
+        with self._condition:
+            while not self._stopped:
+                if not self._queue:
+                    self._condition.wait()
+                    continue
+                delay = self._queue[0].run_at - time.time()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                job = heapq.heappop(self._queue)
+                job.status = "running"
+                self._running[job.job_id] = job
+                self._pool.submit(self._execute, job)
+
+    def _execute(self, job: Job) -> None:
+        job.started_at = time.time()
+        try:
+            job.action(*job.argument, **job.kwargs)
+            job.status = "done"
+        except Exception as error:  # pylint: disable=broad-except
+            job.status = "failed"
+            job.error = repr(error)
+            logging.exception(f"Scheduled job {job.name} failed")
+        job.finished_at = time.time()
+        with self._condition:
+            self._running.pop(job.job_id, None)
+            self.history.append(job)
@@ -0,0 +1,203 @@
+"""
+Module providing the SQLite store shared by the coordinator and worker processes.
+"""
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Iterator, Optional
+
+ROLES = ("single", "coordinator", "worker")
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS commands (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    action TEXT NOT NULL,
+    args TEXT NOT NULL,
+    created REAL NOT NULL
+);
+"""
+
+
+def serving_role(configured: str) -> str:
+    """
+    Returns the role of this process, taken from the DASHBOARD_ROLE environment
+        variable if it is set, else from config.json.
+
+        Parameters:
+            configured (str): The serving_role in config.json.
+
+        Returns:
+            role (str): "single", "coordinator" or "worker".
+
+        Raises:
+            ValueError: If the role is not one of these.
+    """
+    role = os.environ.get("DASHBOARD_ROLE", configured)
+    if role not in ROLES:
+        raise ValueError(f"Unknown serving role {role!r}, expected one of {', '.join(ROLES)}")
+    return role
+
+
+class SharedState:
+    """
+    SQLite database in write-ahead logging mode, so worker processes read while the
+    coordinator writes. It holds three tables:
+
+    state: the latest published value of each kind of data, i.e. "metrics",
+    "articles" and "toasts", with a version that goes up whenever it changes, so
+    workers poll the versions and only read what changed.
+    events: the changes to relay to each worker's open dashboards, oldest dropped
+    once there are more than keep_events.
+    commands: actions taken on a worker, i.e. scheduling an update, for the
+    coordinator to carry out.
+
+        Attributes:
+            filename (str): SQLite database file.
+            keep_events (int): Number of events kept for workers to relay.
+    """
+
+    def __init__(self, filename: str, keep_events: int = 500) -> None:
+        self.filename = filename
+        self.keep_events = keep_events
+        self._published = {}
+        self._lock = Lock()
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")  # Persists in the database file
+            connection.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.filename, timeout=10)
+        try:
+            connection.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL, fewer fsyncs
+            with connection:  # Commits on success, rolls back on error
+                yield connection
+        finally:
+            connection.close()
+
+    def publish(self, key: str, value: object) -> Optional[int]:
+        """
+        Stores the latest value of a kind of data, unless it is unchanged since this
+            process last published it.
+
+            Parameters:
+                key (str): The kind of data, i.e. "metrics".
+                value (object): JSON-serialisable data.
+
+            Returns:
+                version (int): The new version, or None if the value was unchanged.
+        """
+        raw = json.dumps(value, sort_keys=True, default=str)
+        with self._lock:
+            if self._published.get(key) == raw:
+                return None
+            with self._connect() as connection:
+                connection.execute(
+                    "INSERT INTO state (key, version, value) VALUES (?, 1, ?) ON CONFLICT(key) "
+                    "DO UPDATE SET version = version + 1, value = excluded.value", (key, raw))
+                version, = connection.execute(
+                    "SELECT version FROM state WHERE key = ?", (key,)).fetchone()
+            self._published[key] = raw
+        return version
+
+    def versions(self) -> dict:
+        """
+        Returns the current version of every published kind of data.
+        """
+        with self._connect() as connection:
+            return dict(connection.execute("SELECT key, version FROM state").fetchall())
+
+    def read(self, key: str) -> Optional[tuple[int, object]]:
+        """
+        Returns the version and value of a kind of data, or None if it has not been published.
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT version, value FROM state WHERE key = ?", (key,)).fetchone()
+        return None if row is None else (row[0], json.loads(row[1]))
+
+    def append_event(self, event: str, data: object) -> int:
+        """
+        Records a change for the workers to relay to their open dashboards.
+
+            Parameters:
+                event (str): The event type, i.e. "metrics", "articles" or "toasts".
+                data (object): JSON-serialisable event data.
+
+            Returns:
+                event_id (int): The id of the recorded event.
+        """
+        with self._lock, self._connect() as connection:
+            event_id = connection.execute("INSERT INTO events (event, data) VALUES (?, ?)",
+                                          (event, json.dumps(data, default=str))).lastrowid
+            connection.execute("DELETE FROM events WHERE id <= ?", (event_id - self.keep_events,))
+        return event_id
+
+    def last_event_id(self) -> int:
+        """
+        Returns the id of the newest event, or 0 if there are none.
+        """
+        with self._connect() as connection:
+            return connection.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+
+    def events_after(self, last_id: int) -> list[tuple[int, str, object]]:
+        """
+        Returns the events newer than last_id, oldest first.
+
+            Parameters:
+                last_id (int): Id of the last event already relayed.
+
+            Returns:
+                events (list[tuple[int, str, object]]): Each event's id, type and data.
+        """
+        with self._connect() as connection:
+            rows = connection.execute("SELECT id, event, data FROM events WHERE id > ? ORDER BY id",
+                                      (last_id,)).fetchall()
+        return [(event_id, event, json.loads(data)) for event_id, event, data in rows]
+
+    def send(self, action: str, args: dict) -> int:
+        """
+        Queues an action for the coordinator.
+
+            Parameters:
+                action (str): What to do, i.e. "index" for a dashboard form submission.
+                args (dict): JSON-serialisable arguments of the action.
+
+            Returns:
+                command_id (int): The id of the queued command.
+        """
+        with self._lock, self._connect() as connection:
+            return connection.execute(
+                "INSERT INTO commands (action, args, created) VALUES (?, ?, ?)",
+                (action, json.dumps(args), time.time())).lastrowid
+
+    def take_commands(self, limit: int = 100) -> list[dict]:
+        """
+        Removes and returns the oldest queued commands, so each is carried out once.
+
+            Parameters:
+                limit (int): Most commands to take.
+
+            Returns:
+                commands (list[dict]): Each command's id, action, args and created time.
+        """
+        with self._lock, self._connect() as connection:
+            rows = connection.execute(
+                "SELECT id, action, args, created FROM commands ORDER BY id LIMIT ?",
+                (limit,)).fetchall()
+            if rows:
+                connection.execute("DELETE FROM commands WHERE id <= ?", (rows[-1][0],))
+        return [{"id": command_id, "action": action, "args": json.loads(args), "created": created}
+                for command_id, action, args, created in rows]
@@ -0,0 +1,105 @@
+"""
+Module providing single-flight coalescing of covid and news refreshes.
+"""
+import logging
+import time
+from threading import Event, Lock
+from typing import Any, Callable
+
+
+class Flight:
+    """
+    One in-progress call, which every caller asking for the same key waits on.
+    """
+
+    def __init__(self) -> None:
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs at most one refresh per key at a time. Callers that ask for a key while its
+    refresh is running wait for it and share its result, and a result is reused for
+    min_interval seconds after it finished, so a burst of updates scheduled for the
+    same minute downloads the data once. Failed refreshes are never reused.
+
+        Attributes:
+            name (str): The data source, i.e. "covid" or "news", for the log.
+            min_interval (float): Seconds a finished refresh's result is reused for.
+            fetches (int): Number of refreshes actually run.
+            coalesced (int): Number of calls that waited on a refresh already running.
+            reused (int): Number of calls answered by a refresh that had just finished.
+    """
+
+    def __init__(self, name: str, min_interval: float = 0.0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.name = name
+        self.min_interval = min_interval
+        self.fetches = 0
+        self.coalesced = 0
+        self.reused = 0
+        self._clock = clock
+        self._flights = {}
+        self._results = {}
+        self._lock = Lock()
+
+    def do(self, key: str, function: Callable, *args) -> Any:
+        """
+        Returns function(*args), sharing a running or recently finished call for the key.
+
+            Parameters:
+                key (str): Identifies the data being refreshed.
+                function (Callable): The refresh to run.
+                args: Arguments for the refresh.
+
+            Returns:
+                result (Any): The refresh's result.
+        """
+        with self._lock:
+            finished = self._results.get(key)
+            if finished is not None and self._clock() - finished[0] < self.min_interval:
+                self.reused += 1
+                logging.info(f"{self.name} refresh {key} reused a result from "
+                             f"{self._clock() - finished[0]:.0f} seconds ago")
+                return finished[1]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight()
+                self.fetches += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            logging.info(f"{self.name} refresh {key} joined one already running")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = function(*args)
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.error is None:
+                    self._results[key] = (self._clock(), flight.result)
+            flight.done.set()
+        return flight.result
+
+    def stats(self) -> dict:
+        """
+        Returns how many refreshes were run and how many were saved.
+
+            Parameters:
+                None
+
+            Returns:
+                stats (dict): The fetches, coalesced, reused and saved counts.
+        """
+        with self._lock:
+            return {"fetches": self.fetches, "coalesced": self.coalesced,
+                    "reused": self.reused, "saved": self.coalesced + self.reused}
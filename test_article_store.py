@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+from article_store import ArticleStore
+
+articles = [
+    {"title": "1", "content": "1", "url": "https://example.com/1"},
+    {"title": "2", "content": "2", "url": "https://example.com/2"},
+]
+
+def test_article_store_batches_writes():
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "news_articles.json")
+        store = ArticleStore(filename, flush_delay=60)
+        store.replace(articles)
+        store.remove("1")
+        assert not os.path.exists(filename)  # Nothing written until the flush
+        store.flush()
+        with open(filename, encoding="utf-8") as arts:
+            assert json.load(arts) == articles[1:]
+        assert os.listdir(directory) == ["news_articles.json"]
+
+def test_article_store_lookup():
+    with tempfile.TemporaryDirectory() as directory:
+        store = ArticleStore(os.path.join(directory, "news_articles.json"))
+        store.replace(articles)
+        assert store.get(url="https://example.com/2")["title"] == "2"
+        store.articles()[0]["title"] = "changed"
+        assert [article["title"] for article in store.articles()] == ["1", "2"]
+        assert not store.remove("3")
+        store.flush()
+
+def test_article_store_merge():
+    def article(minute):
+        return {"title": str(minute), "content": "", "url": f"https://example.com/{minute}",
+                "publishedAt": f"2021-10-28T12:{minute:02d}:00Z"}
+    with tempfile.TemporaryDirectory() as directory:
+        store = ArticleStore(os.path.join(directory, "news_articles.json"))
+        assert store.latest_published() is None
+        store.replace([article(30), article(20), article(10)])
+        assert store.latest_published() == "2021-10-28T12:30:00Z"
+        # The boundary article is returned again by NewsAPI and must not be duplicated.
+        assert store.merge([article(50), article(40), article(30)],
+                           "2021-10-28T12:15:00Z", 10) == 2
+        assert [a["title"] for a in store.articles()] == ["50", "40", "30", "20"]
+        store.merge([article(55)], "2021-10-28T12:00:00Z", 3)
+        assert [a["title"] for a in store.articles()] == ["55", "50", "40"]
+        assert store.get(url="https://example.com/20") is None
+        store.flush()
+
+def test_article_store_merge_undated():
+    with tempfile.TemporaryDirectory() as directory:
+        store = ArticleStore(os.path.join(directory, "news_articles.json"))
+        store.replace([{"title": "old", "content": "", "url": "https://example.com/old",
+                        "publishedAt": "2021-10-28T12:00:00Z"}])
+        # NewsAPI may return no publishedAt, which the fetch stores as None.
+        assert store.merge([{"title": "undated", "content": "", "url": "https://example.com/u",
+                             "publishedAt": None},
+                            {"title": "missing", "content": "", "url": "https://example.com/m"}],
+                           "2021-10-28T13:00:00Z", 10) == 2
+        assert [a["title"] for a in store.articles()] == ["undated", "missing"]
+        store.merge([], "2021-10-29T00:00:00Z", 1)
+        assert [a["title"] for a in store.articles()] == ["undated"]
+        store.flush()
+
+test_article_store_batches_writes()
+test_article_store_lookup()
+test_article_store_merge()
+test_article_store_merge_undated()
@@ -0,0 +1,16 @@
+from benchmarks.suite import find_regressions
+
+def test_find_regressions():
+    history = [{"results": {"parse_csv_data": seconds, "route_index_cached": 0.001}}
+               for seconds in (0.010, 0.011, 0.030, 0.009, 0.010)]
+    results = {"parse_csv_data": 0.0125, "route_index_cached": 0.0011, "new_benchmark": 1.0}
+    assert find_regressions(history, results, 0.2) == \
+        {"parse_csv_data": {"baseline": 0.010, "seconds": 0.0125}}
+    assert find_regressions([], results, 0.2) == {}
+    results = {"process_covid_csv_data": 0.003, "process_covid_csv_data_baseline": 0.002}
+    assert find_regressions([], results, 0.2) == {}
+    results["process_covid_csv_data"] = 0.05
+    assert find_regressions([], results, 0.2) == \
+        {"process_covid_csv_data": {"baseline": 0.002, "seconds": 0.05}}
+
+test_find_regressions()
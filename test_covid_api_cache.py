@@ -0,0 +1,80 @@
+import tempfile
+from datetime import timedelta
+from threading import Thread
+from covid_api_cache import CovidSnapshotCache
+from benchmarks.fake_apis import FakeCov19API
+
+structure = {"date": "date", "Hospital Cases": "hospitalCases"}
+filters = ["areaType=nation", "areaName=England"]
+
+def test_cache_hit():
+    fake_api = FakeCov19API(days=30)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = CovidSnapshotCache(cache_dir, 3600, fake_api, today=lambda: fake_api.latest)
+        first = cache.get(filters, structure)
+        assert cache.get(filters, structure) == first
+        assert len(fake_api.calls) == 1
+        assert cache.stats["hits"] == 1
+
+def test_cache_persists_to_disk():
+    fake_api = FakeCov19API(days=30)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        CovidSnapshotCache(cache_dir, 3600, fake_api).get(filters, structure)
+        restarted = CovidSnapshotCache(cache_dir, 3600, fake_api)
+        assert len(restarted.get(filters, structure)["data"]) == 30
+        assert len(fake_api.calls) == 1
+
+def test_cache_merges_new_days():
+    fake_api = FakeCov19API(days=30)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = CovidSnapshotCache(cache_dir, 0, fake_api, today=lambda: fake_api.latest)
+        cache.get(filters, structure)
+        fake_api.latest += timedelta(2)
+        data = cache.get(filters, structure)["data"]
+        assert cache.stats["merges"] == 1
+        assert data[0]["date"] == fake_api.latest.isoformat()
+        assert len(data) == 32
+        # Only the overlap and new days were requested, in one date-range request
+        assert fake_api.calls[1:] == [filters + ["date>2021-10-25"]]
+
+def test_cache_refetches_after_large_gap():
+    fake_api = FakeCov19API(days=30)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = CovidSnapshotCache(cache_dir, 0, fake_api, max_gap_days=3,
+                                   today=lambda: fake_api.latest)
+        cache.get(filters, structure)
+        fake_api.latest += timedelta(10)
+        cache.get(filters, structure)
+        assert cache.stats["misses"] == 2
+
+def test_cache_checks_last_update():
+    fake_api = FakeCov19API(days=30)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = CovidSnapshotCache(cache_dir, 0, fake_api, today=lambda: fake_api.latest,
+                                   validator=fake_api.last_update)
+        cache.get(filters, structure)
+        cache.get(filters, structure)
+        assert cache.stats["not_modified"] == 1
+        assert len(fake_api.calls) == 1
+        fake_api.latest += timedelta(1)
+        assert len(cache.get(filters, structure)["data"]) == 31
+        assert fake_api.heads == 3
+
+def test_cache_single_flight():
+    fake_api = FakeCov19API(days=30, latency=0.2)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = CovidSnapshotCache(cache_dir, 3600, fake_api)
+        threads = [Thread(target=cache.get, args=(filters, structure)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(fake_api.calls) == 1
+        assert cache.stats["misses"] == 1
+
+test_cache_hit()
+test_cache_persists_to_disk()
+test_cache_merges_new_days()
+test_cache_refetches_after_large_gap()
+test_cache_checks_last_update()
+test_cache_single_flight()
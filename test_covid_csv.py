@@ -0,0 +1,43 @@
+import os
+import tempfile
+from covid_csv import CovidColumns, load_covid_columns, summarise_covid_columns
+from covid_csv import stream_covid_csv_data, summarise_covid_rows
+from benchmarks.generators import write_nation_csv
+
+def test_load_covid_columns():
+    columns = load_covid_columns('nation_2021-10-28.csv')
+    assert columns.length == 638
+    assert summarise_covid_columns(columns) == (240_299, 7_019, 141_544)
+
+def test_first_non_null():
+    rows = [["hospitalCases"], [""], [""], ["5"], ["6"]]
+    columns = CovidColumns.from_rows(rows, ("hospitalCases",))
+    assert columns.first_non_null("hospitalCases") == 2
+    assert columns.latest("hospitalCases") == 5
+    assert columns.window_sum("hospitalCases", 0, 4) == 11
+
+def test_empty_column():
+    rows = [["hospitalCases", "newCasesBySpecimenDate"], ["", "3"], ["", "4"], ["", "5"]]
+    columns = CovidColumns.from_rows(rows, ("hospitalCases", "newCasesBySpecimenDate"))
+    assert columns.first_non_null("hospitalCases") is None
+    assert columns.latest("hospitalCases") is None
+    assert columns.latest("newCasesBySpecimenDate") == 3
+    rows = [["cumDailyNsoDeathsByDeathDate", "hospitalCases", "newCasesBySpecimenDate"],
+            ["", "", ""], ["", "7", ""], ["", "8", ""]]
+    assert summarise_covid_columns(CovidColumns.from_rows(rows)) == (0, 7, None)
+    assert summarise_covid_rows(rows) == (0, 7, None)
+
+def test_stream_covid_csv_data():
+    assert stream_covid_csv_data('nation_2021-10-28.csv') == (240_299, 7_019, 141_544)
+
+def test_stream_matches_columns_gzip():
+    with tempfile.TemporaryDirectory() as directory:
+        csv_filename = write_nation_csv(os.path.join(directory, "nation.csv.gz"), 1000)
+        expected = summarise_covid_columns(load_covid_columns(csv_filename))
+        assert stream_covid_csv_data(csv_filename) == expected
+
+test_load_covid_columns()
+test_first_non_null()
+test_empty_column()
+test_stream_covid_csv_data()
+test_stream_matches_columns_gzip()
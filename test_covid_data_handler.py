@@ -2,6 +2,11 @@ from covid_data_handler import parse_csv_data
 from covid_data_handler import process_covid_csv_data
 from covid_data_handler import covid_API_request
 from covid_data_handler import schedule_covid_updates
+from covid_data_handler import historical_covid_metrics
+import os
+import tempfile
+import covid_data_handler
+from covid_timeseries_store import CovidTimeSeriesStore
 
 def test_parse_csv_data():
     data = parse_csv_data('nation_2021-10-28.csv')
@@ -15,6 +20,48 @@ def test_process_covid_csv_data():
     assert current_hospital_cases == 7_019
     assert total_deaths == 141_544
 
+def test_historical_covid_metrics():
+    assert historical_covid_metrics('nation_2021-10-28.csv') == (240_299, 7_019, 141_544)
+    store = covid_data_handler.timeseries_store
+    with tempfile.TemporaryDirectory() as directory:
+        covid_data_handler.timeseries_store = CovidTimeSeriesStore(directory)
+        csv_filename = os.path.join(directory, "no_hospital_data.csv")
+        with open(csv_filename, "w", encoding="utf-8") as csv_file:
+            csv_file.write("date,cumDailyNsoDeathsByDeathDate,hospitalCases,newCasesBySpecimenDate\n"
+                           "2021-10-02,,,5\n2021-10-01,100,,4\n")
+        try:
+            assert historical_covid_metrics(csv_filename, "Empty") == (4, None, 100)
+        finally:
+            covid_data_handler.timeseries_store = store
+
+def test_fetch_covid_json_timeout():
+    class FakeResponse:
+        def __init__(self, status_code, rows=None):
+            self.status_code = status_code
+            self.headers = {"Last-Modified": "Thu, 28 Oct 2021 15:02:11 GMT"}
+            self.rows = rows
+        def raise_for_status(self):
+            pass
+        def json(self):
+            return {"data": self.rows}
+
+    requested = []
+    def fake_get(url, params, timeout):
+        requested.append((params["page"], timeout))
+        if params["page"] == 1:
+            return FakeResponse(200, [{"date": "2021-10-28"}])
+        return FakeResponse(204)
+
+    get = covid_data_handler.requests.get
+    covid_data_handler.requests.get = fake_get
+    try:
+        data = covid_data_handler.fetch_covid_json(["areaType=nation"], {"date": "date"}, timeout=2)
+    finally:
+        covid_data_handler.requests.get = get
+    assert requested == [(1, 2), (2, 2)]
+    assert data["data"] == [{"date": "2021-10-28"}]
+    assert data["lastUpdate"] == "2021-10-28T15:02:11.000000Z"
+
 def test_covid_API_request():
     data = covid_API_request()
     assert isinstance(data, dict)
@@ -24,5 +71,7 @@ def test_schedule_covid_updates():
 
 test_parse_csv_data()
 test_process_covid_csv_data()
+test_historical_covid_metrics()
+test_fetch_covid_json_timeout()
 test_covid_API_request()
 test_schedule_covid_updates()
\ No newline at end of file
@@ -0,0 +1,57 @@
+import csv
+from covid_metrics_index import CovidMetricsIndex, FirstNonNullIndex
+from benchmarks.fake_apis import FakeCov19API
+
+structure = {
+    "date": "date",
+    "areaName": "areaName",
+    "areaCode": "areaCode",
+    "National 7-Day Infection Rate": "newCasesByPublishDateRollingSum",
+    "Hospital Cases": "hospitalCases",
+    "Total Deaths": "cumDeaths28DaysByDeathDate",
+}
+
+def test_first_non_null_index_api():
+    data = {"data": [{"a": None, "b": None}, {"a": 1, "b": None}, {"a": 2, "b": 3}]}
+    index = FirstNonNullIndex.from_api(data)
+    assert index.index("a") == 1
+    assert index.value("b") == 3
+
+def test_first_non_null_index_shared():
+    data = {"data": [{"a": None}, {"a": 1}]}
+    index = FirstNonNullIndex.for_response(data, ["a"])
+    assert FirstNonNullIndex.for_response(data, ["a"]) is index
+    assert FirstNonNullIndex.for_response({"data": [{"a": 2}]}, ["a"]).index("a") == 0
+    # Only the latest response is kept, so the first is indexed afresh
+    assert FirstNonNullIndex.for_response(data, ["a"]) is not index
+
+def test_first_non_null_index_csv():
+    with open('nation_2021-10-28.csv', newline='', encoding='utf-8') as csv_file:
+        rows = list(csv.reader(csv_file))
+    index = FirstNonNullIndex.from_csv(rows, [4, 5, 6])
+    assert index.index(5) == 1
+    assert index.value(4) == "141544"
+    assert index.index(6) == 2
+
+def test_metrics_index_lookup():
+    index = CovidMetricsIndex(window=7)
+    data = FakeCov19API(days=60)([], structure)
+    data["data"][0]["Hospital Cases"] = None
+    index.update(data)
+    area = index.get("england")
+    assert area is index.get("E92000001")
+    assert area.hospital_cases == data["data"][1]["Hospital Cases"]
+    assert area.total_deaths == data["data"][0]["Total Deaths"]
+    assert len(area.history) == 7
+    assert index.area_names() == ["England"]
+    assert index.summary()["e92000001"] == {"name": "England",
+                                           "infection_rate": area.infection_rate}
+
+def test_metrics_index_unknown_area():
+    assert CovidMetricsIndex().get("Exeter") is None
+
+test_metrics_index_lookup()
+test_metrics_index_unknown_area()
+test_first_non_null_index_api()
+test_first_non_null_index_shared()
+test_first_non_null_index_csv()
@@ -0,0 +1,32 @@
+import os
+import tempfile
+from threading import Event
+import covid_data_handler as cdh
+import user_interface as ui
+
+def test_cold_start_without_network():
+    release = Event()
+
+    def unreachable_api():
+        release.wait(5)
+        raise ConnectionError("No network")
+
+    refresh_covid_data, snapshot_file = cdh.refresh_covid_data, cdh.covid_snapshot_file
+    with tempfile.TemporaryDirectory() as directory:
+        cdh.refresh_covid_data = unreachable_api
+        cdh.covid_snapshot_file = os.path.join(directory, "covid_snapshot.json")
+        cdh.covid_metrics.clear()
+        try:
+            assert cdh.hospital_cases is None  # Answered while the fetch is still running
+            client = ui.app.test_client()
+            assert client.get("/").status_code == 200
+            response = client.get("/api/metrics")
+            assert response.status_code == 200
+            assert response.get_json()["hospital_cases"] is None
+            assert cdh.covid_refresher.is_alive()
+        finally:
+            release.set()
+            cdh.covid_refresher.join(5)
+            cdh.refresh_covid_data, cdh.covid_snapshot_file = refresh_covid_data, snapshot_file
+
+test_cold_start_without_network()
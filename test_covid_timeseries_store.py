@@ -0,0 +1,24 @@
+import tempfile
+from covid_timeseries_store import CovidTimeSeriesStore
+
+def test_store_csv():
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = CovidTimeSeriesStore(store_dir)
+        store.write_csv("England", 'nation_2021-10-28.csv')
+        assert store.latest("England", "hospitalCases") == ("2021-10-28", 7_019)
+        assert store.latest("England", "deaths")[1] == 141_544
+        assert store.window_sum("England", "cases", 7, skip=1) == 240_299
+
+def test_store_rewrite_and_gaps():
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = CovidTimeSeriesStore(store_dir)
+        store.write("Exeter", [("2021-10-01", {"cases": 1}), ("2021-10-03", {"cases": 3})])
+        assert store.series("Exeter").days == 3
+        assert store.window_sum("Exeter", "cases", 3) == 4
+        store.write("Exeter", [("2021-10-04", {"cases": 5, "deaths": 2})])
+        assert store.latest("Exeter", "cases") == ("2021-10-04", 5)
+        assert store.latest("Exeter", "rollingCases") is None
+        assert store.series("Plymouth") is None
+
+test_store_csv()
+test_store_rewrite_and_gaps()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+from deleted_articles_index import BloomFilter, DeletedArticleIndex, key_hash
+
+articles = [
+    {"title": "BBC - Covid cases rise", "url": "https://bbc.co.uk/1"},
+    {"title": "BBC - Covid cases fall", "url": "https://bbc.co.uk/2"},
+    {"title": "ITV - Vaccine update", "url": "https://itv.com/3"},
+]
+
+def test_deleted_index_filter():
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "deleted_articles.txt")
+        with open(filename, "w", encoding="utf-8") as file:
+            file.write("bbc -  covid cases RISE\n")
+        index = DeletedArticleIndex(filename)
+        # Every deleted article is removed, not just every other one
+        index.add("ITV - Vaccine update")
+        assert index.filter(articles) == articles[1:2]
+
+def test_deleted_index_url_survives_restart():
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "deleted_articles.txt")
+        DeletedArticleIndex(filename).add("Old title", "https://bbc.co.uk/2")
+        assert articles[1] in DeletedArticleIndex(filename)
+
+def test_deleted_index_bloom():
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "deleted_articles.txt")
+        index = DeletedArticleIndex(filename, bloom_threshold=2)
+        for article in articles:
+            index.add(article["title"])
+        assert index.filter(articles) == []
+        assert {"title": "Something else"} not in index
+    bloom = BloomFilter(1000)
+    bloom.add(key_hash("a"))
+    assert key_hash("a") in bloom
+
+def test_deleted_index_bloom_grows():
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "deleted_articles.txt")
+        index = DeletedArticleIndex(filename, bloom_threshold=2)
+        titles = [f"Article {number}" for number in range(100)]
+        for title in titles:
+            index.add(title)
+        assert index._bloom.capacity >= len(titles)
+        assert all({"title": title} in index for title in titles)
+        assert DeletedArticleIndex(filename, bloom_threshold=2)._bloom.capacity >= len(titles)
+
+test_deleted_index_filter()
+test_deleted_index_url_survives_restart()
+test_deleted_index_bloom()
+test_deleted_index_bloom_grows()
@@ -0,0 +1,32 @@
+from threading import Timer
+from event_bus import EventBus
+
+def test_event_bus_stream():
+    bus = EventBus(history=2)
+    bus.publish("toasts", [])  # Published before the client connected
+    stream = bus.stream(heartbeat=0.05)
+    assert next(stream) == "retry: 5000\n\n"
+    assert next(stream) == ": keep-alive\n\n"
+    Timer(0.01, bus.publish, ("metrics", {"hospital_cases": 5})).start()
+    assert next(stream) == 'id: 2\nevent: metrics\ndata: {"hospital_cases":5}\n\n'
+
+def test_event_bus_replays_missed_events():
+    bus = EventBus(history=2)
+    for number in range(3):
+        bus.publish("articles", {"added": number})
+    missed = bus.wait(1, 0)
+    assert [event_id for event_id, _ in missed] == [2, 3]
+    stream = bus.stream(last_id=2)
+    next(stream)
+    assert next(stream).startswith("id: 3\n")
+
+def test_event_bus_relayed_ids_and_duration():
+    bus = EventBus()
+    assert bus.publish("toasts", [], event_id=41) == 41
+    assert bus.last_id == 41
+    stream = bus.stream(last_id=40, heartbeat=0.05, duration=0.1)
+    assert list(stream)[1].startswith("id: 41\n")  # Ends once the duration has passed
+
+test_event_bus_stream()
+test_event_bus_replays_missed_events()
+test_event_bus_relayed_ids_and_duration()
@@ -0,0 +1,40 @@
+import os
+import tempfile
+from benchmarks.fake_apis import FakeNewsAPIServer
+from http_cache import HttpCache
+from news_client import NewsClient
+
+def test_http_cache_serves_not_modified():
+    with tempfile.TemporaryDirectory() as cache_dir, FakeNewsAPIServer(total=20, etags=True) as server:
+        client = NewsClient("key", url=server.url, cache=HttpCache(cache_dir))
+        first = client.everything({"q": "(Covid)"}, 10)
+        assert client.everything({"q": "(Covid)"}, 10) == first
+        # A restarted client revalidates with the response stored on disk
+        restarted = NewsClient("key", url=server.url, cache=HttpCache(cache_dir))
+        assert restarted.everything({"q": "(Covid)"}, 10) == first
+        assert restarted.cache.stats() == {"requests": 1, "not_modified": 1, "stored": 0,
+                                           "hit_rate": 1.0}
+        server.total = 25  # The response changes, so it is downloaded again
+        assert client.everything({"q": "(Covid)"}, 10) == first
+        assert client.cache.stats()["stored"] == 2
+
+def test_http_cache_skips_responses_without_validators():
+    with tempfile.TemporaryDirectory() as cache_dir, FakeNewsAPIServer(total=5) as server:
+        client = NewsClient("key", url=server.url, cache=HttpCache(cache_dir))
+        client.everything({"q": "(Covid)"}, 10)
+        client.everything({"q": "(Covid)"}, 10)
+        assert client.cache.stats()["stored"] == 0
+        assert len(server.requests) == 2
+
+def test_http_cache_evicts_oldest():
+    with tempfile.TemporaryDirectory() as cache_dir, FakeNewsAPIServer(total=5, etags=True) as server:
+        client = NewsClient("key", url=server.url, cache=HttpCache(cache_dir, max_entries=2))
+        for start in ("2021-10-28T10:00:00Z", "2021-10-28T11:00:00Z", "2021-10-28T12:00:00Z"):
+            client.everything({"q": "(Covid)", "from": start}, 10)
+        assert len(os.listdir(cache_dir)) == 2
+        assert client.cache.lookup(server.url, {"q": "(Covid)", "from": "2021-10-28T10:00:00Z",
+                                                "pageSize": 10, "page": 1}) is None
+
+test_http_cache_serves_not_modified()
+test_http_cache_skips_responses_without_validators()
+test_http_cache_evicts_oldest()
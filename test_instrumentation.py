@@ -0,0 +1,29 @@
+from instrumentation import Registry
+
+def test_histogram_exposition():
+    registry = Registry(True)
+    fetch = registry.histogram("fetch_seconds", "Fetch time.", buckets=(0.1, 1))
+    failures = registry.counter("failures_total", "Failures.")
+    fetch.observe(0.05, source="covid")
+    fetch.observe(0.5, source="covid")
+    with fetch.time(source="news"):
+        pass
+    failures.inc(kind='a "b"')
+    text = registry.expose()
+    assert 'fetch_seconds_bucket{source="covid",le="0.1"} 1\n' in text
+    assert 'fetch_seconds_bucket{source="covid",le="+Inf"} 2\n' in text
+    assert 'fetch_seconds_sum{source="covid"} 0.55\n' in text
+    assert 'fetch_seconds_count{source="news"} 1\n' in text
+    assert '# TYPE failures_total counter\nfailures_total{kind="a \\"b\\""} 1\n' in text
+
+def test_disabled_registry_leaves_functions_alone():
+    registry = Registry(False)
+    histogram = registry.histogram("calls_seconds", "Calls.")
+    def function():
+        return 1
+    assert registry.timed(histogram)(function) is function
+    histogram.observe(1.0)
+    assert registry.expose() == "# HELP calls_seconds Calls.\n# TYPE calls_seconds histogram\n"
+
+test_histogram_exposition()
+test_disabled_registry_leaves_functions_alone()
@@ -0,0 +1,27 @@
+import os
+import tempfile
+from job_store import JobStore, next_run_time
+
+def test_job_store_survives_reopen():
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "jobs.db")
+        store = JobStore(filename)
+        toast = {"title": "Daily", "content": "Covid update", "updateType": "Covid"}
+        daily = store.add("covid", "Daily", 200.0, 86400, toast)
+        once = store.add("news", "Once", 100.0)
+        store.reschedule(daily, 86600.0)
+        jobs = JobStore(filename).load()
+        assert [job["id"] for job in jobs] == [once, daily]
+        assert jobs[1]["run_at"] == 86600.0 and jobs[1]["details"] == toast
+        assert jobs[0]["interval"] is None and jobs[0]["details"] is None
+        store.remove(once)
+        assert [job["name"] for job in store.load()] == ["Daily"]
+
+def test_next_run_time():
+    assert next_run_time(100, 10, 105) == 110
+    assert next_run_time(100, 10, 100) == 110
+    assert next_run_time(100, 10, 135) == 140  # Missed runs are skipped
+    assert next_run_time(100, 10, 50) == 110
+
+test_job_store_survives_reopen()
+test_next_run_time()
@@ -0,0 +1,19 @@
+import gzip
+import json
+import json_encoding
+
+def test_dumps_is_compact():
+    body = json_encoding.dumps({"areaName": "Exeter", "rate": [1, 2]})
+    assert json.loads(body) == {"areaName": "Exeter", "rate": [1, 2]}
+    assert b" " not in body.replace(b"Exeter", b"")
+
+def test_choose_encoding_and_compress():
+    assert json_encoding.choose_encoding("") == "identity"
+    assert json_encoding.choose_encoding("deflate, gzip;q=1.0") == "gzip"
+    assert json_encoding.choose_encoding("gzip;q=0") == "identity"
+    body = json_encoding.dumps([{"title": "Covid"}] * 100)
+    assert gzip.decompress(json_encoding.compress(body, "gzip")) == body
+    assert json_encoding.compress(body, "identity") is body
+
+test_dumps_is_compact()
+test_choose_encoding_and_compress()
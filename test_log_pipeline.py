@@ -0,0 +1,55 @@
+import json
+import logging
+import os
+from queue import SimpleQueue
+from log_pipeline import JsonFormatter, SamplingFilter, StructuredQueueHandler
+
+def make_record(message, level=logging.INFO, lineno=1, **extra):
+    record = logging.LogRecord("root", level, "ui.py", lineno, message, None, None)
+    record.__dict__.update(extra)
+    return record
+
+def test_json_formatter():
+    record = make_record("Scheduled news update Daily finished", update="Daily", duration=0.5)
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["level"] == "INFO"
+    assert entry["message"] == "Scheduled news update Daily finished"
+    assert entry["update"] == "Daily"
+    assert entry["duration"] == 0.5
+    assert "exception" not in entry
+
+def test_sampling_filter():
+    now = [0.0]
+    sampler = SamplingFilter(burst=2, window=10, clock=lambda: now[0])
+    passed = [sampler.filter(make_record("Frequent")) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert sampler.filter(make_record("Other line", lineno=2))
+    assert sampler.filter(make_record("Warning", level=logging.WARNING))
+    now[0] = 10.0
+    record = make_record("Frequent")
+    assert sampler.filter(record)
+    assert record.sampled_out == 3
+    assert sampler.dropped == 3
+
+def test_queue_handler_keeps_fields():
+    records = SimpleQueue()
+    handler = StructuredQueueHandler(records)
+    try:
+        raise ValueError("bad")
+    except ValueError:
+        logger = logging.getLogger("test_log_pipeline")
+        logger.propagate = False
+        logger.addHandler(handler)
+        logger.exception("Refresh %s failed", "covid", extra={"update": "Daily"})
+        logger.removeHandler(handler)
+    queued = records.get_nowait()
+    assert queued.getMessage() == "Refresh covid failed"
+    assert queued.exc_info is None
+    entry = json.loads(JsonFormatter().format(queued))
+    assert entry["update"] == "Daily"
+    assert "ValueError: bad" in entry["exception"]
+    assert os.path.basename(queued.pathname) == "test_log_pipeline.py"
+
+test_json_formatter()
+test_sampling_filter()
+test_queue_handler_keeps_fields()
@@ -0,0 +1,30 @@
+from benchmarks.fake_apis import FakeNewsAPIServer
+from news_client import NewsAPIError, NewsClient
+
+def test_news_client_pages_concurrently():
+    with FakeNewsAPIServer(total=250, latency=0.2) as server:
+        client = NewsClient("key", url=server.url)
+        articles = client.everything({"q": "(Covid)"}, 300)
+    assert [article["title"] for article in articles] == \
+        [f"Covid article {number}" for number in range(250)]
+    assert sorted(int(query["page"]) for query in server.requests) == [1, 2, 3]
+    assert all(query["apiKey"] == "key" for query in server.requests)
+    assert server.max_in_flight == 2  # Pages 2 and 3 were requested together
+
+def test_news_client_retries_with_backoff():
+    delays = []
+    with FakeNewsAPIServer(total=5, failures=2) as server:
+        client = NewsClient("key", url=server.url, backoff=0.5, sleep=delays.append)
+        assert len(client.everything({"q": "(Covid)"}, 50)) == 5
+    assert delays == [0.5, 1.0]
+    with FakeNewsAPIServer(failures=5) as server:
+        client = NewsClient("key", url=server.url, retries=2, sleep=delays.append)
+        try:
+            client.everything({"q": "(Covid)"}, 50)
+            assert False, "Expected NewsAPIError"
+        except NewsAPIError:
+            pass
+        assert len(server.requests) == 3
+
+test_news_client_pages_concurrently()
+test_news_client_retries_with_backoff()
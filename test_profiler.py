@@ -0,0 +1,30 @@
+import json
+import os
+import tempfile
+import time
+from profiler import ProfileStore
+
+def slow_function():
+    end = time.perf_counter() + 0.05
+    while time.perf_counter() < end:
+        pass
+
+def test_profile_store_ring_buffer():
+    with tempfile.TemporaryDirectory() as directory:
+        store = ProfileStore(directory, keep=2, interval=0.001)
+        for number in range(3):
+            with store.profile(f"job news {number}") as profile:
+                assert store.start("overlapping") is None  # One profile at a time
+                slow_function()
+            time.sleep(0.01)  # Distinct modification times
+        profiles = store.profiles()
+        assert [details["label"] for details in profiles] == ["job news 2", "job news 1"]
+        assert len(os.listdir(directory)) == 6
+        with open(store.path(profile.profile_id, "json"), encoding="utf-8") as summary:
+            top = json.load(summary)["top"]
+        assert any("slow_function" in function["function"] for function in top)
+        with open(store.path(profile.profile_id, "folded"), encoding="utf-8") as folded:
+            assert "slow_function (test_profiler.py" in folded.read()
+        assert store.path("../config", "json") is None
+
+test_profile_store_ring_buffer()
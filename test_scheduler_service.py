@@ -0,0 +1,29 @@
+import time
+from threading import Event
+from scheduler_service import SchedulerService
+
+def test_scheduler_runs_in_background():
+    scheduler = SchedulerService("test-scheduler")
+    finished = Event()
+    order = []
+    scheduler.enter(0.2, 1, lambda name: (order.append(name), finished.set()), ("second",))
+    scheduler.enter(0.05, 1, order.append, ("first",))
+    assert finished.wait(2)
+    assert order == ["first", "second"]
+    scheduler.stop()
+
+def test_scheduler_status_and_cancel():
+    scheduler = SchedulerService("test-scheduler")
+    job = scheduler.enter(60, 1, print, ("later",))
+    failing = scheduler.enter(0, 1, lambda: 1 / 0, name="failing")
+    deadline = time.time() + 2
+    while failing.status != "failed" and time.time() < deadline:
+        time.sleep(0.01)
+    assert failing.status == "failed"
+    assert scheduler.cancel(job)
+    statuses = {status["name"]: status["status"] for status in scheduler.jobs()}
+    assert statuses == {"later": "cancelled", "failing": "failed"}
+    scheduler.stop()
+
+test_scheduler_runs_in_background()
+test_scheduler_status_and_cancel()
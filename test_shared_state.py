@@ -0,0 +1,48 @@
+import os
+import tempfile
+from shared_state import SharedState, serving_role
+
+def test_shared_state_publish():
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "shared_state.db")
+        coordinator = SharedState(filename)
+        assert coordinator.publish("toasts", [{"title": "Daily"}]) == 1
+        assert coordinator.publish("toasts", [{"title": "Daily"}]) is None  # Unchanged
+        assert coordinator.publish("toasts", []) == 2
+        worker = SharedState(filename)
+        assert worker.versions() == {"toasts": 2}
+        assert worker.read("toasts") == (2, [])
+        assert worker.read("metrics") is None
+
+def test_shared_state_events_and_commands():
+    with tempfile.TemporaryDirectory() as directory:
+        state = SharedState(os.path.join(directory, "shared_state.db"), keep_events=2)
+        for number in range(3):
+            state.append_event("articles", {"added": number})
+        assert [event_id for event_id, _, _ in state.events_after(0)] == [2, 3]
+        assert state.last_event_id() == 3
+        state.send("index", {"update_item": "Daily"})
+        state.send("index", {"notif": "Headline"})
+        commands = state.take_commands()
+        assert [command["args"] for command in commands] == [
+            {"update_item": "Daily"}, {"notif": "Headline"}]
+        assert state.take_commands() == []
+
+def test_serving_role():
+    os.environ.pop("DASHBOARD_ROLE", None)
+    assert serving_role("single") == "single"
+    os.environ["DASHBOARD_ROLE"] = "worker"
+    try:
+        assert serving_role("single") == "worker"
+    finally:
+        del os.environ["DASHBOARD_ROLE"]
+    try:
+        serving_role("leader")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown role accepted")
+
+test_shared_state_publish()
+test_shared_state_events_and_commands()
+test_serving_role()
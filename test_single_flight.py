@@ -0,0 +1,47 @@
+import time
+from threading import Thread
+from single_flight import SingleFlight
+
+def test_single_flight_coalesces_running_refresh():
+    flight = SingleFlight("covid")
+    calls = []
+    def refresh():
+        calls.append(1)
+        time.sleep(0.2)
+        return len(calls)
+    results = []
+    threads = [Thread(target=lambda: results.append(flight.do("covid", refresh)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [1] * 5 and len(calls) == 1
+    assert flight.stats() == {"fetches": 1, "coalesced": 4, "reused": 0, "saved": 4}
+
+def test_single_flight_min_interval():
+    now = [0.0]
+    flight = SingleFlight("news", 60, clock=lambda: now[0])
+    calls = []
+    def refresh():
+        calls.append(now[0])
+        if now[0] == 200:
+            raise ValueError("API down")
+        return now[0]
+    assert flight.do("news", refresh) == 0
+    now[0] = 30
+    assert flight.do("news", refresh) == 0  # Reused
+    now[0] = 100
+    assert flight.do("news", refresh) == 100
+    now[0] = 200
+    try:
+        flight.do("news", refresh)
+    except ValueError:
+        pass
+    now[0] = 210
+    assert flight.do("news", refresh) == 210  # Failures are not reused
+    assert calls == [0, 100, 200, 210]
+    assert flight.stats()["reused"] == 1
+
+test_single_flight_coalesces_running_refresh()
+test_single_flight_min_interval()
@@ -0,0 +1,25 @@
+from toast_registry import ToastRegistry
+
+def test_toast_registry_order():
+    toasts = ToastRegistry()
+    toasts.add({"title": "Evening", "content": "News update", "updateType": "News"}, 300.0)
+    toasts.add({"title": "Morning", "content": "Covid update", "updateType": "Covid"}, 100.0)
+    toasts.add({"title": "Evening", "content": "Covid update", "updateType": "Covid"}, 200.0)
+    assert len(toasts) == 2
+    assert [toast["title"] for toast in toasts.toasts()] == ["Morning", "Evening"]
+    assert toasts.get("Evening")["content"] == "Covid update"
+    assert toasts.remove("Morning")
+    assert not toasts.remove("Morning")
+    assert "Morning" not in toasts
+
+def test_toast_registry_expiry():
+    toasts = ToastRegistry()
+    toasts.add({"title": "Daily", "content": "Repeat: News update", "updateType": "News"}, 100.0)
+    assert toasts.reschedule("Daily", 86500.0)
+    assert not toasts.expire("Daily", now=100.0)  # Due again tomorrow
+    assert toasts.expire("Daily", now=86500.0)
+    assert not toasts.reschedule("Daily", 172900.0)
+    assert toasts.toasts() == []
+
+test_toast_registry_order()
+test_toast_registry_expiry()
@@ -2,8 +2,17 @@ from user_interface import schedule_toast_update
 from user_interface import schedule_news_update
 from user_interface import schedule_covid_update
 from user_interface import time_converter
+from user_interface import area_key
 from time import gmtime
+import os
+import tempfile
 from flask import Flask
+import user_interface
+from job_store import JobStore
+
+# Jobs scheduled by the tests are saved to a temporary store, not the real jobs.db
+job_directory = tempfile.TemporaryDirectory()
+user_interface.job_store = JobStore(os.path.join(job_directory.name, "jobs.db"))
 
 def test_schedule_toast_update():
     schedule_toast_update(5,"testUpdate")
@@ -14,6 +23,23 @@ def test_schedule_news_update():
 def test_schedule_covid_update():
     schedule_covid_update(5,"testCovidUpdate",False)
 
+def test_area_key_unknown_area():
+    assert area_key("Nowhere-1234") == ""
+    assert area_key("") == ""
+
+def test_immediate_repeat_keeps_chosen_time():
+    scheduled = []
+    schedule_job, converter = user_interface.schedule_job, user_interface.time_converter
+    user_interface.schedule_job = lambda *args: scheduled.append(args)
+    user_interface.time_converter = lambda update_time: 30
+    try:
+        user_interface.dashboard_action({"two": "Soon", "update": "11:30", "repeat": "repeat",
+                                         "covid-data": "covid-data"})
+    finally:
+        user_interface.schedule_job, user_interface.time_converter = schedule_job, converter
+        user_interface.update_toasts.remove("Soon")
+    assert scheduled == [("covid", "Soon", 30, True)]
+
 def test_time_converter():
     test_time="11:30"
     #Convert 11:30 to seconds
@@ -24,3 +50,5 @@ def test_time_converter():
 test_schedule_toast_update()
 test_schedule_covid_update()
 test_time_converter()
+test_area_key_unknown_area()
+test_immediate_repeat_keeps_chosen_time()
@@ -0,0 +1,129 @@
+"""
+Module providing the registry of scheduled update toasts shown on the dashboard.
+"""
+import time
+from threading import Lock
+from typing import Optional
+
+
+class ToastRegistry:
+    """
+    Thread-safe set of update toasts keyed by update name, so adding, finding and
+    removing a toast take constant time and an update name has at most one toast.
+    Each toast records when its update is due; the dashboard shows them soonest
+    first, from a sorted view rebuilt only after a change.
+
+        Attributes:
+            None
+    """
+
+    def __init__(self) -> None:
+        self._toasts = {}
+        self._view = None
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._toasts)
+
+    def __contains__(self, title: str) -> bool:
+        return title in self._toasts
+
+    def add(self, toast: dict, due: float = None) -> dict:
+        """
+        Adds a toast, replacing any toast for the same update.
+
+            Parameters:
+                toast (dict): The toast's "title" (the update name), "content" and "updateType".
+                due (float): Epoch time the update is due, or None to keep the toast's
+                    own "due" time, if it has one, else now.
+
+            Returns:
+                toast (dict): A copy of the stored toast, including its due time.
+        """
+        toast = dict(toast)
+        if due is not None or "due" not in toast:
+            toast["due"] = time.time() if due is None else due
+        with self._lock:
+            self._toasts[toast["title"]] = toast
+            self._view = None
+        return dict(toast)
+
+    def get(self, title: str) -> Optional[dict]:
+        """
+        Returns a copy of the toast of an update, or None if it has none.
+        """
+        with self._lock:
+            toast = self._toasts.get(title)
+            return None if toast is None else dict(toast)
+
+    def remove(self, title: str) -> bool:
+        """
+        Removes the toast of an update.
+
+            Parameters:
+                title (str): The update name.
+
+            Returns:
+                removed (bool): Whether or not the update had a toast.
+        """
+        with self._lock:
+            removed = self._toasts.pop(title, None) is not None
+            if removed:
+                self._view = None
+        return removed
+
+    def expire(self, title: str, now: float = None) -> bool:
+        """
+        Removes the toast of an update whose job has finished. A toast due after now
+            belongs to a newer update of the same name, so is kept.
+
+            Parameters:
+                title (str): The update name.
+                now (float): Epoch time the job finished, defaults to the current time.
+
+            Returns:
+                removed (bool): Whether or not a toast was removed.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            toast = self._toasts.get(title)
+            if toast is None or toast["due"] > now:
+                return False
+            del self._toasts[title]
+            self._view = None
+        return True
+
+    def reschedule(self, title: str, due: float) -> bool:
+        """
+        Moves the toast of a repeating update to its next run.
+
+            Parameters:
+                title (str): The update name.
+                due (float): Epoch time of the next run.
+
+            Returns:
+                rescheduled (bool): Whether or not the update had a toast.
+        """
+        with self._lock:
+            toast = self._toasts.get(title)
+            if toast is None:
+                return False
+            self._toasts[title] = dict(toast, due=due)
+            self._view = None
+        return True
+
+    def toasts(self) -> list[dict]:
+        """
+        Returns the toasts ordered by when their updates are due, soonest first.
+
+            Parameters:
+                None
+
+            Returns:
+                toasts (list[dict]): The toasts. The list is a copy, but the toasts in
+                    it are shared and must not be modified.
+        """
+        with self._lock:
+            if self._view is None:
+                self._view = sorted(self._toasts.values(), key=lambda toast: toast["due"])
+            return list(self._view)
@@ -3,28 +3,56 @@ The user_interface module is responsible for handling the rendering
 and displaying of the user interface.
 """
 
-import time
-import sched
 import json
 import logging
-from threading import Event
+import os
+import sqlite3
+import time
 from time import gmtime
-from flask import Flask, render_template, request, redirect, Markup
-import covid_news_handling as cnh
-import covid_data_handler as cdh
-logging.basicConfig(filename="sys.log", level=logging.INFO,
-                    format='%(asctime)s %(message)s')
-logging.info("Application started")
-
-app = Flask(__name__)
-covid_scheduler = sched.scheduler(time.time, time.sleep)
-news_scheduler = sched.scheduler(time.time, time.sleep)
-update_toast_scheduler = sched.scheduler(time.time, time.sleep)
-
-scheduler_updates_toasts = []
+from contextlib import nullcontext
+from threading import Lock, Thread
+from flask import (Flask, Response, render_template, request, redirect, Markup, make_response,
+                   jsonify, g, abort, send_file)
+import json_encoding
+from page_cache import PageCache
+from event_bus import EventBus
+from profiler import PROFILE_FILES, ProfileStore
+from log_pipeline import configure_logging
+from toast_registry import ToastRegistry
+from shared_state import SharedState, serving_role
+from instrumentation import (FUNCTION_SECONDS, JOB_FAILURES, JOB_SECONDS, REQUEST_SECONDS,
+                             registry, timed)
+from scheduler_service import Job, SchedulerService
+from job_store import JobStore, next_run_time
 # Opens config file and reads in and assigns each variable
 with open("config.json", "r", encoding="utf-8") as config:
     json_file = json.load(config)
+# "single" fetches, schedules and serves in one process. "coordinator" fetches and
+# schedules for "worker" processes, which serve from the shared store (see wsgi.py).
+process_role = serving_role(json_file["serving_role"])
+# Logs are queued and written as JSON lines to a rotating file by a background thread.
+# Set up before the handlers are imported, so their first records are written there too.
+# Workers append to the coordinator's file and reopen it after it rotates the file.
+log_listener = configure_logging(json_file["log_file"], json_file["log_max_bytes"],
+                                 json_file["log_backup_count"],
+                                 burst=json_file["log_sample_burst"],
+                                 window=json_file["log_sample_window"],
+                                 rotate=process_role != "worker")
+logging.info("Application started")
+import covid_news_handling as cnh  # pylint: disable=wrong-import-position
+import covid_data_handler as cdh  # pylint: disable=wrong-import-position
+
+app = Flask(__name__)
+# Runs covid, news and toast updates on time in the background, never on a request thread.
+scheduler = SchedulerService("update-scheduler")
+covid_scheduler = news_scheduler = update_toast_scheduler = scheduler
+
+# Toasts of the scheduled updates, keyed by update name; each goes when its job finishes.
+update_toasts = ToastRegistry()
+# Rendered dashboard pages, dropped whenever the data they show changes.
+page_cache = PageCache()
+# Pushes metric, article and toast changes to open dashboards over /events.
+event_bus = EventBus()
 api_key = json_file["news_api"]
 local_location = json_file["local_location"]
 national_location = json_file["national_location"]
@@ -32,192 +60,800 @@ news_API_domains = json_file["news_API_domains"]
 covid_keywords = json_file["covid_terms"]
 num_articles_at_once = json_file["num_articles_at_once"]
 page_size = json_file["page_size"]
+# Scheduled jobs, saved so they survive restarts.
+job_store = JobStore(json_file["job_store_file"])
+REPEAT_INTERVAL = 24*60*60  # Repeating updates run at the same time every day
+# Profiles requests ("header": those sent with an X-Profile header, or "all") and jobs.
+profile_requests = json_file["profile_requests"]
+profile_jobs = json_file["profile_jobs"]
+profile_store = ProfileStore(json_file["profile_dir"], json_file["profile_keep"])
+events_stream_seconds = json_file["events_stream_seconds"]
+# Metrics, articles, toasts, events and worker commands shared between processes.
+shared_state = (SharedState(json_file["shared_state_file"])
+                if process_role != "single" else None)
+shared_poll_interval = json_file["shared_poll_interval"]
+# A worker's copy of the data the coordinator published, by kind, and its versions.
+shared_data = {}
+shared_versions = {}
+shared_event_id = 0
+shared_follower = None
+shared_follower_lock = Lock()
+shared_event_lock = Lock()  # Keeps the coordinator's events in id order
+DASHBOARD_METRICS = ("local_location", "local_7day_infection_rate", "national_location",
+                     "national_7day_infection_rate", "hospital_cases", "national_total_deaths")
 
 @app.route("/")
+@timed(REQUEST_SECONDS, route="/")
 def update_interface():
     """
-    Reads in the latest articles and passes them into the render template,
-    before returning the render template.
+    Returns the dashboard page, rendering it only if the data it shows has changed
+    since it was last rendered. Browsers revalidate with If-None-Match and get a 304
+    when their copy is current.
 
         Parameters:
             None
         Returns:
-            render_template(): Values to pass into the template.
+            response (Response): The dashboard page, or 304 Not Modified.
+    """
+    area_name = area_key(request.args.get("area", ""))
+    cached = page_cache.get(area_name)
+    if cached is None:
+        version = page_cache.version
+        body = render_dashboard(area_name)
+        etag = page_cache.put(area_name, body, version)
+    else:
+        etag, body = cached
+    response = make_response(body)
+    response.set_etag(etag)
+    response.cache_control.no_cache = True  # Always revalidate, so updates show at once
+    return response.make_conditional(request)
+
+
+def area_key(area_name: str) -> str:
+    """
+    Normalises a requested area to the key its pages are cached under: its lowercase
+    name or code if it has been fetched, else "" for the default page it would show,
+    so made-up "area" query values cannot grow the page cache.
+
+        Parameters:
+            area_name (str): Name or code of the requested area.
+        Returns:
+            key (str): The area's page cache key.
+    """
+    key = area_name.strip().lower()
+    if process_role == "worker":
+        known = key in (shared_data.get("metrics") or {}).get("areas", {})
+    else:
+        known = cdh.metrics_index.get(key) is not None
+    return key if known else ""
+
+
+@timed(FUNCTION_SECONDS, function="render_dashboard")
+def render_dashboard(area_name: str) -> str:
+    """
+    Reads in the latest articles and passes them into the render template,
+    before returning the render template. The local metrics shown are those of
+    the "area" query parameter (i.e. /?area=Exeter) when that area has been fetched.
+
+        Parameters:
+            area_name (str): Name or code of the local area to show.
+        Returns:
+            render_template() (str): The rendered dashboard page.
     """
-     # Fetch news articles
-    with open("news_articles.json", encoding="utf-8") as arts:
-        articles = json.load(arts)  # Loads articles from json file
+    articles = current_articles()  # Copies of the stored news articles
     first_news_arts = cnh.first_n_news_articles(
         articles, num_articles_at_once, page_size)  # Returns first n news articles
     for i in first_news_arts:
         # Allows HTML to be treated and executed as HTML, not text.
         i["content"] = Markup(i["content"])
+    metrics = dashboard_metrics(area_name)
     return render_template('index.html',
                            title="Covid Dashboard",
                            favicon="bojo.jpeg",
                            image="covid_logo.jpeg",
                            news_articles=first_news_arts,
-                           updates=scheduler_updates_toasts,
-                           location=cdh.local_location,
-                           local_7day_infections=cdh.local_7day_infection_rate,
-                           nation_location=cdh.national_location,
-                           national_7day_infections=cdh.national_7day_infection_rate,
+                           updates=current_toasts(),
+                           location=metrics["local_location"],
+                           local_7day_infections=metrics["local_7day_infection_rate"],
+                           nation_location=metrics["national_location"],
+                           national_7day_infections=metrics["national_7day_infection_rate"],
                            hospital_cases=(
-                               f"Hospital Cases: {cdh.hospital_cases}"),
-                           deaths_total=(f"Total Deaths: {cdh.national_total_deaths}"))
+                               f"Hospital Cases: {metrics['hospital_cases']}"),
+                           deaths_total=(f"Total Deaths: {metrics['national_total_deaths']}"))
+
+
+def dashboard_metrics(area_name: str) -> dict:
+    """
+    Returns the covid metrics shown on the dashboard, with the local metrics of the
+    requested area when that area has been fetched.
+
+        Parameters:
+            area_name (str): Name or code of the local area to show.
+        Returns:
+            metrics (dict): The local and national locations and metrics.
+    """
+    if process_role == "worker":
+        published = shared_data.get("metrics") or {"dashboard": {}, "areas": {}}
+        metrics = {key: published["dashboard"].get(key) for key in DASHBOARD_METRICS}
+        area = published["areas"].get(area_name.lower())
+        if area is not None:
+            metrics["local_location"] = area["name"]
+            metrics["local_7day_infection_rate"] = area["infection_rate"]
+        return metrics
+    metrics = {
+        "local_location": cdh.local_location,
+        "local_7day_infection_rate": cdh.local_7day_infection_rate,
+        "national_location": cdh.national_location,
+        "national_7day_infection_rate": cdh.national_7day_infection_rate,
+        "hospital_cases": cdh.hospital_cases,
+        "national_total_deaths": cdh.national_total_deaths,
+    }
+    area = cdh.metrics_index.get(area_name)
+    if area is not None:
+        metrics["local_location"] = area.name
+        metrics["local_7day_infection_rate"] = area.infection_rate
+    return metrics
+
+
+def current_articles() -> list[dict]:
+    """
+    Returns copies of the news articles to show: the stored articles, or on a
+    worker those the coordinator last published.
+
+        Parameters:
+            None
+        Returns:
+            articles (list[dict]): The news articles.
+    """
+    if process_role == "worker":
+        return [dict(article) for article in shared_data.get("articles", [])]
+    return cnh.article_store.articles()
+
+
+def current_toasts() -> list[dict]:
+    """
+    Returns the scheduled update toasts to show, soonest first: those in the toast
+    registry, or on a worker those the coordinator last published.
+
+        Parameters:
+            None
+        Returns:
+            toasts (list[dict]): The update toasts.
+    """
+    if process_role == "worker":
+        return shared_data.get("toasts", [])
+    return update_toasts.toasts()
+
+
+@app.route("/api/metrics")
+def api_metrics():
+    """
+    Returns the dashboard's covid metrics as JSON. Like the dashboard, the local
+    metrics are for the "area" query parameter when that area has been fetched.
+
+        Parameters:
+            None
+        Returns:
+            response (Response): The metrics as JSON, or 304 Not Modified.
+    """
+    area_name = area_key(request.args.get("area", ""))
+    return cached_json(f"api/metrics?area={area_name}", lambda: dashboard_metrics(area_name))
+
+
+@app.route("/api/articles")
+def api_articles():
+    """
+    Returns the stored news articles as JSON, in the order they are shown on the dashboard.
+
+        Parameters:
+            None
+        Returns:
+            response (Response): The articles as JSON, or 304 Not Modified.
+    """
+    return cached_json("api/articles", lambda: [
+        {"title": article["title"], "description": article.get("description"),
+         "url": article.get("url"), "publishedAt": article.get("publishedAt")}
+        for article in current_articles()])
+
+
+def cached_json(key: str, build) -> Response:
+    """
+    Serves a JSON API response from the page cache. The data is serialised and
+    compressed once per data version and encoding, so repeated polling only copies
+    the cached bytes, and clients revalidating with their ETag get 304 Not Modified.
+
+        Parameters:
+            key (str): Identifies the response, i.e. the route and its query.
+            build (Callable): Returns the data to serialise.
+        Returns:
+            response (Response): The JSON response, or 304 Not Modified.
+    """
+    encoding = json_encoding.choose_encoding(request.headers.get("Accept-Encoding", ""))
+    cached = page_cache.get(f"{key};{encoding}")
+    if cached is None:
+        version = page_cache.version
+        body = json_encoding.compress(json_encoding.dumps(build()), encoding)
+        etag = page_cache.put(f"{key};{encoding}", body, version)
+    else:
+        etag, body = cached
+    response = make_response(body)
+    response.mimetype = "application/json"
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.set_etag(etag)
+    response.cache_control.no_cache = True  # Always revalidate, so updates show at once
+    return response.make_conditional(request)
 
 
 @app.route("/index", methods=['GET', 'POST'])
+@timed(REQUEST_SECONDS, route="/index")
 def index():
     """
     Main function called when the webpage is accessed.
-    Starts schedulers, and checks to see if the user modifies anythings
-    on the site that requires an action to happen.
-    """
-    covid_scheduler.run(blocking=False)
-    news_scheduler.run(blocking=False)
-    update_toast_scheduler.run(blocking=False)
-    with open("news_articles.json", encoding="utf-8") as arts:
-        articles = json.load(arts)
+    Checks to see if the user modifies anythings on the site that requires
+    an action to happen. Updates due now are handed to the background scheduler.
+    Browsers are redirected back to the dashboard; XMLHttpRequest callers get 204.
+    """
     if request.method == "GET":
-        is_repeating = False
-        # Title of scheduled update to be created.
-        update_title = request.args.get('two')
-        # Title of scheduled update to be deleted.
-        delete_toast = request.args.get('update_item')
-        # Title of the article to be deleted.
-        title = request.args.get('notif')
-        repeating_str = ""
-        if update_title:  # If an update has been submitted via the interface
-            # Gets whether or not the scheduled update includes covid data
-            covid_update = request.args.get('covid-data')
-            # Gets whether or not the scheduled update includes news
-            news_update = request.args.get('news')
-            # Time at which the update will be executed
-            update_time = request.args.get('update')
-            # Gets whether or not the scheduled update is to repeat
-            repeating_update = request.args.get('repeat')
-            if update_time is not None:
-                time_till_update = time_converter(update_time)
-            if repeating_update:
-                repeating_str = "Repeat: "
-                is_repeating = True
-            if covid_update and news_update:  # If update is for both covid and news
-                if time_till_update is None:
-                    time_till_update =0
-                if time_till_update <= 60:  # If update is in 60 seconds or less
-                    cnh.update_news(update_title, is_repeating)
-                    cdh.update_covid_data(update_title, is_repeating)
-                    if is_repeating:
-                        scheduler_updates_toasts.append(
-                            {
-                                "title": f"{update_title}",
-                                "content": f"Repeat Covid and news update scheduled for {update_time}",
-                                "updateType": "Both",
-                            }
-                        )
-                else:
-                    scheduler_updates_toasts.append(
+        if process_role == "worker":
+            # The coordinator schedules updates and changes the data, then publishes it.
+            shared_state.send("index", request.args.to_dict())
+        else:
+            dashboard_action(request.args.to_dict())
+    if request.headers.get("X-Requested-With") == "XMLHttpRequest":
+        # Scripts learn of the change over /events, so a redirect would only render twice.
+        return "", 204
+    return redirect(request.referrer)  # Redirects to '/' url
+
+
+def dashboard_action(args: dict) -> None:
+    """
+    Carries out a dashboard form submission: scheduling an update, deleting a news
+    article or deleting an update toast.
+
+        Parameters:
+            args (dict): The submitted query parameters.
+        Returns:
+            None
+    """
+    is_repeating = False
+    # Title of scheduled update to be created.
+    update_title = args.get('two')
+    # Title of scheduled update to be deleted.
+    delete_toast = args.get('update_item')
+    # Title of the article to be deleted.
+    title = args.get('notif')
+    repeating_str = ""
+    if update_title:  # If an update has been submitted via the interface
+        # Gets whether or not the scheduled update includes covid data
+        covid_update = args.get('covid-data')
+        # Gets whether or not the scheduled update includes news
+        news_update = args.get('news')
+        # Time at which the update will be executed
+        update_time = args.get('update')
+        # Gets whether or not the scheduled update is to repeat
+        repeating_update = args.get('repeat')
+        if update_time is not None:
+            time_till_update = time_converter(update_time)
+        if repeating_update:
+            repeating_str = "Repeat: "
+            is_repeating = True
+        if covid_update and news_update:  # If update is for both covid and news
+            if time_till_update is None:
+                time_till_update =0
+            if time_till_update <= 60:  # If update is in 60 seconds or less
+                if is_repeating:
+                    update_toasts.add(
                         {
                             "title": f"{update_title}",
                             "content": f"Repeat Covid and news update scheduled for {update_time}",
                             "updateType": "Both",
-                        }
+                        }, time.time() + time_till_update
                     )
-                schedule_news_update(
-                    time_till_update, update_title, is_repeating)
-                schedule_covid_update(
-                    time_till_update, update_title, is_repeating)
-                schedule_toast_update(time_till_update, update_title)
-                update_interface()
-            elif news_update:  # If update is for only news
-                if time_till_update is None:
-                    time_till_update =0
-                if time_till_update <= 60:  # If update is in 60 seconds or less
-                    cnh.update_news(update_title, is_repeating)
-                    if is_repeating:
-                        scheduler_updates_toasts.append(
-                            {
-                                "title": f"{update_title}",
-                                "content": f"Repeat Covid update scheduled for {update_time}",
-                                "updateType": "News",
-                            }
-                        )
-                else:
-                    scheduler_updates_toasts.append(
+                # The real delay, under a minute, so repeats keep to the chosen time
+                schedule_job("both", update_title, time_till_update, is_repeating)
+            else:
+                update_toasts.add(
+                    {
+                        "title": f"{update_title}",
+                        "content": f"Repeat Covid and news update scheduled for {update_time}",
+                        "updateType": "Both",
+                    }, time.time() + time_till_update
+                )
+                # One job refreshes both and clears the toast, instead of three.
+                schedule_job("both", update_title, time_till_update, is_repeating)
+        elif news_update:  # If update is for only news
+            if time_till_update is None:
+                time_till_update =0
+            if time_till_update <= 60:  # If update is in 60 seconds or less
+                if is_repeating:
+                    update_toasts.add(
                         {
                             "title": f"{update_title}",
-                            "content": f"{repeating_str}News update scheduled for {update_time}",
+                            "content": f"Repeat Covid update scheduled for {update_time}",
                             "updateType": "News",
-                        }
+                        }, time.time() + time_till_update
                     )
-                    schedule_news_update(
-                        time_till_update, update_title, is_repeating)
-                    schedule_toast_update(time_till_update, update_title)
-                update_interface()
-            elif covid_update:  # If update is for only covid
-                if time_till_update is None:
-                    time_till_update =0
-                if time_till_update <= 60:  # If update is in 60 seconds or less
-                    cdh.update_covid_data(update_title, is_repeating)
-                    if is_repeating:
-                        scheduler_updates_toasts.append(
-                            {
-                                "title": f"{update_title}",
-                                "content": f"Repeat Covid update scheduled for {update_time}",
-                                "updateType": "Covid",
-                            }
-                        )
-                else:
-                    scheduler_updates_toasts.append(
+                schedule_job("news", update_title, time_till_update, is_repeating)
+            else:
+                update_toasts.add(
+                    {
+                        "title": f"{update_title}",
+                        "content": f"{repeating_str}News update scheduled for {update_time}",
+                        "updateType": "News",
+                    }, time.time() + time_till_update
+                )
+                schedule_news_update(
+                    time_till_update, update_title, is_repeating)
+        elif covid_update:  # If update is for only covid
+            if time_till_update is None:
+                time_till_update =0
+            if time_till_update <= 60:  # If update is in 60 seconds or less
+                if is_repeating:
+                    update_toasts.add(
                         {
                             "title": f"{update_title}",
-                            "content": f"{repeating_str}Covid update scheduled for {update_time}",
+                            "content": f"Repeat Covid update scheduled for {update_time}",
                             "updateType": "Covid",
-                        }
+                        }, time.time() + time_till_update
                     )
-                    schedule_covid_update(
-                        time_till_update, update_title, is_repeating)
-                    schedule_toast_update(time_till_update, update_title)
-                update_interface()
-            if time_till_update > 60:  # If update is in more than 60 seconds.
-                logging.info(
-                    f"New scheduled update: {scheduler_updates_toasts[-1]['content']}")
-        elif title:
-            # Removes article just deleted from article list
-            articles = cnh.delete_news_article(articles, title)
-            # Removes deleted articles from articles list
-            articles = cnh.remove_deleted_articles(articles)
-            with open("news_articles.json", 'w', encoding='utf-8') as arts:
-                json.dump(articles, arts)  # Writes articles to json file
-            update_interface()
-        elif delete_toast:
-            delete_update_toasts(delete_toast)
-    return redirect(request.referrer)  # Redirects to '/' url
+                schedule_job("covid", update_title, time_till_update, is_repeating)
+            else:
+                update_toasts.add(
+                    {
+                        "title": f"{update_title}",
+                        "content": f"{repeating_str}Covid update scheduled for {update_time}",
+                        "updateType": "Covid",
+                    }, time.time() + time_till_update
+                )
+                schedule_covid_update(
+                    time_till_update, update_title, is_repeating)
+        invalidate_dashboard(f"update {update_title} scheduled")
+        publish_event("toasts", update_toasts.toasts())
+        if time_till_update > 60:  # If update is in more than 60 seconds.
+            logging.info(
+                f"New scheduled update: {update_toasts.get(update_title)['content']}",
+                extra={"update": update_title, "seconds_until": time_till_update})
+    elif title:
+        # Removes the article from the store and records it as deleted, so it is
+        # filtered out of every later fetch
+        cnh.delete_news_article(cnh.article_store.articles(), title)
+    elif delete_toast:
+        delete_update_toasts(delete_toast)
+
+
+@app.route("/jobs")
+def jobs():
+    """
+    Lists the queued, running and recently finished scheduled updates.
+
+        Parameters:
+            None
+        Returns:
+            jsonify() (Response): The status of each job as JSON.
+    """
+    return jsonify(scheduler.jobs())
+
+
+@app.route("/refreshes")
+def refreshes():
+    """
+    Shows how many covid and news fetches were run, how many were saved by
+    sharing a refresh that was already running or had just finished, and how
+    often the API caches avoided a download.
+
+        Parameters:
+            None
+        Returns:
+            jsonify() (Response): The refresh and cache counts for each source as JSON.
+    """
+    return jsonify({"covid": cdh.covid_refreshes.stats(),
+                    "news": cnh.news_refreshes.stats(),
+                    "covid_cache": dict(cdh.covid_cache.stats),
+                    "news_cache": cnh.news_client.cache.stats()})
+
+
+@app.before_request
+def start_shared_follower() -> None:
+    """
+    On a worker, loads the shared data and starts following it on the first
+    request, so it starts in each worker process rather than before forking.
+    """
+    global shared_follower, shared_event_id  # pylint: disable=global-statement
+    if process_role != "worker" or shared_follower is not None:
+        return
+    with shared_follower_lock:
+        if shared_follower is None:
+            # Replays the newest events into the bus history, so browsers reconnecting
+            # from another worker with Last-Event-ID are sent the events they missed.
+            shared_event_id = max(0, shared_state.last_event_id() - event_bus.history.maxlen)
+            sync_shared_state()
+            shared_follower = Thread(target=follow_shared_state, name="shared-follower",
+                                     daemon=True)
+            shared_follower.start()
+
+
+@app.before_request
+def start_request_timer() -> None:
+    """
+    Notes when the request started, for its log record.
+    """
+    g.request_start = time.perf_counter()
+
+
+@app.before_request
+def start_request_profile() -> None:
+    """
+    Starts profiling the request if profiling is on for every request, or for those
+    sent with an X-Profile header and this one has it.
+    """
+    if request.path.startswith(("/profiles", "/events")):
+        return  # Listing profiles and the event stream are never profiled
+    if profile_requests == "all" or (profile_requests == "header" and request.headers.get("X-Profile")):
+        g.profile = profile_store.start(f"{request.method} {request.full_path.rstrip('?')}")
+
+
+@app.after_request
+def add_profile_id(response: Response) -> Response:
+    """
+    Tells the client which profile was captured for its request.
+    """
+    profile = g.get("profile")
+    if profile is not None:
+        response.headers["X-Profile-Id"] = profile.profile_id
+    return response
+
+
+@app.after_request
+def log_request(response: Response) -> Response:
+    """
+    Logs the request's route, status and how long it took to handle.
+    """
+    duration = time.perf_counter() - g.get("request_start", time.perf_counter())
+    logging.info(f"{request.method} {request.path} {response.status_code}",
+                 extra={"method": request.method, "route": request.path,
+                        "status": response.status_code, "duration": duration})
+    return response
+
+
+@app.teardown_request
+def finish_request_profile(error: Exception = None) -> None:
+    """
+    Stops and saves the request's profile, if it was profiled.
+    """
+    profile = g.pop("profile", None)
+    if profile is not None:
+        profile_store.finish(profile)
+
+
+@app.route("/profiles")
+def profiles():
+    """
+    Lists the saved request and job profiles, newest first.
+
+        Parameters:
+            None
+        Returns:
+            jsonify() (Response): Each profile's id, label, start time and duration as JSON.
+    """
+    if profile_requests == "off" and not profile_jobs:
+        abort(404)
+    return jsonify(profile_store.profiles())
+
+
+@app.route("/profiles/<profile_id>.<kind>")
+def download_profile(profile_id: str, kind: str):
+    """
+    Downloads a saved profile: "json" is the summary of the hottest functions,
+    "folded" the collapsed stacks for flame graph tools and "prof" the pstats data.
+
+        Parameters:
+            profile_id (str): The profile's id.
+            kind (str): Which of the profile's files to download.
+        Returns:
+            send_file() (Response): The file.
+    """
+    path = profile_store.path(profile_id, kind)
+    if path is None or (profile_requests == "off" and not profile_jobs):
+        abort(404)
+    return send_file(os.path.abspath(path), mimetype=PROFILE_FILES[kind],
+                     as_attachment=kind != "json")
+
+
+@app.route("/metrics")
+def metrics():
+    """
+    Exposes the fetch, processing, render, request and job timings in the
+    Prometheus text format. Returns 404 when metrics_enabled is off in config.json.
+
+        Parameters:
+            None
+        Returns:
+            response (Response): The metrics as text.
+    """
+    if not registry.enabled:
+        return "Metrics are disabled", 404
+    return Response(registry.expose(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/events")
+def events():
+    """
+    Streams Server-Sent Events to the dashboard whenever the covid metrics, news
+    articles or update toasts change, so open pages update without polling.
+
+        Parameters:
+            None
+        Returns:
+            response (Response): The text/event-stream response.
+    """
+    last_id = request.headers.get("Last-Event-ID", type=int)
+    # Each stream holds a server thread, so it ends after a while and the browser reconnects.
+    return Response(event_bus.stream(last_id, duration=events_stream_seconds),
+                    mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def publish_event(event: str, data: object) -> None:
+    """
+    Pushes a change to every dashboard listening on /events.
+
+        Parameters:
+            event (str): What changed: "metrics", "articles" or "toasts".
+            data (object): JSON-serialisable details of the change.
+
+        Returns:
+            None
+    """
+    if process_role == "coordinator":
+        # Numbered by the shared store, so every process gives the event the same id.
+        with shared_event_lock:
+            event_bus.publish(event, data, shared_state.append_event(event, data))
+    else:
+        event_bus.publish(event, data)
+
+
+def invalidate_dashboard(reason: str) -> None:
+    """
+    Drops the cached dashboard pages after the covid data, news articles or
+    update toasts have changed.
+
+        Parameters:
+            reason (str): What changed, for the log.
+
+        Returns:
+            None
+    """
+    page_cache.bump(reason)
+    if process_role == "coordinator":
+        publish_shared_state()
+
+
+def publish_shared_state() -> None:
+    """
+    Publishes the covid metrics, news articles and update toasts to the shared
+    store for the workers. Only the kinds that changed are written.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+    """
+    with cdh.metrics_lock:
+        covid_metrics = dict(cdh.covid_metrics)
+    if covid_metrics:  # Never fetches; metrics are published once loaded
+        shared_state.publish("metrics", {
+            "dashboard": {key: covid_metrics[key] for key in DASHBOARD_METRICS},
+            "areas": cdh.metrics_index.summary()})
+    shared_state.publish("articles", cnh.article_store.articles())
+    shared_state.publish("toasts", update_toasts.toasts())
+
+
+def run_shared_commands() -> None:
+    """
+    Carries out the actions workers send to the coordinator, i.e. scheduling an
+    update from a worker's dashboard, checking for new ones every
+    shared_poll_interval seconds. Runs on a background thread of the coordinator.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+    """
+    while True:
+        try:
+            for command in shared_state.take_commands():
+                if command["action"] == "index":
+                    dashboard_action(command["args"])
+                else:
+                    logging.warning(f"Unknown shared command {command['action']}")
+        except Exception:  # pylint: disable=broad-except
+            logging.exception("Shared command failed")
+        time.sleep(shared_poll_interval)
+
+
+def sync_shared_state() -> list[str]:
+    """
+    Reads the data the coordinator published since the last sync into this worker
+    and relays the coordinator's new events to the dashboards listening here.
+
+        Parameters:
+            None
+
+        Returns:
+            changed (list[str]): The kinds of data that changed.
+    """
+    global shared_event_id  # pylint: disable=global-statement
+    # Events are read first: data is published before its event, so is never older.
+    events = shared_state.events_after(shared_event_id)
+    changed = []
+    for key, version in shared_state.versions().items():
+        if shared_versions.get(key) != version:
+            shared_versions[key], shared_data[key] = shared_state.read(key)
+            changed.append(key)
+    if changed:
+        invalidate_dashboard(f"shared {', '.join(changed)} updated")
+    for shared_event_id, event, data in events:
+        # Relayed with the coordinator's id, so a browser reconnecting to another
+        # worker with Last-Event-ID is sent the events it missed there too.
+        event_bus.publish(event, data, shared_event_id)
+    return changed
+
+
+def follow_shared_state() -> None:
+    """
+    Keeps a worker's copy of the shared data current, syncing every
+    shared_poll_interval seconds. Runs on a background thread of each worker.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+    """
+    while True:
+        time.sleep(shared_poll_interval)
+        try:
+            sync_shared_state()
+        except sqlite3.Error:
+            logging.exception("Shared state sync failed")
 
 
 def delete_update_toasts(toast_title: str) -> None:
     """
-    Removes the update toast to be deleted from the list of scheduled update toasts.
+    Removes the update toast to be deleted from the scheduled update toasts.
 
         Parameters:
             toast_title (str): Title of the update toast to be deleted.
-            scheduler_updates_toasts (list): List of scheduled update toasts.
 
         Returns:
             None
     """
-    for i in range(len(scheduler_updates_toasts)):  # For length of scheduled update toasts
-        if scheduler_updates_toasts[i]['title'] == toast_title:
-            del scheduler_updates_toasts[i]
-            logging.info(f"Update toast {toast_title} deleted")
-            break
+    if update_toasts.remove(toast_title):
+        logging.info(f"Update toast {toast_title} deleted", extra={"update": toast_title})
+        toasts_changed(f"update toast {toast_title} deleted")
+    else:
+        logging.warning(f"Update toast {toast_title} not found in list of updates toasts",
+                        extra={"update": toast_title})
+
+
+def toasts_changed(reason: str) -> None:
+    """
+    Re-renders open dashboards and sends them the scheduled update toasts.
+
+        Parameters:
+            reason (str): What changed, for the log.
+
+        Returns:
+            None
+    """
+    invalidate_dashboard(reason)
+    publish_event("toasts", update_toasts.toasts())
+
+
+def schedule_job(kind: str, update_name: str, time_till_update: int,
+                 is_repeating: bool, details: dict = None) -> Job:
+    """
+    Saves a job to the job store and adds it to the background scheduler.
+
+        Parameters:
+            kind (str): What the job does: "covid", "news", "both" or "toast".
+            update_name (str): Name of the update to be scheduled.
+            time_till_update (int): Number of seconds until the update should be executed.
+            is_repeating (bool): Whether or not the update should repeat every day.
+            details (dict): Any extra data needed to restore the job, defaults to the
+                update's toast.
+
+        Returns:
+            job (Job): The scheduled job.
+    """
+    if details is None:
+        details = update_toasts.get(update_name)
+    run_at = time.time() + time_till_update
+    interval = REPEAT_INTERVAL if is_repeating else None
+    job_id = job_store.add(kind, update_name, run_at, interval, details)
+    return scheduler.enterabs(run_at, 1, run_stored_job,
+                              (job_id, kind, update_name, run_at, interval), name=update_name)
+
+
+def run_stored_job(job_id: int, kind: str, update_name: str, run_at: float,
+                   interval: float) -> None:
+    """
+    Runs a stored job, then removes it and its update toast or, if it repeats,
+    schedules its next run at the same time of day as the original and moves the
+    toast to it.
+
+        Parameters:
+            job_id (int): Id of the job in the job store.
+            kind (str): What the job does: "covid", "news", "both" or "toast".
+            update_name (str): Name of the update.
+            run_at (float): Epoch time the job was due.
+            interval (float): Seconds between runs, or None if the job does not repeat.
+
+        Returns:
+            None
+    """
+    profiling = profile_store.profile(f"job {kind} {update_name}") if profile_jobs else nullcontext()
+    outcome = "failed"
+    start = time.perf_counter()
+    try:
+        with JOB_SECONDS.time(kind=kind), profiling:
+            if kind in ("news", "both"):
+                cnh.update_news(update_name, interval is not None)
+            if kind in ("covid", "both"):
+                cdh.update_covid_data(update_name, interval is not None)
+        outcome = "finished"
+    except Exception:
+        JOB_FAILURES.inc(kind=kind)
+        raise  # The scheduler logs the traceback
+    finally:
+        logging.info(f"Scheduled {kind} update {update_name} {outcome}",
+                     extra={"job": kind, "update": update_name, "job_id": job_id,
+                            "outcome": outcome, "duration": time.perf_counter() - start})
+        if interval is None:
+            job_store.remove(job_id)
+            if update_toasts.expire(update_name):
+                toasts_changed(f"update {update_name} finished")
         else:
-            logging.warning(
-                f"Update toast {toast_title} not found in list of updates toasts")
+            next_run_at = next_run_time(run_at, interval, time.time())
+            job_store.reschedule(job_id, next_run_at)
+            scheduler.enterabs(next_run_at, 1, run_stored_job,
+                               (job_id, kind, update_name, next_run_at, interval),
+                               name=update_name)
+            if update_toasts.reschedule(update_name, next_run_at):
+                toasts_changed(f"update {update_name} rescheduled")
 
 
-def schedule_toast_update(time_till_update: int, update_name: str) -> Event:
+def restore_jobs() -> int:
+    """
+    Reloads the saved jobs into the background scheduler after a restart, along with
+    their update toasts. Jobs that were due while the application was down run once
+    straight away; repeating jobs then continue on their original daily schedule.
+
+        Parameters:
+            None
+
+        Returns:
+            restored (int): The number of jobs restored.
+    """
+    jobs = job_store.load()
+    for job in jobs:
+        toast = job["details"]
+        if toast:
+            update_toasts.add(toast, job["run_at"])
+        scheduler.enterabs(job["run_at"], 1, run_stored_job,
+                           (job["id"], job["kind"], job["name"], job["run_at"], job["interval"]),
+                           name=job["name"])
+    if jobs:
+        toasts_changed("scheduled updates restored")
+    logging.info(f"Restored {len(jobs)} scheduled jobs")
+    return len(jobs)
+
+
+def schedule_toast_update(time_till_update: int, update_name: str) -> Job:
     """
     Adds a toast update to the scheduler
 
@@ -226,45 +862,43 @@ def schedule_toast_update(time_till_update: int, update_name: str) -> Event:
             update_name (str): Name of the update to be scheduled.
 
         Returns:
-            toast_update (event): The news update event that has been scheduled.
+            toast_update (Job): The toast update job that has been scheduled.
     """
-    toast_update = update_toast_scheduler.enter(
-        time_till_update, 1, delete_update_toasts, [update_name, ])
+    toast_update = schedule_job("toast", update_name, time_till_update, False)
     return toast_update
 
 
-def schedule_news_update(time_till_update: int, update_name: str, is_repeating: bool) -> Event:
+def schedule_news_update(time_till_update: int, update_name: str, is_repeating: bool) -> Job:
     """
     Adds a news update to the scheduler
 
         Parameters:
             time_till_update (int): Number of seconds until the update should be executed.
             update_name (str): Name of the update to be scheduled.
+            is_repeating (bool): Whether or not the update should repeat every day.
 
         Returns:
-            update (event): The news update event that has been scheduled.
+            update (Job): The news update job that has been scheduled.
     """
-    update = news_scheduler.enter(time_till_update, 1, cnh.update_news, [
-                                  update_name, is_repeating])
-    update_interface()
+    update = schedule_job("news", update_name, time_till_update, is_repeating)
     return update
 
 
-def schedule_covid_update(time_till_update: int, update_name: str, is_repeating: bool) -> Event:
+def schedule_covid_update(time_till_update: int, update_name: str, is_repeating: bool) -> Job:
     """
     Calls the covid data handler's event schedule
 
         Parameters:
             time_till_update (int): Number of seconds until the update should be executed.
             update_name (str): Name of the update to be scheduled.
+            is_repeating (bool): Whether or not the update should repeat every day.
 
         Returns:
-            update (event): The covid update event that has been scheduled.
+            update (Job): The covid update job that has been scheduled.
     """
     update = cdh.schedule_covid_updates(
         time_till_update, update_name, is_repeating)
     return update
-    # delete_update_toasts(update_name)
 
 
 def time_converter(update_time: str) -> int:
@@ -303,5 +937,11 @@ def time_converter(update_time: str) -> int:
 
 
 if __name__ == '__main__':
-    articles = cnh.news_API_request()
+    if process_role != "worker":
+        restore_jobs()  # Reloads scheduled updates saved before the last shutdown
+        cdh.warm_covid_metrics()  # Serves the last snapshot while fresh data is fetched
+        articles = cnh.news_API_request()
+    if process_role == "coordinator":
+        publish_shared_state()
+        Thread(target=run_shared_commands, name="shared-commands", daemon=True).start()
     app.run()
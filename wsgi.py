@@ -0,0 +1,16 @@
+"""
+WSGI entry point for serving the dashboard from several worker processes, i.e.
+
+    gunicorn --workers 4 --worker-class gthread --threads 16 wsgi:app
+
+alongside one coordinator, started with DASHBOARD_ROLE=coordinator python user_interface.py,
+which does all the fetching and scheduling. A threaded (or gevent) worker class is
+required: every open dashboard holds a connection to /events, which would take a
+whole sync worker. Do not use --preload: each worker starts its own threads after
+it is forked.
+"""
+import os
+
+os.environ.setdefault("DASHBOARD_ROLE", "worker")
+
+from user_interface import app  # pylint: disable=wrong-import-position,unused-import